@@ -0,0 +1,252 @@
+"""
+Headless HTTP API for the analyzer (ASGI, no framework).
+
+Endpoints:
+    POST /analyze          {"text": "...", "use_cache": true, "use_prescreen": true}
+    POST /analyze/file     raw file bytes; name via ?filename=report.pdf or an
+                           X-Filename header, type via Content-Type
+    POST /analyze/batch    {"texts": ["...", ...], "pack": 1}
+    GET  /health           scheduler, cache and single-flight status
+    GET  /metrics          Prometheus text format (utils.metrics)
+
+Responses are the same result dicts analyze_text returns. Blocking work runs
+on the API's own thread pool; each request has a timeout (504 when exceeded).
+
+Run:
+    uvicorn api:app --host 0.0.0.0 --port 8000
+
+Configuration (environment):
+    API_WORKERS           threads for analysis and extraction (default 32)
+    API_TIMEOUT           seconds per /analyze or /analyze/file request (default 60)
+    API_BATCH_TIMEOUT     seconds per /analyze/batch request (default 600)
+    API_MAX_BODY_BYTES    largest accepted request body (default 20 MB)
+    API_MAX_BATCH         most texts in one batch request (default 1000)
+    API_MAX_CONCURRENCY   most Gemini calls one batch request may run at once (default 16)
+"""
+import asyncio
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import parse_qs
+
+from dotenv import load_dotenv
+
+from utils.batch import DEFAULT_CONCURRENCY, DEFAULT_PACK_MAX_CHARS, analyze_texts
+from utils.file_processor import UploadedBytes, process_uploaded_file
+from utils.gemini_analysis import (
+    analyze_text,
+    configure_gemini,
+    get_cache_stats,
+    get_scheduler_stats,
+    get_singleflight_stats
+)
+from utils.metrics import inc, render_prometheus, stage_timer
+
+load_dotenv()
+configure_gemini(os.getenv("GOOGLE_API_KEY"))
+
+API_WORKERS = int(os.getenv("API_WORKERS", "32"))
+API_TIMEOUT = float(os.getenv("API_TIMEOUT", "60"))
+API_BATCH_TIMEOUT = float(os.getenv("API_BATCH_TIMEOUT", "600"))
+API_MAX_BODY_BYTES = int(os.getenv("API_MAX_BODY_BYTES", str(20 * 1024 * 1024)))
+API_MAX_BATCH = int(os.getenv("API_MAX_BATCH", "1000"))
+API_MAX_CONCURRENCY = int(os.getenv("API_MAX_CONCURRENCY", "16"))
+
+_executor = ThreadPoolExecutor(max_workers=API_WORKERS, thread_name_prefix="api-worker")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+async def _read_body(receive):
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] == "http.disconnect":
+            raise HTTPError(400, "Client disconnected")
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > API_MAX_BODY_BYTES:
+            raise HTTPError(413, f"Request body is larger than {API_MAX_BODY_BYTES} bytes")
+        chunks.append(chunk)
+        if not message.get("more_body"):
+            return b"".join(chunks)
+
+
+def _parse_json(body):
+    try:
+        payload = json.loads(body or b"{}")
+    except ValueError:
+        raise HTTPError(400, "Request body must be JSON")
+    if not isinstance(payload, dict):
+        raise HTTPError(400, "Request body must be a JSON object")
+    return payload
+
+
+def _bool_field(payload, name, default):
+    """payload[name] as a bool; anything but a JSON true/false is a 422"""
+    value = payload.get(name, default)
+    if not isinstance(value, bool):
+        raise HTTPError(422, f"'{name}' must be true or false")
+    return value
+
+
+def _int_field(payload, name, default, maximum=None):
+    """payload[name] as a positive integer, capped at maximum; anything else is a 422"""
+    value = payload.get(name, default)
+    if isinstance(value, bool) or not isinstance(value, int) or value < 1:
+        raise HTTPError(422, f"'{name}' must be a positive integer")
+    return min(value, maximum) if maximum is not None else value
+
+
+async def _run_blocking(fn, timeout):
+    """Runs fn on the API worker pool, giving up after timeout seconds"""
+    loop = asyncio.get_running_loop()
+    try:
+        return await asyncio.wait_for(loop.run_in_executor(_executor, fn), timeout)
+    except asyncio.TimeoutError:
+        # The worker thread finishes in the background; its result is dropped
+        raise HTTPError(504, f"Analysis did not finish within {timeout:g} seconds")
+
+
+async def _send(send, status, body, content_type="application/json"):
+    if content_type == "application/json":
+        body = json.dumps(body, ensure_ascii=False).encode("utf-8")
+    elif isinstance(body, str):
+        body = body.encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [
+            (b"content-type", content_type.encode("latin-1")),
+            (b"content-length", str(len(body)).encode("latin-1"))
+        ]
+    })
+    await send({"type": "http.response.body", "body": body})
+
+
+async def handle_analyze(scope, body):
+    payload = _parse_json(body)
+    text = payload.get("text")
+    if not isinstance(text, str) or not text.strip():
+        raise HTTPError(400, "'text' must be a non-empty string")
+    use_cache = _bool_field(payload, "use_cache", True)
+    use_prescreen = _bool_field(payload, "use_prescreen", True)
+    return await _run_blocking(lambda: analyze_text(text, use_cache, use_prescreen), API_TIMEOUT)
+
+
+async def handle_analyze_file(scope, body):
+    if not body:
+        raise HTTPError(400, "Send the file contents as the request body")
+    query = parse_qs(scope.get("query_string", b"").decode("latin-1"))
+    headers = {name.decode("latin-1").lower(): value.decode("latin-1") for name, value in scope["headers"]}
+    filename = (query.get("filename") or [headers.get("x-filename", "")])[0]
+    content_type = headers.get("content-type", "application/octet-stream").split(";")[0].strip()
+    if not filename and content_type == "application/octet-stream":
+        raise HTTPError(400, "Pass ?filename=... or a Content-Type so the file type can be detected")
+
+    def run():
+        text = process_uploaded_file(UploadedBytes(filename or "upload", content_type, body))
+        if not text or not text.strip():
+            return {"success": False, "error": "No text found in the file"}
+        result = analyze_text(text)
+        result["extracted_chars"] = len(text)
+        return result
+
+    try:
+        return await _run_blocking(run, API_TIMEOUT)
+    except HTTPError:
+        raise
+    except Exception as e:
+        raise HTTPError(422, str(e))
+
+
+async def handle_analyze_batch(scope, body):
+    payload = _parse_json(body)
+    texts = payload.get("texts")
+    if not isinstance(texts, list) or not all(isinstance(text, str) for text in texts):
+        raise HTTPError(400, "'texts' must be a list of strings")
+    if len(texts) > API_MAX_BATCH:
+        raise HTTPError(413, f"At most {API_MAX_BATCH} texts per batch")
+    options = {
+        "concurrency": _int_field(payload, "concurrency", DEFAULT_CONCURRENCY, API_MAX_CONCURRENCY),
+        "pack_size": _int_field(payload, "pack", 1),
+        "pack_max_chars": _int_field(payload, "pack_max_chars", DEFAULT_PACK_MAX_CHARS),
+        "use_cache": _bool_field(payload, "use_cache", True),
+        "use_prescreen": _bool_field(payload, "use_prescreen", True)
+    }
+
+    def run():
+        return list(analyze_texts(texts, **options))
+
+    results = await _run_blocking(run, API_BATCH_TIMEOUT)
+    return {"success": True, "results": results}
+
+
+async def handle_health(scope, body):
+    return {
+        "status": "degraded" if get_scheduler_stats()["circuit"] != "closed" else "ok",
+        "scheduler": get_scheduler_stats(),
+        "cache": get_cache_stats(),
+        "singleflight": get_singleflight_stats()
+    }
+
+
+ROUTES = {
+    ("POST", "/analyze"): handle_analyze,
+    ("POST", "/analyze/file"): handle_analyze_file,
+    ("POST", "/analyze/batch"): handle_analyze_batch,
+    ("GET", "/health"): handle_health,
+}
+
+
+async def app(scope, receive, send):
+    """The ASGI application"""
+    if scope["type"] == "lifespan":
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                _executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    if scope["type"] != "http":
+        return
+
+    path = scope["path"].rstrip("/") or "/"
+    method = scope["method"]
+    if method == "GET" and path == "/metrics":
+        await _send(send, 200, render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+        return
+
+    handler = ROUTES.get((method, path))
+    if handler is None:
+        known_path = any(route_path == path for _, route_path in ROUTES)
+        status = 405 if known_path else 404
+        await _send(send, status, {"success": False, "error": "Method not allowed" if known_path else "Not found"})
+        return
+
+    try:
+        with stage_timer("api_request", route=path):
+            body = await _read_body(receive)
+            result = await handler(scope, body)
+        status = 200
+    except HTTPError as e:
+        status, result = e.status, {"success": False, "error": e.message}
+    except Exception as e:
+        status, result = 500, {"success": False, "error": str(e)}
+    inc("api_requests_total", 1, "HTTP API requests by route and status", route=path, status=status)
+    await _send(send, status, result)
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    uvicorn.run("api:app", host=os.getenv("API_HOST", "127.0.0.1"), port=int(os.getenv("API_PORT", "8000")))
@@ -1,22 +1,32 @@
 import streamlit as st
+import hashlib
 import os
 from dotenv import load_dotenv
-import google.generativeai as genai
-import random
 from utils.gemini_analysis import (
-    analyze_text, 
+    INCREMENTAL_MIN_CHARS,
+    analyze_text_incremental,
+    analyze_text_stream,
+    configure_gemini,
+    get_example_analysis,
     get_severity_color, 
     get_score_color, 
     get_category_icon,
     create_annotated_text_html
 )
+from utils.cache import normalize_text
 from utils.file_processor import process_uploaded_file
-from data.quiz_examples import QUIZ_EXAMPLES, COMPARISON_EXAMPLES
+from utils.metrics import inc, start_metrics_server, start_timer
+from utils.quiz_bank import QuizSampler, get_quiz_bank
+from utils.quiz_engine import get_quiz_engine
+from data.quiz_examples import COMPARISON_EXAMPLES
 # Load environment variables
 load_dotenv()
 
-# Configure Gemini API - Sahi Syntax ye hai:
-genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
+# Configure Gemini API - the SDK itself is only imported on the first analysis
+configure_gemini(os.getenv("GOOGLE_API_KEY"))
+
+# Prometheus metrics at http://127.0.0.1:$METRICS_PORT/metrics (only if set)
+start_metrics_server()
 
 # Page configuration
 st.set_page_config(
@@ -38,6 +48,19 @@ if 'quiz_score' not in st.session_state:
     st.session_state.quiz_score = 0
 if 'quizzes_taken' not in st.session_state:
     st.session_state.quizzes_taken = 0
+if 'quiz_samplers' not in st.session_state:
+    st.session_state.quiz_samplers = {}
+# (category, difficulty) chosen when the quiz started. The filter selectboxes
+# aren't rendered during a quiz, so Streamlit drops their widget state
+if 'quiz_filters' not in st.session_state:
+    st.session_state.quiz_filters = (None, None)
+
+# Finished analyses, keyed by input_hash(text), survive reruns and page switches
+MAX_SESSION_RESULTS = 20
+if 'analysis_results' not in st.session_state:
+    st.session_state.analysis_results = {}
+if 'current_analysis' not in st.session_state:
+    st.session_state.current_analysis = None
 
 # Custom CSS
 st.markdown("""
@@ -99,6 +122,385 @@ st.markdown("""
 </style>
 """, unsafe_allow_html=True)
 
+def render_partial_analysis(partial):
+    """Renders whatever part of a streamed analysis has arrived so far"""
+    if "overall_confidence_score" in partial:
+        score = partial["overall_confidence_score"]
+        st.markdown(f"## {get_score_color(score)} Overall Risk Score: {score}/100")
+        st.progress(score / 100)
+    if "overall_assessment" in partial:
+        st.info(partial["overall_assessment"])
+    if "category_scores" in partial:
+        st.markdown(" | ".join(
+            f"{get_category_icon(category)} {score}"
+            for category, score in partial["category_scores"].items()
+        ))
+    if partial.get("red_flags"):
+        st.markdown("**🚩 Warning signs found so far:**")
+        for flag in partial["red_flags"]:
+            st.markdown(f"- {get_severity_color(flag.get('severity', ''))} {flag.get('flag', '')}")
+    if partial.get("suspicious_phrases"):
+        st.caption(f"⚠️ {len(partial['suspicious_phrases'])} suspicious phrase(s) found so far...")
+
+
+def input_hash(text):
+    """Session-state key for an analyzed text"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()
+
+
+def remember_analysis(key, text, result):
+    """Keeps a result in session state, dropping the oldest beyond MAX_SESSION_RESULTS"""
+    results = st.session_state.analysis_results
+    results[key] = (text, result)
+    while len(results) > MAX_SESSION_RESULTS:
+        results.pop(next(iter(results)))
+
+
+@st.fragment
+def render_analysis_results(user_text, result):
+    """
+    Renders a finished analysis. A fragment, so interacting with it reruns
+    only this section, not the whole page.
+    """
+    render_timer = start_timer("render")
+    try:
+        render_analysis_body(user_text, result)
+    except Exception as error:
+        render_timer.stop(error)
+        raise
+    finally:
+        render_timer.stop()
+
+
+def render_analysis_body(user_text, result):
+    """Everything render_analysis_results shows, without the timing"""
+    if result["success"]:
+        data = result["data"]
+
+        if result.get("source") == "offline":
+            st.warning(f"📴 The AI service is unavailable ({result['fallback_reason']}). Showing an offline estimate instead - treat it as a rough guide.")
+        elif result.get("source") == "cache":
+            st.caption("⚡ Served from cache - this message was analyzed recently")
+        elif result.get("source") == "near_duplicate":
+            st.caption(f"⚡ Matches a message analyzed earlier ({result['similarity']:.0%} similar) - the differences were re-checked locally")
+        elif result.get("source") == "blocklist":
+            st.caption("🚫 A link in this message is on our blocklist of known scam sites - no AI call was needed")
+        elif result.get("source") == "precomputed":
+            st.caption("⚡ Built-in example - this analysis was prepared ahead of time")
+        elif result.get("source") == "local":
+            st.caption("⚡ Instant verdict from built-in scam patterns - no AI call was needed")
+        elif result.get("model"):
+            escalated_note = " after escalating an uncertain first answer" if result.get("escalated") else ""
+            st.caption(f"🤖 Answered by {result['model']} (tier {result['tier']}){escalated_note}")
+        elif result.get("source") == "incremental":
+            reused = result['segments'] - result['reanalyzed']
+            st.caption(f"✂️ Analyzed in {result['segments']} parts - {reused} unchanged since your last analysis were reused")
+            if result.get("failed_segments"):
+                st.warning(f"⚠️ {result['failed_segments']} part(s) of the document could not be analyzed.")
+            if result.get("offline_segments"):
+                st.warning(f"📴 {result['offline_segments']} part(s) got an offline estimate because the AI service is unavailable ({result['fallback_reason']}).")
+        elif result.get("source") == "chunked":
+            st.caption(f"📄 Long document analyzed in {result['chunks']} parts")
+            if result.get("failed_chunks"):
+                st.warning(f"⚠️ {result['failed_chunks']} part(s) of the document could not be analyzed.")
+            if result.get("offline_chunks"):
+                st.warning(f"📴 {result['offline_chunks']} part(s) got an offline estimate because the AI service is unavailable ({result['fallback_reason']}).")
+
+        # ========== OVERALL SCORE (Always Visible) ==========
+        overall_score = data["overall_confidence_score"]
+        score_emoji = get_score_color(overall_score)
+
+        st.markdown(f"## {score_emoji} Overall Risk Score: {overall_score}/100")
+        st.progress(overall_score / 100)
+
+        # Overall Assessment
+        if data["is_safe"]:
+            st.success(f"✅ {data['overall_assessment']}")
+        else:
+            st.error(f"⚠️ {data['overall_assessment']}")
+
+        # Recommendation (Always visible)
+        st.info(f"💡 **Recommendation:** {data['recommendation']}")
+
+        st.markdown("---")
+
+        # ========== CATEGORY BREAKDOWN (Always Visible) ==========
+        st.subheader("📊 Category Breakdown")
+
+        cols = st.columns(5)
+        categories = data["category_scores"]
+
+        for idx, (category, score) in enumerate(categories.items()):
+            with cols[idx]:
+                icon = get_category_icon(category)
+                score_emoji = get_score_color(score)
+                category_name = category.replace("_", " ").title()
+
+                st.markdown(f"### {icon} {category_name}")
+                st.markdown(f"### {score_emoji} {score}/100")
+                st.progress(score / 100)
+
+        st.markdown("---")
+
+        # ========== TABBED DETAILED ANALYSIS ==========
+        st.subheader("🔍 Detailed Analysis")
+
+        # Determine if message is suspicious or safe
+        is_suspicious = overall_score >= 50
+
+        # Create tabs with dynamic labels
+        if is_suspicious:
+            tab1, tab2, tab3 = st.tabs([
+                "📝 Annotated Text",
+                "🚩 Warning Signs",
+                "⚠️ Suspicious Phrases"
+            ])
+        else:
+            tab1, tab2, tab3 = st.tabs([
+                "📝 Annotated Text",
+                "✅ Safety Indicators",
+                "ℹ️ Analysis Details"
+            ])
+
+        # TAB 1: Annotated Text
+        with tab1:
+            st.markdown("*Suspicious phrases are highlighted in red. Hover over them for details.*")
+
+            if data["suspicious_phrases"]:
+                html_content = create_annotated_text_html(user_text, data["suspicious_phrases"])
+                st.markdown(html_content, unsafe_allow_html=True)
+            else:
+                st.markdown(create_annotated_text_html(user_text, []), unsafe_allow_html=True)
+                st.info("✅ No specific suspicious phrases detected in this text.")
+
+        # TAB 2: Red Flags or Safety Features
+        with tab2:
+            if is_suspicious and data["red_flags"]:
+                st.markdown("### 🚩 Warning Signs Detected")
+                for flag in data["red_flags"]:
+                    severity_emoji = get_severity_color(flag["severity"])
+                    with st.expander(f"{severity_emoji} {flag['flag']} ({flag['severity'].upper()})"):
+                        st.write(flag["explanation"])
+            elif not is_suspicious and data["red_flags"]:
+                st.markdown("### ✅ Why This Message Appears Legitimate")
+                st.info("While some caution flags were detected, the overall message appears relatively safe based on the following analysis:")
+                for flag in data["red_flags"]:
+                    severity_emoji = get_severity_color(flag["severity"])
+                    with st.expander(f"{severity_emoji} {flag['flag']} (Caution: {flag['severity'].upper()})"):
+                        st.write(flag["explanation"])
+            else:
+                st.success("✅ No major warning signs detected in this message.")
+                st.markdown("""
+                This message appears to be legitimate based on:
+                - No urgent pressure tactics
+                - No requests for sensitive information
+                - No suspicious links or attachments
+                - Professional tone and formatting
+
+                However, always verify sender identity through official channels if uncertain.
+                """)
+
+        # TAB 3: Suspicious Phrases or Details
+        with tab3:
+            if data["suspicious_phrases"]:
+                st.markdown("### 🔍 Phrase Analysis")
+                st.markdown("*These phrases were highlighted in the annotated text above.*")
+
+                for idx, phrase_data in enumerate(data["suspicious_phrases"], 1):
+                    with st.expander(f"⚠️ Phrase {idx}: \"{phrase_data['phrase']}\""):
+                        st.markdown(f"**Why it raised a flag:**")
+                        st.write(phrase_data['reason'])
+            else:
+                st.markdown("### ℹ️ Analysis Summary")
+                st.info("No specific suspicious phrases were detected. The message uses generally acceptable language and tone.")
+
+                # Show what made it safe
+                if not is_suspicious:
+                    st.markdown("""
+                    **Positive indicators:**
+                    - Clear, specific communication
+                    - No pressure or urgency
+                    - Professional language
+                    - No requests for sensitive data
+                    """)
+
+    else:
+        st.error(f"❌ Analysis failed: {result['error']}")
+        if "raw_response" in result:
+            with st.expander("Show raw response"):
+                st.code(result["raw_response"])
+
+
+# Quiz button callbacks. They run before the rerun a click triggers, so the
+# quiz renders with the new state without an extra st.rerun()
+def start_new_quiz(from_filters=False):
+    # One non-repeating sampler per session and filter, so a user sees every
+    # matching quiz before any comes back
+    bank = get_quiz_bank()
+    if from_filters:
+        st.session_state.quiz_filters = (
+            st.session_state.get('quiz_category_filter'),
+            st.session_state.get('quiz_difficulty_filter')
+        )
+    category, difficulty = st.session_state.quiz_filters
+    size = bank.count(category, difficulty)
+    sampler = st.session_state.quiz_samplers.get((category, difficulty))
+    if sampler is None or sampler.size != size:
+        sampler = st.session_state.quiz_samplers[(category, difficulty)] = QuizSampler(size)
+
+    st.session_state.quiz_mode = True
+    st.session_state.current_quiz = bank.get(category, difficulty, sampler.draw())
+    st.session_state.quiz_selections = []
+    st.session_state.quiz_revealed = False
+
+
+def toggle_quiz_word(quiz, word_index):
+    # Selects the whole suspicious phrase the word belongs to, or just the word
+    engine = get_quiz_engine(quiz)
+    st.session_state.quiz_selections = engine.toggle(st.session_state.quiz_selections, word_index)
+
+
+def reveal_quiz_answer(quiz):
+    st.session_state.quiz_revealed = True
+
+    # Calculate score
+    _, _, score_percent = get_quiz_engine(quiz).score(st.session_state.quiz_selections)
+
+    st.session_state.quiz_score += score_percent
+    st.session_state.quizzes_taken += 1
+
+
+def exit_quiz():
+    st.session_state.quiz_mode = False
+
+
+@st.fragment
+def render_quiz():
+    """
+    The interactive quiz. A fragment: clicks inside it rerun only the quiz, not
+    the whole page. Revealing an answer reruns the app so the sidebar stats update.
+    """
+    st.markdown("## 🎯 Test Your Scam Detection Skills!")
+    st.markdown("Can you identify the suspicious phrases in these real-world examples?")
+
+    if not st.session_state.quiz_mode:
+        st.info("💡 **How it works:** Read the message below and click on phrases you think are suspicious. When you're done, reveal the answer to see how you did!")
+
+        bank = get_quiz_bank()
+        # Show the filters of the last quiz again after exiting one
+        if 'quiz_category_filter' not in st.session_state:
+            st.session_state.quiz_category_filter, st.session_state.quiz_difficulty_filter = st.session_state.quiz_filters
+        col1, col2 = st.columns(2)
+        with col1:
+            st.selectbox("Category", [None] + bank.categories(), key='quiz_category_filter',
+                         format_func=lambda category: category or "All categories")
+        with col2:
+            st.selectbox("Difficulty", [None] + bank.difficulties(), key='quiz_difficulty_filter',
+                         format_func=lambda difficulty: difficulty.capitalize() if difficulty else "Any difficulty")
+
+        col1, col2, col3 = st.columns([1, 2, 1])
+        with col2:
+            available = bank.count(st.session_state.quiz_category_filter, st.session_state.quiz_difficulty_filter)
+            if available == 0:
+                st.warning("No quizzes match these filters.")
+            st.button("🎮 Start Quiz", type="primary", use_container_width=True, on_click=start_new_quiz,
+                      kwargs={"from_filters": True}, disabled=available == 0)
+
+    else:
+        quiz = st.session_state.current_quiz
+
+        # Display quiz category and difficulty
+        col1, col2 = st.columns(2)
+        with col1:
+            st.markdown(f"### 📂 Category: {quiz['category']}")
+        with col2:
+            risk_color = "🔴" if quiz['risk_score'] >= 80 else "🟡" if quiz['risk_score'] >= 50 else "🟢"
+            st.markdown(f"### {risk_color} Risk Level: {quiz['risk_score']}/100")
+
+        st.markdown("---")
+
+        # Display the text with clickable phrases
+        st.markdown("### 📝 Message to Analyze:")
+        st.markdown("*Click on words or phrases you think are suspicious:*")
+
+        # Split text into words for clicking
+        engine = get_quiz_engine(quiz)
+        words = engine.words
+
+        if not st.session_state.quiz_revealed:
+            # Interactive mode - let user click
+            cols_per_row = 6
+            word_index = 0
+            selected_words = engine.selected_words(st.session_state.quiz_selections)
+
+            while word_index < len(words):
+                cols = st.columns(cols_per_row)
+                for col in cols:
+                    if word_index < len(words):
+                        with col:
+                            word = words[word_index]
+                            # Check if this word is part of a selected phrase
+                            is_selected = word_index in selected_words
+
+                            button_type = "primary" if is_selected else "secondary"
+                            st.button(word, key=f"word_{word_index}", use_container_width=True,
+                                      on_click=toggle_quiz_word, args=(quiz, word_index))
+                        word_index += 1
+                    else:
+                        break
+
+            st.markdown("---")
+
+            # Show selected phrases
+            if st.session_state.quiz_selections:
+                st.markdown("### ✅ Your Selections:")
+                for selection in st.session_state.quiz_selections:
+                    st.markdown(f"- {engine.selection_text(selection)}")
+
+            # Reveal button
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col2:
+                if st.button("🎯 Reveal Answer", type="primary", use_container_width=True,
+                             on_click=reveal_quiz_answer, args=(quiz,)):
+                    # Full rerun so the progress stats in the sidebar update
+                    st.rerun()
+
+        else:
+            # Revealed mode - show answers
+            st.markdown("### 🎯 Answer Revealed!")
+
+            # Calculate and show score
+            correct_count, total_possible, score_percent = engine.score(st.session_state.quiz_selections)
+            found = engine.phrases_found(st.session_state.quiz_selections)
+
+            if score_percent >= 80:
+                st.success(f"🌟 Excellent! You identified {correct_count}/{total_possible} suspicious phrases ({score_percent:.0f}%)")
+            elif score_percent >= 50:
+                st.info(f"👍 Good job! You identified {correct_count}/{total_possible} suspicious phrases ({score_percent:.0f}%)")
+            else:
+                st.warning(f"📚 Keep learning! You identified {correct_count}/{total_possible} suspicious phrases ({score_percent:.0f}%)")
+
+            # Show all suspicious phrases with explanations
+            st.markdown("### 🚩 All Suspicious Phrases:")
+            for idx, sp in enumerate(quiz['suspicious_phrases'], 1):
+                was_selected = idx - 1 in found
+                icon = "✅" if was_selected else "❌"
+
+                with st.expander(f"{icon} {idx}. \"{sp['phrase']}\""):
+                    st.markdown(f"**Why it's suspicious:**")
+                    st.write(sp['reason'])
+
+            # Next quiz button
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col2:
+                st.button("🔄 Try Another Quiz", type="primary", use_container_width=True, on_click=start_new_quiz)
+
+            # Exit quiz button
+            col1, col2, col3 = st.columns([1, 1, 1])
+            with col2:
+                st.button("🏁 Exit Quiz", use_container_width=True, on_click=exit_quiz)
+
+
 # Title and description
 st.title("🛡️ Digital Literacy Assistant")
 st.markdown("""
@@ -188,150 +590,55 @@ if page == "🔍 Analyze Text":
     with col2:
         clear_button = st.button("🗑️ Clear", use_container_width=True)
     
-    # Clear functionality
+    # Clear hides the current result; it stays in session state, so analyzing
+    # the same text again shows it instantly
     if clear_button:
-        st.rerun()
+        st.session_state.current_analysis = None
     
     # Analysis section
+    text_key = input_hash(user_text) if user_text and user_text.strip() else None
     if analyze_button:
-        if user_text and user_text.strip():
-            st.markdown("---")
-            
-            with st.spinner("🤖 Analyzing text with Google Gemini AI..."):
-                result = analyze_text(user_text)
-            
-            if result["success"]:
-                data = result["data"]
-                
-                # ========== OVERALL SCORE (Always Visible) ==========
-                overall_score = data["overall_confidence_score"]
-                score_emoji = get_score_color(overall_score)
-                
-                st.markdown(f"## {score_emoji} Overall Risk Score: {overall_score}/100")
-                st.progress(overall_score / 100)
-                
-                # Overall Assessment
-                if data["is_safe"]:
-                    st.success(f"✅ {data['overall_assessment']}")
-                else:
-                    st.error(f"⚠️ {data['overall_assessment']}")
-                
-                # Recommendation (Always visible)
-                st.info(f"💡 **Recommendation:** {data['recommendation']}")
-                
-                st.markdown("---")
-                
-                # ========== CATEGORY BREAKDOWN (Always Visible) ==========
-                st.subheader("📊 Category Breakdown")
-                
-                cols = st.columns(5)
-                categories = data["category_scores"]
-                
-                for idx, (category, score) in enumerate(categories.items()):
-                    with cols[idx]:
-                        icon = get_category_icon(category)
-                        score_emoji = get_score_color(score)
-                        category_name = category.replace("_", " ").title()
-                        
-                        st.markdown(f"### {icon} {category_name}")
-                        st.markdown(f"### {score_emoji} {score}/100")
-                        st.progress(score / 100)
-                
+        if text_key:
+            if text_key not in st.session_state.analysis_results:
                 st.markdown("---")
                 
-                # ========== TABBED DETAILED ANALYSIS ==========
-                st.subheader("🔍 Detailed Analysis")
-                
-                # Determine if message is suspicious or safe
-                is_suspicious = overall_score >= 50
-                
-                # Create tabs with dynamic labels
-                if is_suspicious:
-                    tab1, tab2, tab3 = st.tabs([
-                        "📝 Annotated Text",
-                        "🚩 Warning Signs",
-                        "⚠️ Suspicious Phrases"
-                    ])
-                else:
-                    tab1, tab2, tab3 = st.tabs([
-                        "📝 Annotated Text",
-                        "✅ Safety Indicators",
-                        "ℹ️ Analysis Details"
-                    ])
-                
-                # TAB 1: Annotated Text
-                with tab1:
-                    st.markdown("*Suspicious phrases are highlighted in red. Hover over them for details.*")
-                    
-                    if data["suspicious_phrases"]:
-                        html_content = create_annotated_text_html(user_text, data["suspicious_phrases"])
-                        st.markdown(html_content, unsafe_allow_html=True)
-                    else:
-                        st.markdown(f"""
-                        <div style='background-color: #1e1e1e; padding: 20px; border-radius: 10px; border: 2px solid #444; font-size: 16px; line-height: 1.8;'>
-                        {user_text}
-                        </div>
-                        """, unsafe_allow_html=True)
-                        st.info("✅ No specific suspicious phrases detected in this text.")
-                
-                # TAB 2: Red Flags or Safety Features
-                with tab2:
-                    if is_suspicious and data["red_flags"]:
-                        st.markdown("### 🚩 Warning Signs Detected")
-                        for flag in data["red_flags"]:
-                            severity_emoji = get_severity_color(flag["severity"])
-                            with st.expander(f"{severity_emoji} {flag['flag']} ({flag['severity'].upper()})"):
-                                st.write(flag["explanation"])
-                    elif not is_suspicious and data["red_flags"]:
-                        st.markdown("### ✅ Why This Message Appears Legitimate")
-                        st.info("While some caution flags were detected, the overall message appears relatively safe based on the following analysis:")
-                        for flag in data["red_flags"]:
-                            severity_emoji = get_severity_color(flag["severity"])
-                            with st.expander(f"{severity_emoji} {flag['flag']} (Caution: {flag['severity'].upper()})"):
-                                st.write(flag["explanation"])
-                    else:
-                        st.success("✅ No major warning signs detected in this message.")
-                        st.markdown("""
-                        This message appears to be legitimate based on:
-                        - No urgent pressure tactics
-                        - No requests for sensitive information
-                        - No suspicious links or attachments
-                        - Professional tone and formatting
-                        
-                        However, always verify sender identity through official channels if uncertain.
-                        """)
-                
-                # TAB 3: Suspicious Phrases or Details
-                with tab3:
-                    if data["suspicious_phrases"]:
-                        st.markdown("### 🔍 Phrase Analysis")
-                        st.markdown("*These phrases were highlighted in the annotated text above.*")
-                        
-                        for idx, phrase_data in enumerate(data["suspicious_phrases"], 1):
-                            with st.expander(f"⚠️ Phrase {idx}: \"{phrase_data['phrase']}\""):
-                                st.markdown(f"**Why it raised a flag:**")
-                                st.write(phrase_data['reason'])
+                # Stream the verdict: show the score and assessment as soon as they
+                # arrive, then the warning signs one by one
+                live_placeholder = st.empty()
+                result = None
+                analyze_timer = start_timer("analyze")
+                with st.spinner("🤖 Analyzing text with Google Gemini AI..."):
+                    if len(user_text) >= INCREMENTAL_MIN_CHARS:
+                        # Long documents: analyzed in large chunks the first time;
+                        # after an edit only the changed sentences are sent again
+                        result, st.session_state.incremental_state = analyze_text_incremental(
+                            user_text, previous=st.session_state.get('incremental_state')
+                        )
                     else:
-                        st.markdown("### ℹ️ Analysis Summary")
-                        st.info("No specific suspicious phrases were detected. The message uses generally acceptable language and tone.")
-                        
-                        # Show what made it safe
-                        if not is_suspicious:
-                            st.markdown("""
-                            **Positive indicators:**
-                            - Clear, specific communication
-                            - No pressure or urgency
-                            - Professional language
-                            - No requests for sensitive data
-                            """)
-                
-            else:
-                st.error(f"❌ Analysis failed: {result['error']}")
-                if "raw_response" in result:
-                    with st.expander("Show raw response"):
-                        st.code(result["raw_response"])
+                        for event in analyze_text_stream(user_text):
+                            if event["type"] == "partial":
+                                with live_placeholder.container():
+                                    render_partial_analysis(event["data"])
+                            else:
+                                result = event["result"]
+                analyze_timer.stop()
+                live_placeholder.empty()
+                inc("analyses_total", 1, "Analyses by result source",
+                    source=result.get("source", "error") if result["success"] else "error")
+                remember_analysis(text_key, user_text, result)
+            st.session_state.current_analysis = text_key
         else:
             st.warning("⚠️ Please enter some text or upload a file to analyze!")
+    elif text_key in st.session_state.analysis_results and not clear_button:
+        # Already analyzed in this session (e.g. after switching pages)
+        st.session_state.current_analysis = text_key
+    
+    if st.session_state.current_analysis in st.session_state.analysis_results:
+        st.markdown("---")
+        analyzed_text, result = st.session_state.analysis_results[st.session_state.current_analysis]
+        if text_key and text_key != st.session_state.current_analysis:
+            st.caption("ℹ️ Showing the results for the text you analyzed before - click Analyze to check the new text.")
+        render_analysis_results(analyzed_text, result)
 
 elif page == "📖 Learn More":
     st.header("📚 Digital Literacy Education")
@@ -413,149 +720,8 @@ elif page == "📖 Learn More":
     
     # TAB 2: Interactive Quiz
     with learn_tab2:
-        st.markdown("## 🎯 Test Your Scam Detection Skills!")
-        st.markdown("Can you identify the suspicious phrases in these real-world examples?")
-        
-        if not st.session_state.quiz_mode:
-            st.info("💡 **How it works:** Read the message below and click on phrases you think are suspicious. When you're done, reveal the answer to see how you did!")
-            
-            col1, col2, col3 = st.columns([1, 2, 1])
-            with col2:
-                if st.button("🎮 Start Quiz", type="primary", use_container_width=True):
-                    st.session_state.quiz_mode = True
-                    st.session_state.current_quiz = random.choice(QUIZ_EXAMPLES)
-                    st.session_state.quiz_selections = []
-                    st.session_state.quiz_revealed = False
-                    st.rerun()
-        
-        else:
-            quiz = st.session_state.current_quiz
-            
-            # Display quiz category and difficulty
-            col1, col2 = st.columns(2)
-            with col1:
-                st.markdown(f"### 📂 Category: {quiz['category']}")
-            with col2:
-                risk_color = "🔴" if quiz['risk_score'] >= 80 else "🟡" if quiz['risk_score'] >= 50 else "🟢"
-                st.markdown(f"### {risk_color} Risk Level: {quiz['risk_score']}/100")
-            
-            st.markdown("---")
-            
-            # Display the text with clickable phrases
-            st.markdown("### 📝 Message to Analyze:")
-            st.markdown("*Click on words or phrases you think are suspicious:*")
-            
-            # Split text into words for clicking
-            words = quiz['text'].split()
-            
-            if not st.session_state.quiz_revealed:
-                # Interactive mode - let user click
-                cols_per_row = 6
-                word_index = 0
-                
-                while word_index < len(words):
-                    cols = st.columns(cols_per_row)
-                    for col in cols:
-                        if word_index < len(words):
-                            with col:
-                                word = words[word_index]
-                                # Check if this word is part of a selected phrase
-                                is_selected = any(word.lower() in phrase.lower() for phrase in st.session_state.quiz_selections)
-                                
-                                button_type = "primary" if is_selected else "secondary"
-                                if st.button(word, key=f"word_{word_index}", use_container_width=True):
-                                    # Try to match with suspicious phrases
-                                    matched = False
-                                    for sp in quiz['suspicious_phrases']:
-                                        if word.lower() in sp['phrase'].lower():
-                                            phrase = sp['phrase']
-                                            if phrase in st.session_state.quiz_selections:
-                                                st.session_state.quiz_selections.remove(phrase)
-                                            else:
-                                                st.session_state.quiz_selections.append(phrase)
-                                            matched = True
-                                            break
-                                    
-                                    if not matched:
-                                        # If not part of suspicious phrase, add the word itself
-                                        if word in st.session_state.quiz_selections:
-                                            st.session_state.quiz_selections.remove(word)
-                                        else:
-                                            st.session_state.quiz_selections.append(word)
-                                    
-                                    st.rerun()
-                            word_index += 1
-                        else:
-                            break
-                
-                st.markdown("---")
-                
-                # Show selected phrases
-                if st.session_state.quiz_selections:
-                    st.markdown("### ✅ Your Selections:")
-                    for selection in st.session_state.quiz_selections:
-                        st.markdown(f"- {selection}")
-                
-                # Reveal button
-                col1, col2, col3 = st.columns([1, 1, 1])
-                with col2:
-                    if st.button("🎯 Reveal Answer", type="primary", use_container_width=True):
-                        st.session_state.quiz_revealed = True
-                        
-                        # Calculate score
-                        correct_phrases = [sp['phrase'] for sp in quiz['suspicious_phrases']]
-                        correct_count = sum(1 for sel in st.session_state.quiz_selections if any(sel.lower() in cp.lower() or cp.lower() in sel.lower() for cp in correct_phrases))
-                        total_possible = len(correct_phrases)
-                        score_percent = (correct_count / total_possible * 100) if total_possible > 0 else 0
-                        
-                        st.session_state.quiz_score += score_percent
-                        st.session_state.quizzes_taken += 1
-                        
-                        st.rerun()
-            
-            else:
-                # Revealed mode - show answers
-                st.markdown("### 🎯 Answer Revealed!")
-                
-                # Calculate and show score
-                correct_phrases = [sp['phrase'] for sp in quiz['suspicious_phrases']]
-                correct_count = sum(1 for sel in st.session_state.quiz_selections if any(sel.lower() in cp.lower() or cp.lower() in sel.lower() for cp in correct_phrases))
-                total_possible = len(correct_phrases)
-                score_percent = (correct_count / total_possible * 100) if total_possible > 0 else 0
-                
-                if score_percent >= 80:
-                    st.success(f"🌟 Excellent! You identified {correct_count}/{total_possible} suspicious phrases ({score_percent:.0f}%)")
-                elif score_percent >= 50:
-                    st.info(f"👍 Good job! You identified {correct_count}/{total_possible} suspicious phrases ({score_percent:.0f}%)")
-                else:
-                    st.warning(f"📚 Keep learning! You identified {correct_count}/{total_possible} suspicious phrases ({score_percent:.0f}%)")
-                
-                # Show all suspicious phrases with explanations
-                st.markdown("### 🚩 All Suspicious Phrases:")
-                for idx, sp in enumerate(quiz['suspicious_phrases'], 1):
-                    was_selected = any(sp['phrase'].lower() in sel.lower() or sel.lower() in sp['phrase'].lower() for sel in st.session_state.quiz_selections)
-                    icon = "✅" if was_selected else "❌"
-                    
-                    with st.expander(f"{icon} {idx}. \"{sp['phrase']}\""):
-                        st.markdown(f"**Why it's suspicious:**")
-                        st.write(sp['reason'])
-                
-                # Next quiz button
-                col1, col2, col3 = st.columns([1, 1, 1])
-                with col2:
-                    if st.button("🔄 Try Another Quiz", type="primary", use_container_width=True):
-                        st.session_state.current_quiz = random.choice(QUIZ_EXAMPLES)
-                        st.session_state.quiz_selections = []
-                        st.session_state.quiz_revealed = False
-                        st.rerun()
-                
-                # Exit quiz button
-                col1, col2, col3 = st.columns([1, 1, 1])
-                with col2:
-                    if st.button("🏁 Exit Quiz", use_container_width=True):
-                        st.session_state.quiz_mode = False
-                        st.rerun()
-    
+        render_quiz()
+
     # TAB 3: Spot the Difference
     with learn_tab3:
         st.markdown("## 🔄 Spot the Difference")
@@ -591,6 +757,17 @@ elif page == "📖 Learn More":
             </div>
             """, unsafe_allow_html=True)
         
+        # Analyses prepared at build time (utils.precomputed); shown only when available
+        suspicious_analysis = get_example_analysis(example['suspicious'])
+        legitimate_analysis = get_example_analysis(example['legitimate'])
+        if suspicious_analysis and legitimate_analysis:
+            col1, col2 = st.columns(2)
+            for col, analysis in ((col1, suspicious_analysis), (col2, legitimate_analysis)):
+                with col:
+                    score = analysis['overall_confidence_score']
+                    st.markdown(f"**{get_score_color(score)} AI Risk Score: {score}/100**")
+                    st.caption(analysis['overall_assessment'])
+
         st.markdown("---")
         
         # Show detailed differences
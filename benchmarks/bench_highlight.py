@@ -0,0 +1,140 @@
+"""
+Benchmark: single-pass highlighter vs the original create_annotated_text_html.
+
+Run from the repository root:
+    python -m benchmarks.bench_highlight
+    python -m benchmarks.bench_highlight --sizes 10000 1000000 --phrases 50 500
+"""
+import argparse
+import random
+import time
+
+from utils.highlight import create_annotated_text_html
+
+WORDS = (
+    "the account your please bank verify message team update offer customer "
+    "service order delivery payment today thanks regards support online"
+).split()
+
+
+def legacy_create_annotated_text_html(original_text, suspicious_phrases):
+    """
+    The original highlighter, kept verbatim as the benchmark baseline.
+    Lowercases the whole text once per phrase and rescans it with str.replace.
+    """
+    if not suspicious_phrases:
+        return f"""
+        <div style='background-color: #1e1e1e; padding: 20px; border-radius: 10px; border: 2px solid #444; font-size: 16px; line-height: 1.8;'>
+            {original_text}
+        </div>
+        """
+    
+    import html
+    
+    # Escape the entire text first
+    escaped_text = html.escape(original_text)
+    
+    # Track replacements to make
+    replacements = []
+    
+    # Find all phrase positions in ORIGINAL text (not escaped)
+    for phrase_data in suspicious_phrases:
+        phrase = phrase_data["phrase"]
+        reason = html.escape(phrase_data["reason"])
+        
+        # Find phrase in original text (case-insensitive)
+        start_pos = original_text.lower().find(phrase.lower())
+        if start_pos != -1:
+            end_pos = start_pos + len(phrase)
+            original_phrase_text = original_text[start_pos:end_pos]
+            
+            replacements.append({
+                "original": original_phrase_text,
+                "escaped": html.escape(original_phrase_text),
+                "reason": reason
+            })
+    
+    # Now replace in the escaped text
+    highlighted_text = escaped_text
+    for replacement in replacements:
+        # Create the highlighted span
+        highlighted_span = f"""<span style='background-color: #ff4444; color: white; padding: 2px 6px; border-radius: 4px; font-weight: bold; cursor: help;' title='{replacement["reason"]}'>{replacement["escaped"]}</span>"""
+        
+        # Replace first occurrence
+        highlighted_text = highlighted_text.replace(replacement["escaped"], highlighted_span, 1)
+    
+    # Wrap in container
+    html_content = f"""
+    <div style='background-color: #1e1e1e; padding: 20px; border-radius: 10px; border: 2px solid #444; font-size: 16px; line-height: 1.8; color: #ffffff;'>
+        {highlighted_text}
+    </div>
+    """
+    
+    return html_content
+
+
+def make_case(text_chars, phrase_count, seed=0):
+    """Builds a text of about text_chars characters with phrase_count distinct flagged phrases"""
+    rng = random.Random(seed)
+    phrases = [
+        {"phrase": f"suspicious phrase {n} {rng.choice(WORDS)}", "reason": f"Reason {n} <why>"}
+        for n in range(phrase_count)
+    ]
+    words = []
+    length = 0
+    while length < text_chars:
+        if rng.random() < 0.02:
+            word = rng.choice(phrases)["phrase"]
+        else:
+            word = rng.choice(WORDS)
+        words.append(word)
+        length += len(word) + 1
+    return " ".join(words), phrases
+
+
+def time_call(func, *args, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes, phrase_counts, repeat=3, include_legacy=True):
+    """Returns a list of result rows; times are best-of-repeat in seconds"""
+    rows = []
+    for size in sizes:
+        for phrase_count in phrase_counts:
+            text, phrases = make_case(size, phrase_count)
+            row = {
+                "text_chars": len(text),
+                "phrases": phrase_count,
+                "new_seconds": time_call(create_annotated_text_html, text, phrases, repeat=repeat)
+            }
+            if include_legacy:
+                row["legacy_seconds"] = time_call(legacy_create_annotated_text_html, text, phrases, repeat=repeat)
+            rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--phrases", type=int, nargs="+", default=[10, 100, 500])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true", help="Only time the new highlighter")
+    args = parser.parse_args(argv)
+
+    print(f"{'chars':>10} {'phrases':>8} {'new (ms)':>10} {'legacy (ms)':>12} {'speedup':>8}")
+    for row in run(args.sizes, args.phrases, args.repeat, not args.skip_legacy):
+        new_ms = row["new_seconds"] * 1000
+        if "legacy_seconds" in row:
+            legacy_ms = row["legacy_seconds"] * 1000
+            print(f"{row['text_chars']:>10} {row['phrases']:>8} {new_ms:>10.1f} {legacy_ms:>12.1f} {legacy_ms / new_ms:>7.1f}x")
+        else:
+            print(f"{row['text_chars']:>10} {row['phrases']:>8} {new_ms:>10.1f} {'-':>12} {'-':>8}")
+
+
+if __name__ == "__main__":
+    main()
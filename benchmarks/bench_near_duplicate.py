@@ -0,0 +1,89 @@
+"""
+Benchmark: near-duplicate index query latency and recall as it grows.
+
+Indexes synthetic messages, then queries campaign variants of indexed
+messages (names, amounts and links changed) and unrelated messages.
+Reports query latency percentiles, the share of variants found (recall) and
+the share of unrelated messages wrongly matched.
+
+Run from the repository root:
+    python -m benchmarks.bench_near_duplicate
+    python -m benchmarks.bench_near_duplicate --entries 10000 100000 1000000 --queries 2000
+"""
+import argparse
+import random
+import time
+
+from utils.metrics import quantile
+from utils.near_duplicate import NearDuplicateIndex, minhash_signature
+
+WORDS = (
+    "your account parcel delivery payment verify bank customer update secure "
+    "please click link today fee refund prize claim order service team support "
+    "message hours suspended locked confirm details information online portal"
+).split()
+NAMES = ["John Smith", "Maria Lopez", "Wei Chen", "Aisha Khan", "Tom Brown", "Priya Patel"]
+
+
+def make_template(rng, words=30):
+    return " ".join(rng.choice(WORDS) for _ in range(words))
+
+
+def make_variant(rng, template):
+    """The template as a campaign would send it: a new name, amount and link"""
+    return (f"Dear {rng.choice(NAMES)}, {template} Pay ${rng.randint(1, 999)}.{rng.randint(10, 99)} "
+            f"at https://{rng.choice(WORDS)}-{rng.randint(1, 9999)}.example.com/{rng.randint(1, 10 ** 6)}")
+
+
+def run(entries, queries, seed=0):
+    rng = random.Random(seed)
+    index = NearDuplicateIndex(max_entries=entries)
+    templates = []
+    start = time.perf_counter()
+    for _ in range(entries):
+        template = make_template(rng)
+        templates.append(template)
+        index.add(make_variant(rng, template), {"overall_confidence_score": 90})
+    build_seconds = time.perf_counter() - start
+
+    latencies = []
+    found = 0
+    for _ in range(queries):
+        text = make_variant(rng, rng.choice(templates))
+        start = time.perf_counter()
+        match = index.query(text)
+        latencies.append(time.perf_counter() - start)
+        found += match is not None
+
+    false_matches = 0
+    for _ in range(queries):
+        text = make_variant(rng, make_template(rng))
+        signature = minhash_signature(text)
+        false_matches += index.query(text, signature) is not None
+
+    latencies.sort()
+    return {
+        "entries": entries,
+        "build_seconds": build_seconds,
+        "p50_ms": quantile(latencies, 0.5) * 1000,
+        "p99_ms": quantile(latencies, 0.99) * 1000,
+        "recall": found / queries,
+        "false_match_rate": false_matches / queries,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--entries", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=1000)
+    args = parser.parse_args(argv)
+
+    print(f"{'entries':>9} {'build (s)':>10} {'p50 (ms)':>9} {'p99 (ms)':>9} {'recall':>7} {'false':>7}")
+    for entries in args.entries:
+        row = run(entries, args.queries)
+        print(f"{row['entries']:>9} {row['build_seconds']:>10.1f} {row['p50_ms']:>9.3f} {row['p99_ms']:>9.3f} "
+              f"{row['recall']:>7.1%} {row['false_match_rate']:>7.1%}")
+
+
+if __name__ == "__main__":
+    main()
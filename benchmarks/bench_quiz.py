@@ -0,0 +1,120 @@
+"""
+Benchmark: QuizEngine vs the original inline quiz logic from app.py.
+
+One "render" is what a rerun of the quiz does before Streamlit draws it:
+work out which word buttons are selected and score the selections. The
+original checks every word against every selection with substring scans,
+so its cost grows with words x selections; the engine's index keeps it flat
+per word. Engine construction is timed separately since it runs once per quiz.
+
+Run from the repository root:
+    python -m benchmarks.bench_quiz
+    python -m benchmarks.bench_quiz --words 50 500 5000 --phrases 5 50
+"""
+import argparse
+import random
+import time
+
+from utils.quiz_engine import QuizEngine
+
+WORDS = (
+    "the account your please bank verify message team update offer customer "
+    "service order delivery payment today thanks regards support online"
+).split()
+
+
+def legacy_render(quiz, selections):
+    """The original per-rerun work: selected state of every word button, then the score"""
+    words = quiz["text"].split()
+    selected = [any(word.lower() in phrase.lower() for phrase in selections) for word in words]
+    correct_phrases = [sp["phrase"] for sp in quiz["suspicious_phrases"]]
+    correct_count = sum(
+        1 for sel in selections
+        if any(sel.lower() in cp.lower() or cp.lower() in sel.lower() for cp in correct_phrases)
+    )
+    return selected, correct_count
+
+
+def engine_render(engine, selections):
+    """The same per-rerun work with a prebuilt QuizEngine"""
+    selected_words = engine.selected_words(selections)
+    selected = [word_index in selected_words for word_index in range(len(engine.words))]
+    correct_count, _, _ = engine.score(selections)
+    return selected, correct_count
+
+
+def make_quiz(word_count, phrase_count, seed=0):
+    """Builds a quiz of word_count words with phrase_count distinct suspicious phrases in it"""
+    rng = random.Random(seed)
+    phrases = [f"act now {n} {rng.choice(WORDS)}" for n in range(phrase_count)]
+    words = []
+    for phrase in phrases:
+        words.extend(rng.choice(WORDS) for _ in range(max(1, word_count // (phrase_count + 1))))
+        words.extend(phrase.split())
+    while len(words) < word_count:
+        words.append(rng.choice(WORDS))
+    return {
+        "id": f"bench-{word_count}-{phrase_count}",
+        "text": " ".join(words),
+        "suspicious_phrases": [{"phrase": phrase, "reason": "benchmark"} for phrase in phrases],
+        "category": "Benchmark",
+        "risk_score": 90,
+    }
+
+
+def make_clicks(quiz, clicks, seed=0):
+    rng = random.Random(seed)
+    return [rng.randrange(len(quiz["text"].split())) for _ in range(clicks)]
+
+
+def time_call(func, *args, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(word_counts, phrase_counts, clicks=12, repeat=5):
+    """Returns a list of result rows; times are best-of-repeat in seconds"""
+    rows = []
+    for word_count in word_counts:
+        for phrase_count in phrase_counts:
+            quiz = make_quiz(word_count, phrase_count)
+            engine = QuizEngine(quiz)
+            selections = []
+            for word_index in make_clicks(quiz, clicks):
+                selections = engine.toggle(selections, word_index)
+            legacy_selections = [engine.selection_text(selection) for selection in selections]
+            render_seconds = time_call(engine_render, engine, selections, repeat=repeat)
+            rows.append({
+                "words": len(engine.words),
+                "phrases": phrase_count,
+                "build_seconds": time_call(QuizEngine, quiz, repeat=repeat),
+                "render_seconds": render_seconds,
+                "render_per_word_seconds": render_seconds / len(engine.words),
+                "legacy_render_seconds": time_call(legacy_render, quiz, legacy_selections, repeat=repeat),
+            })
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--words", type=int, nargs="+", default=[50, 500, 5_000, 50_000])
+    parser.add_argument("--phrases", type=int, nargs="+", default=[5, 50])
+    parser.add_argument("--clicks", type=int, default=12, help="Word clicks before each render")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    print(f"{'words':>8} {'phrases':>8} {'build (ms)':>11} {'render (ms)':>12} {'per word (us)':>14} "
+          f"{'legacy (ms)':>12} {'speedup':>8}")
+    for row in run(args.words, args.phrases, args.clicks, args.repeat):
+        render_ms = row["render_seconds"] * 1000
+        legacy_ms = row["legacy_render_seconds"] * 1000
+        print(f"{row['words']:>8} {row['phrases']:>8} {row['build_seconds'] * 1000:>11.2f} {render_ms:>12.3f} "
+              f"{row['render_per_word_seconds'] * 1e6:>14.3f} {legacy_ms:>12.3f} {legacy_ms / render_ms:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Benchmark: cold-start import cost, from `python -X importtime`.
+
+Each target is imported in a fresh interpreter (as a new Streamlit worker or
+container would) and the report shows the total import time, the slowest
+packages, and which heavy SDKs were pulled in at import time - those should
+only load on first use.
+
+Run from the repository root:
+    python -m benchmarks.bench_startup
+    python -m benchmarks.bench_startup --module utils.batch --top 15 --json startup.json
+    python -m benchmarks.bench_startup --fail-on-heavy      # exit 1 if a target imports an SDK eagerly
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# What app.py imports before the first page renders (streamlit itself aside)
+APP_IMPORTS = "import dotenv, utils.gemini_analysis, utils.file_processor, utils.metrics, data.quiz_examples"
+
+DEFAULT_TARGETS = {
+    "app": APP_IMPORTS,
+    "api": "import api",
+    "utils.file_processor": "import utils.file_processor",
+    "utils.gemini_analysis": "import utils.gemini_analysis",
+}
+
+# Packages that must not be imported until the feature using them runs
+HEAVY_PACKAGES = ["google.generativeai", "PyPDF2", "docx", "PIL", "pytesseract", "numpy"]
+
+
+def parse_importtime(stderr):
+    """
+    Parses -X importtime output.
+
+    Returns:
+        list: (package, self_us, cumulative_us, depth) per imported module,
+            in the order the interpreter printed them.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+            stripped = name.lstrip()
+            depth = (len(name) - len(stripped) - 1) // 2
+            rows.append((stripped.strip(), int(self_us), int(cumulative_us), depth))
+        except ValueError:
+            continue
+    return rows
+
+
+def measure_target(statement, repeat=5):
+    """
+    Imports statement in repeat fresh interpreters.
+
+    Returns:
+        dict: median total import time, slowest packages (from the median run)
+            and the heavy packages that were imported.
+    """
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", statement],
+            cwd=REPO_ROOT, capture_output=True, text=True
+        )
+        if completed.returncode != 0:
+            error = completed.stderr.strip().splitlines()[-1] if completed.stderr.strip() else "unknown error"
+            return {"error": error}
+        rows = parse_importtime(completed.stderr)
+        total = sum(cumulative for _, _, cumulative, depth in rows if depth == 0)
+        runs.append((total, rows))
+
+    runs.sort(key=lambda run: run[0])
+    total, rows = runs[len(runs) // 2]
+    imported = {name for name, _, _, _ in rows}
+    top_level = [row for row in rows if row[3] == 0]
+    return {
+        "median_ms": round(statistics.median(run[0] for run in runs) / 1000, 1),
+        "min_ms": round(runs[0][0] / 1000, 1),
+        "modules": len(rows),
+        "slowest": [
+            {"package": name, "cumulative_ms": round(cumulative / 1000, 1)}
+            for name, _, cumulative, _ in sorted(top_level, key=lambda row: -row[2])
+        ],
+        "heavy_imported": [package for package in HEAVY_PACKAGES if package in imported],
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", action="append", default=[], help="Extra module to measure (repeatable)")
+    parser.add_argument("--only", nargs="+", help="Measure only these targets")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--top", type=int, default=8, help="Slowest top-level packages to list")
+    parser.add_argument("--json", help="Write the report as JSON here")
+    parser.add_argument("--fail-on-heavy", action="store_true",
+                        help="Exit 1 if any target imports one of HEAVY_PACKAGES")
+    args = parser.parse_args(argv)
+
+    targets = dict(DEFAULT_TARGETS)
+    for module in args.module:
+        targets[module] = f"import {module}"
+    if args.only:
+        targets = {name: statement for name, statement in targets.items() if name in args.only}
+
+    report = {"python": sys.version.split()[0], "targets": {}}
+    failed = False
+    for name, statement in targets.items():
+        result = measure_target(statement, args.repeat)
+        result["slowest"] = result.get("slowest", [])[:args.top]
+        report["targets"][name] = result
+
+        if "error" in result:
+            print(f"{name}: failed - {result['error']}")
+            continue
+        print(f"{name}: {result['median_ms']:.1f} ms median ({result['modules']} modules)")
+        for entry in result["slowest"]:
+            print(f"    {entry['cumulative_ms']:>8.1f} ms  {entry['package']}")
+        if result["heavy_imported"]:
+            failed = True
+            print(f"    eagerly imported: {', '.join(result['heavy_imported'])}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 1 if args.fail_on_heavy and failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
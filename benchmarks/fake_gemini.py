@@ -0,0 +1,97 @@
+"""
+A fake Gemini model for benchmarks: returns canned analysis JSON after a
+configurable delay, with no network access.
+
+    from benchmarks.fake_gemini import install_fake_model
+    install_fake_model(latency=0.2)     # every Gemini call now hits FakeModel
+    ...
+    install_fake_model(None)            # back to the real client
+"""
+import json
+import random
+import time
+import types
+
+from utils.gemini_analysis import set_model_factory
+
+CANNED_ANALYSIS = {
+    "overall_confidence_score": 82,
+    "overall_assessment": "This message shows several classic signs of a phishing scam.",
+    "category_scores": {
+        "phishing": 85,
+        "financial_scam": 60,
+        "misinformation": 10,
+        "emotional_manipulation": 40,
+        "urgency_tactics": 80
+    },
+    "red_flags": [
+        {"flag": "Urgent account threat", "severity": "high", "explanation": "Pressure to act immediately."},
+        {"flag": "Link to verify details", "severity": "high", "explanation": "Asks for credentials via a link."}
+    ],
+    "suspicious_phrases": [
+        {"phrase": "verify your account", "reason": "Common phishing request"}
+    ],
+    "recommendation": "Do not click the link. Contact the company through its official website.",
+    "is_safe": False
+}
+
+
+class FakeModel:
+    """
+    Stands in for genai.GenerativeModel.
+
+    Args:
+        latency: Seconds each call takes.
+        jitter: Extra uniform random delay, 0..jitter seconds.
+        response: Dict (serialized to JSON) or raw string to return.
+        stream_chunks: Number of chunks a streamed response is split into.
+    """
+
+    def __init__(self, model_name="fake", latency=0.0, jitter=0.0, response=None, stream_chunks=8, seed=None):
+        self.model_name = model_name
+        self.latency = latency
+        self.jitter = jitter
+        self.stream_chunks = max(1, stream_chunks)
+        self.calls = 0
+        self._random = random.Random(seed)
+        response = CANNED_ANALYSIS if response is None else response
+        self.response_text = response if isinstance(response, str) else json.dumps(response)
+
+    def _wait(self):
+        delay = self.latency + (self._random.uniform(0, self.jitter) if self.jitter else 0.0)
+        if delay > 0:
+            time.sleep(delay)
+
+    def generate_content(self, prompt, stream=False):
+        self.calls += 1
+        self._wait()
+        if not stream:
+            return types.SimpleNamespace(text=self.response_text)
+        size = -(-len(self.response_text) // self.stream_chunks)
+        return [
+            types.SimpleNamespace(text=self.response_text[start:start + size])
+            for start in range(0, len(self.response_text), size)
+        ]
+
+
+def install_fake_model(latency=0.0, jitter=0.0, response=None, stream_chunks=8):
+    """
+    Routes every Gemini call in utils.gemini_analysis to a FakeModel.
+    Pass latency=None to restore the real client.
+
+    Returns:
+        list: The FakeModel instances created so far (one per call site),
+            for counting calls.
+    """
+    if latency is None:
+        set_model_factory(None)
+        return []
+    models = []
+
+    def factory(model_name):
+        model = FakeModel(model_name, latency, jitter, response, stream_chunks)
+        models.append(model)
+        return model
+
+    set_model_factory(factory)
+    return models
@@ -0,0 +1,170 @@
+"""
+Generated upload fixtures for the benchmarks: TXT, PDF, DOCX and PNG files
+of a chosen size, built in memory so no sample files need to be checked in.
+
+PDF and DOCX are written by hand (a PDF with one Helvetica text stream per
+page, a DOCX with the three parts Word needs); only the PNG fixture needs
+Pillow to build.
+"""
+import io
+import random
+import zipfile
+
+from xml.sax.saxutils import escape
+
+from utils.file_processor import UploadedBytes
+
+SENTENCES = [
+    "URGENT: your account has been suspended.",
+    "Please verify your account details within 24 hours.",
+    "Click here to claim your free gift card worth $500.",
+    "Your package could not be delivered, update your address now.",
+    "Thank you for your order, it will arrive on Thursday.",
+    "The team meeting has moved to 3pm in room 204.",
+    "Limited time offer, act now before it expires!",
+    "Send the processing fee via wire transfer to release your winnings.",
+]
+
+LINES_PER_PAGE = 45
+LINE_CHARS = 90
+
+
+def make_text(chars, seed=0):
+    """Scam-flavoured prose of about chars characters"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < chars:
+        sentence = rng.choice(SENTENCES)
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)[:chars]
+
+
+def _wrap(text, width=LINE_CHARS):
+    lines, line = [], ""
+    for word in text.split():
+        if line and len(line) + 1 + len(word) > width:
+            lines.append(line)
+            line = word
+        else:
+            line = f"{line} {word}" if line else word
+    if line:
+        lines.append(line)
+    return lines
+
+
+def make_txt(chars, seed=0):
+    return make_text(chars, seed).encode("utf-8")
+
+
+def make_pdf(chars, seed=0):
+    """A text PDF holding about chars characters, LINES_PER_PAGE lines per page"""
+    lines = _wrap(make_text(chars, seed))
+    pages = [lines[i:i + LINES_PER_PAGE] for i in range(0, len(lines), LINES_PER_PAGE)] or [[]]
+
+    # Object numbers: 1 catalog, 2 page tree, 3 font, then a page and its
+    # content stream for each page
+    objects = {}
+    page_ids = []
+    for number, page_lines in enumerate(pages):
+        page_id, content_id = 4 + 2 * number, 5 + 2 * number
+        page_ids.append(page_id)
+        body = "".join(
+            "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") Tj T* "
+            for line in page_lines
+        )
+        stream = f"BT /F1 10 Tf 14 TL 40 800 Td {body}ET".encode("latin-1", "replace")
+        objects[content_id] = b"<< /Length %d >>\nstream\n%s\nendstream" % (len(stream), stream)
+        objects[page_id] = (
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % content_id
+        )
+    objects[1] = b"<< /Type /Catalog /Pages 2 0 R >>"
+    kids = " ".join(f"{page_id} 0 R" for page_id in page_ids).encode()
+    objects[2] = b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(page_ids))
+    objects[3] = b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+
+    out = io.BytesIO()
+    out.write(b"%PDF-1.4\n")
+    offsets = {}
+    for object_id in sorted(objects):
+        offsets[object_id] = out.tell()
+        out.write(b"%d 0 obj\n%s\nendobj\n" % (object_id, objects[object_id]))
+    xref = out.tell()
+    count = max(objects) + 1
+    out.write(b"xref\n0 %d\n0000000000 65535 f \n" % count)
+    for object_id in range(1, count):
+        out.write(b"%010d 00000 n \n" % offsets[object_id])
+    out.write(b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (count, xref))
+    return out.getvalue()
+
+
+DOCX_CONTENT_TYPES = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+    '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+    '<Default Extension="xml" ContentType="application/xml"/>'
+    '<Override PartName="/word/document.xml" '
+    'ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>'
+    '</Types>'
+)
+DOCX_RELS = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+    '<Relationship Id="rId1" '
+    'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+    'Target="word/document.xml"/>'
+    '</Relationships>'
+)
+
+
+def make_docx(chars, seed=0):
+    """A DOCX holding about chars characters, one paragraph per few sentences"""
+    text = make_text(chars, seed)
+    words = text.split()
+    paragraphs = [" ".join(words[i:i + 60]) for i in range(0, len(words), 60)]
+    body = "".join(
+        f'<w:p><w:r><w:t xml:space="preserve">{escape(paragraph)}</w:t></w:r></w:p>'
+        for paragraph in paragraphs
+    )
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main">'
+        f'<w:body>{body}</w:body></w:document>'
+    )
+    out = io.BytesIO()
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        archive.writestr("[Content_Types].xml", DOCX_CONTENT_TYPES)
+        archive.writestr("_rels/.rels", DOCX_RELS)
+        archive.writestr("word/document.xml", document)
+    return out.getvalue()
+
+
+def make_png(chars, seed=0):
+    """A white PNG with about chars characters of black text. Needs Pillow."""
+    from PIL import Image, ImageDraw
+
+    lines = _wrap(make_text(chars, seed), 60)
+    line_height = 16
+    image = Image.new("L", (640, 20 + line_height * max(1, len(lines))), 255)
+    draw = ImageDraw.Draw(image)
+    for number, line in enumerate(lines):
+        draw.text((10, 10 + number * line_height), line, fill=0)
+    out = io.BytesIO()
+    image.save(out, format="PNG")
+    return out.getvalue()
+
+
+FORMATS = {
+    "txt": ("text/plain", make_txt),
+    "pdf": ("application/pdf", make_pdf),
+    "docx": ("application/vnd.openxmlformats-officedocument.wordprocessingml.document", make_docx),
+    "png": ("image/png", make_png),
+}
+
+
+def make_upload(kind, chars, seed=0):
+    """Builds an UploadedBytes of the given format (txt, pdf, docx, png)"""
+    mime_type, builder = FORMATS[kind]
+    return UploadedBytes(f"fixture_{chars}.{kind}", mime_type, builder(chars, seed))
@@ -0,0 +1,296 @@
+"""
+Local Gemini stand-in for load testing without spending quota.
+
+The server speaks the subset of the Gemini REST API that analyze_text relies
+on - POST /v1beta/models/<model>:generateContent and :streamGenerateContent
+(server-sent events) - and answers with analyses built by the local rule
+engine, so scores vary by message the way real answers do (including
+uncertain ones that escalate to the next tier). Latency, error rate and
+truncated responses are configurable.
+
+Run a server on its own:
+    python -m benchmarks.gemini_standin --port 8765 --latency lognormal:0.8,0.5 \\
+        --error-rate 0.02 --truncate-rate 0.05
+
+Point the app at it (in-process):
+    from benchmarks.gemini_standin import install_standin_client
+    install_standin_client("http://127.0.0.1:8765")
+
+Latency specs:
+    fixed:S                 always S seconds
+    uniform:LOW,HIGH        uniform between LOW and HIGH seconds
+    lognormal:MEDIAN,SIGMA  long-tailed; MEDIAN seconds, SIGMA shape (0.5 is typical)
+    exp:MEAN                exponential with the given mean
+"""
+import argparse
+import json
+import math
+import random
+import re
+import threading
+import time
+import types
+import urllib.error
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from utils.gemini_analysis import set_model_factory
+from utils.scoring import build_local_analysis
+
+ANALYZE_MARKER = "TEXT TO ANALYZE:\n"
+ANALYZE_END_MARKER = "\n\nProvide a detailed analysis"
+MESSAGE_RE = re.compile(r"\[MESSAGE (\d+)\]\n(.*?)\n\[END MESSAGE \1\]", re.DOTALL)
+PATH_RE = re.compile(r"^/v1beta/models/([^/:]+):(generateContent|streamGenerateContent)$")
+
+RETRYABLE_ERRORS = [
+    (429, "RESOURCE_EXHAUSTED", "Quota exceeded"),
+    (500, "INTERNAL", "Internal error"),
+    (503, "UNAVAILABLE", "The model is overloaded"),
+]
+
+
+def parse_latency(spec):
+    """
+    Turns a latency spec (see module docstring) into a function that draws
+    one delay in seconds from a random.Random.
+    """
+    kind, _, args = spec.partition(":")
+    try:
+        values = [float(value) for value in args.split(",")] if args else []
+        if kind == "fixed":
+            (seconds,) = values
+            return lambda rng: seconds
+        if kind == "uniform":
+            low, high = values
+            return lambda rng: rng.uniform(low, high)
+        if kind == "lognormal":
+            median, sigma = values
+            mu = math.log(median)
+            return lambda rng: rng.lognormvariate(mu, sigma)
+        if kind == "exp":
+            (mean,) = values
+            return lambda rng: rng.expovariate(1.0 / mean)
+    except ValueError:
+        pass
+    raise Exception(f"Invalid latency spec '{spec}' - expected e.g. fixed:0.5, uniform:0.2,1, lognormal:0.8,0.5, exp:0.6")
+
+
+def answer_prompt(prompt):
+    """
+    Builds the JSON answer a well-behaved model would give: one analysis for
+    a single-text prompt, an array with message_index for a packed prompt.
+    """
+    messages = MESSAGE_RE.findall(prompt)
+    if messages:
+        answers = []
+        for number, text in messages:
+            analysis = build_local_analysis(text)
+            analysis["message_index"] = int(number)
+            answers.append(analysis)
+        return json.dumps(answers)
+
+    start = prompt.find(ANALYZE_MARKER)
+    text = prompt[start + len(ANALYZE_MARKER):] if start != -1 else prompt
+    end = text.find(ANALYZE_END_MARKER)
+    if end != -1:
+        text = text[:end]
+    return json.dumps(build_local_analysis(text.strip()))
+
+
+class StandinConfig:
+    """Behaviour of the stand-in server; shared by all request threads"""
+
+    def __init__(self, latency="lognormal:0.8,0.5", error_rate=0.0, truncate_rate=0.0,
+                 stream_chunks=8, seed=None):
+        self.latency_spec = latency
+        self.draw_latency = parse_latency(latency)
+        self.error_rate = error_rate
+        self.truncate_rate = truncate_rate
+        self.stream_chunks = max(1, stream_chunks)
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.stats = {"requests": 0, "errors": 0, "truncated": 0}
+
+    def roll(self):
+        """Draws (delay seconds, error or None, truncate?) for one request"""
+        with self._lock:
+            self.stats["requests"] += 1
+            delay = max(0.0, self.draw_latency(self._random))
+            error = None
+            if self._random.random() < self.error_rate:
+                error = self._random.choice(RETRYABLE_ERRORS)
+                self.stats["errors"] += 1
+            truncate = error is None and self._random.random() < self.truncate_rate
+            if truncate:
+                self.stats["truncated"] += 1
+            cut = self._random.uniform(0.3, 0.9)
+        return delay, error, (cut if truncate else None)
+
+
+def _response_body(text, finish_reason="STOP"):
+    return {
+        "candidates": [{
+            "content": {"parts": [{"text": text}], "role": "model"},
+            "finishReason": finish_reason,
+            "index": 0
+        }]
+    }
+
+
+class _StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    config = None
+
+    def _send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_POST(self):
+        match = PATH_RE.match(self.path.split("?")[0])
+        length = int(self.headers.get("Content-Length", "0"))
+        raw = self.rfile.read(length)
+        if not match:
+            self._send_json(404, {"error": {"code": 404, "message": "Not found", "status": "NOT_FOUND"}})
+            return
+        try:
+            request = json.loads(raw)
+            prompt = "".join(part.get("text", "") for part in request["contents"][0]["parts"])
+        except (ValueError, KeyError, IndexError):
+            self._send_json(400, {"error": {"code": 400, "message": "Bad request", "status": "INVALID_ARGUMENT"}})
+            return
+
+        delay, error, cut = self.config.roll()
+        time.sleep(delay)
+        if error is not None:
+            code, status, message = error
+            self._send_json(code, {"error": {"code": code, "message": message, "status": status}})
+            return
+
+        text = answer_prompt(prompt)
+        finish_reason = "STOP"
+        if cut is not None:
+            text = text[:int(len(text) * cut)]
+            finish_reason = "MAX_TOKENS"
+
+        if match.group(2) == "generateContent":
+            self._send_json(200, _response_body(text, finish_reason))
+            return
+
+        # Server-sent events, one candidate chunk per event
+        size = -(-len(text) // self.config.stream_chunks) or 1
+        events = [
+            json.dumps(_response_body(text[start:start + size], finish_reason))
+            for start in range(0, len(text), size)
+        ]
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for event in events:
+            payload = f"data: {event}\r\n\r\n".encode("utf-8")
+            self.wfile.write(b"%x\r\n%s\r\n" % (len(payload), payload))
+            self.wfile.flush()
+        self.wfile.write(b"0\r\n\r\n")
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_standin_server(config=None, port=0, host="127.0.0.1"):
+    """
+    Starts the stand-in on a background thread.
+
+    Returns:
+        tuple: (server, base URL). Call server.shutdown() to stop it.
+    """
+    handler = type("StandinHandler", (_StandinHandler,), {"config": config or StandinConfig()})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="gemini-standin", daemon=True).start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+
+class StandinError(Exception):
+    """An HTTP error from the stand-in; code is the status, so the scheduler retries 429/5xx"""
+
+    def __init__(self, code, message):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class StandinModel:
+    """Client with the generate_content() contract of genai.GenerativeModel, talking to the stand-in"""
+
+    def __init__(self, model_name, base_url, timeout=60):
+        self.model_name = model_name
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _post(self, method, prompt):
+        url = f"{self.base_url}/v1beta/models/{self.model_name}:{method}"
+        if method == "streamGenerateContent":
+            url += "?alt=sse"
+        body = json.dumps({"contents": [{"role": "user", "parts": [{"text": prompt}]}]}).encode("utf-8")
+        request = urllib.request.Request(url, data=body, headers={"Content-Type": "application/json"})
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            try:
+                message = json.loads(e.read())["error"]["message"]
+            except (ValueError, KeyError):
+                message = e.reason
+            raise StandinError(e.code, message)
+
+    def generate_content(self, prompt, stream=False):
+        if not stream:
+            with self._post("generateContent", prompt) as response:
+                body = json.loads(response.read())
+            return types.SimpleNamespace(text=_candidate_text(body))
+        return self._stream(self._post("streamGenerateContent", prompt))
+
+    @staticmethod
+    def _stream(response):
+        with response:
+            for line in response:
+                line = line.strip()
+                if line.startswith(b"data:"):
+                    yield types.SimpleNamespace(text=_candidate_text(json.loads(line[5:])))
+
+
+def _candidate_text(body):
+    return "".join(part.get("text", "") for part in body["candidates"][0]["content"]["parts"])
+
+
+def install_standin_client(base_url, timeout=60):
+    """Routes every Gemini call in utils.gemini_analysis to the stand-in at base_url"""
+    set_model_factory(lambda model_name: StandinModel(model_name, base_url, timeout))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", default="lognormal:0.8,0.5")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 429/5xx")
+    parser.add_argument("--truncate-rate", type=float, default=0.0, help="Fraction of answers cut off mid-JSON")
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args(argv)
+
+    config = StandinConfig(args.latency, args.error_rate, args.truncate_rate, seed=args.seed)
+    server, url = start_standin_server(config, args.port, args.host)
+    print(f"Gemini stand-in listening on {url} (Ctrl+C to stop)")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+        print(json.dumps(config.stats))
+    return 0
+
+
+if __name__ == "__main__":
+    main()
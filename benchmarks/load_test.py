@@ -0,0 +1,205 @@
+"""
+Concurrent load generator for capacity planning - fully offline.
+
+Simulated users run the same flow as the Streamlit app (optionally uploading
+a file first), against the local Gemini stand-in (benchmarks.gemini_standin)
+started in-process or already running at --url. Reports throughput and
+latency percentiles per scenario.
+
+Run from the repository root:
+    python -m benchmarks.load_test --users 50 --duration 60
+    python -m benchmarks.load_test --users 20 --scenario file --latency lognormal:1.2,0.6 --error-rate 0.05
+    python -m benchmarks.load_test --url http://127.0.0.1:8765 --rate-per-minute 600 --output load.json
+
+By default the Gemini scheduler's rate limit is lifted so the stand-in's
+latency is the bottleneck; pass --rate-per-minute to test under our quota.
+"""
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import threading
+import time
+
+
+class LoadRecorder:
+    """Collects per-request latencies and outcomes from all user threads"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.latencies = {}
+        self.outcomes = {}
+
+    def record(self, scenario, seconds, outcome):
+        with self._lock:
+            self.latencies.setdefault(scenario, []).append(seconds)
+            counts = self.outcomes.setdefault(scenario, {})
+            counts[outcome] = counts.get(outcome, 0) + 1
+
+    def summary(self, elapsed):
+        from utils.metrics import quantile
+
+        scenarios = {}
+        for scenario, latencies in self.latencies.items():
+            ordered = sorted(latencies)
+            scenarios[scenario] = {
+                "requests": len(ordered),
+                "throughput_per_second": round(len(ordered) / elapsed, 2) if elapsed else 0.0,
+                "p50_seconds": round(quantile(ordered, 0.5), 4),
+                "p95_seconds": round(quantile(ordered, 0.95), 4),
+                "p99_seconds": round(quantile(ordered, 0.99), 4),
+                "max_seconds": round(ordered[-1], 4),
+                "outcomes": dict(self.outcomes[scenario]),
+            }
+        return scenarios
+
+
+def build_corpus():
+    from data.quiz_examples import QUIZ_EXAMPLES, COMPARISON_EXAMPLES
+
+    corpus = [quiz["text"] for quiz in QUIZ_EXAMPLES]
+    for comparison in COMPARISON_EXAMPLES:
+        corpus.append(comparison["suspicious"])
+        corpus.append(comparison["legitimate"])
+    return corpus
+
+
+def pick_text(rng, corpus, duplicate_rate):
+    """
+    A corpus message. With probability duplicate_rate it is sent verbatim
+    (a scam wave: cache hits and coalescing); otherwise a reference number
+    makes it unique so it has to be analyzed.
+    """
+    text = rng.choice(corpus)
+    if rng.random() < duplicate_rate:
+        return text
+    return f"{text} Ref {rng.randrange(10 ** 9)}"
+
+
+def run_analysis(text, use_cache=True, use_prescreen=True):
+    """What app.py does on Analyze: consume the stream, keep the final result"""
+    from utils.gemini_analysis import analyze_text_stream
+
+    result = None
+    for event in analyze_text_stream(text, use_cache=use_cache, use_prescreen=use_prescreen):
+        if event["type"] == "result":
+            result = event["result"]
+    return result
+
+
+def simulated_user(user_id, args, corpus, uploads, recorder, deadline):
+    from utils.file_processor import UploadedBytes, process_uploaded_file
+
+    rng = random.Random(args.seed + user_id)
+    done = 0
+    while time.monotonic() < deadline and (args.iterations is None or done < args.iterations):
+        scenario = args.scenario if args.scenario != "mixed" else rng.choice(["text", "file"])
+        start = time.perf_counter()
+        try:
+            if scenario == "file":
+                name, mime_type, data = rng.choice(uploads)
+                text = process_uploaded_file(UploadedBytes(name, mime_type, data))
+            else:
+                text = pick_text(rng, corpus, args.duplicate_rate)
+            result = run_analysis(text, not args.no_cache, not args.no_prescreen)
+            if result["success"]:
+                outcome = result.get("source", "gemini")
+                if result.get("coalesced"):
+                    outcome += "+coalesced"
+            else:
+                outcome = "failed"
+        except Exception as e:
+            outcome = "error:" + type(e).__name__
+        recorder.record(scenario, time.perf_counter() - start, outcome)
+        done += 1
+        if args.think_time:
+            time.sleep(rng.expovariate(1.0 / args.think_time))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=20, help="Concurrent simulated users")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--iterations", type=int, help="Stop each user after this many requests")
+    parser.add_argument("--scenario", choices=["text", "file", "mixed"], default="text")
+    parser.add_argument("--think-time", type=float, default=0.0, help="Mean pause between a user's requests")
+    parser.add_argument("--duplicate-rate", type=float, default=0.1,
+                        help="Fraction of text requests that repeat a corpus message verbatim")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the analysis cache")
+    parser.add_argument("--no-prescreen", action="store_true", help="Send clear-cut texts to the stand-in too")
+    parser.add_argument("--file-chars", type=int, default=3000, help="Size of the generated upload fixtures")
+    parser.add_argument("--file-variants", type=int, default=20, help="Distinct fixtures per file format")
+    parser.add_argument("--url", help="Use a stand-in that is already running instead of starting one")
+    parser.add_argument("--latency", default="lognormal:0.8,0.5", help="Stand-in latency spec")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--truncate-rate", type=float, default=0.0)
+    parser.add_argument("--rate-per-minute", type=float, help="Gemini scheduler rate limit (default: unlimited)")
+    parser.add_argument("--max-concurrency", type=int, help="Gemini scheduler worker count")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="Write the report as JSON here")
+    args = parser.parse_args(argv)
+
+    # The scheduler and cache read their settings at import time
+    os.environ["GEMINI_RATE_PER_MINUTE"] = str(args.rate_per_minute or 6_000_000)
+    if not args.rate_per_minute:
+        os.environ["GEMINI_BURST"] = "100000"
+    if args.max_concurrency:
+        os.environ["GEMINI_MAX_CONCURRENCY"] = str(args.max_concurrency)
+    os.environ.setdefault("ANALYSIS_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="load-cache-"), "cache.sqlite"))
+
+    from benchmarks.fixtures import make_upload
+    from benchmarks.gemini_standin import StandinConfig, install_standin_client, start_standin_server
+    from utils.gemini_analysis import get_scheduler_stats, get_singleflight_stats
+
+    server, config = None, None
+    url = args.url
+    if url is None:
+        config = StandinConfig(args.latency, args.error_rate, args.truncate_rate, seed=args.seed)
+        server, url = start_standin_server(config)
+    install_standin_client(url)
+
+    corpus = build_corpus()
+    uploads = []
+    if args.scenario != "text":
+        for kind in ("txt", "pdf", "docx"):
+            for seed in range(args.seed, args.seed + args.file_variants):
+                upload = make_upload(kind, args.file_chars, seed=seed)
+                uploads.append((upload.name, upload.type, upload.getvalue()))
+
+    recorder = LoadRecorder()
+    deadline = time.monotonic() + args.duration
+    threads = [
+        threading.Thread(target=simulated_user, args=(user_id, args, corpus, uploads, recorder, deadline), daemon=True)
+        for user_id in range(args.users)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    report = {
+        "users": args.users,
+        "elapsed_seconds": round(elapsed, 2),
+        "standin": {"url": url, "latency": args.latency, "error_rate": args.error_rate,
+                    "truncate_rate": args.truncate_rate},
+        "scenarios": recorder.summary(elapsed),
+        "scheduler": get_scheduler_stats(),
+        "singleflight": get_singleflight_stats(),
+    }
+    if config is not None:
+        report["standin"]["stats"] = dict(config.stats)
+        server.shutdown()
+
+    print(json.dumps(report, indent=2))
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,255 @@
+"""
+Offline performance benchmark suite.
+
+Times file extraction for each upload format, the highlighter, quiz scoring
+and end-to-end analyze_text against a fake Gemini model (no network). Results
+are written as JSON; any case whose median exceeds its limit in
+thresholds.json is reported as a regression and the exit code is 1.
+
+Run from the repository root:
+    python -m benchmarks.run_suite --output bench_results.json
+    python -m benchmarks.run_suite --only extract highlight
+    python -m benchmarks.run_suite --update-thresholds 3.0   # limits = 3x current medians
+"""
+import os
+import tempfile
+
+# The scheduler and cache read their settings at import time. Benchmarks
+# must not be rate limited or write to the real cache.
+os.environ.setdefault("GEMINI_RATE_PER_MINUTE", "6000000")
+os.environ.setdefault("GEMINI_BURST", "100000")
+os.environ.setdefault("ANALYSIS_CACHE_PATH", os.path.join(tempfile.mkdtemp(prefix="bench-cache-"), "cache.sqlite"))
+
+import argparse  # noqa: E402
+import json  # noqa: E402
+import platform  # noqa: E402
+import random  # noqa: E402
+import statistics  # noqa: E402
+import sys  # noqa: E402
+import time  # noqa: E402
+
+THRESHOLDS_PATH = os.path.join(os.path.dirname(__file__), "thresholds.json")
+THRESHOLD_SLACK_SECONDS = 0.002
+
+EXTRACT_SIZES = {
+    "txt": [1_000, 20_000, 200_000],
+    "pdf": [1_000, 20_000, 200_000],
+    "docx": [1_000, 20_000, 200_000],
+    "png": [300, 1_500],
+}
+HIGHLIGHT_CASES = [(20_000, 10), (20_000, 100), (200_000, 100), (200_000, 500)]
+FAKE_LATENCY_SECONDS = 0.02
+
+
+class Skip(Exception):
+    """Raised by a case's setup when it can't run here (missing dependency)"""
+
+
+def extract_cases():
+    def make(kind, chars):
+        def setup():
+            try:
+                from utils.file_processor import UploadedBytes, process_uploaded_file
+                from benchmarks.fixtures import make_upload
+            except ImportError as e:
+                raise Skip(str(e))
+            if kind == "png":
+                from utils.ocr import find_tesseract
+                if not find_tesseract():
+                    raise Skip("tesseract is not installed")
+            try:
+                upload = make_upload(kind, chars)
+            except ImportError as e:
+                raise Skip(str(e))
+            data = upload.getvalue()
+            # A fresh upload per run, as Streamlit hands each rerun a new one
+            return lambda: process_uploaded_file(UploadedBytes(upload.name, upload.type, data))
+        return setup
+
+    for kind, sizes in EXTRACT_SIZES.items():
+        for chars in sizes:
+            yield f"extract_{kind}_{chars}", "extract", {"format": kind, "chars": chars}, make(kind, chars)
+
+
+def highlight_cases():
+    def make(chars, phrases):
+        def setup():
+            from benchmarks.bench_highlight import make_case
+            from utils.highlight import create_annotated_text_html
+            text, suspicious_phrases = make_case(chars, phrases)
+            return lambda: create_annotated_text_html(text, suspicious_phrases)
+        return setup
+
+    for chars, phrases in HIGHLIGHT_CASES:
+        yield f"highlight_{chars}_{phrases}", "highlight", {"chars": chars, "phrases": phrases}, make(chars, phrases)
+
+
+def quiz_cases():
+    def setup():
+        from data.quiz_examples import QUIZ_EXAMPLES
+        from utils.quiz_engine import QuizEngine
+        rng = random.Random(0)
+        rounds = []
+        for quiz in QUIZ_EXAMPLES:
+            word_count = len(quiz["text"].split())
+            rounds.append((quiz, [rng.randrange(word_count) for _ in range(12)]))
+
+        def run():
+            # A fresh engine per round, so the index build is timed too
+            for quiz, clicks in rounds:
+                engine = QuizEngine(quiz)
+                selections = []
+                for word_index in clicks:
+                    selections = engine.toggle(selections, word_index)
+                engine.score(selections)
+        return run
+
+    yield "quiz_score_all_examples", "quiz", {"clicks_per_quiz": 12}, setup
+
+
+def analyze_cases():
+    def make(streaming, use_cache):
+        def setup():
+            try:
+                from benchmarks.fake_gemini import install_fake_model
+                from utils import gemini_analysis
+            except ImportError as e:
+                raise Skip(str(e))
+            install_fake_model(latency=FAKE_LATENCY_SECONDS)
+            counter = iter(range(10 ** 9))
+            base = "Dear customer, please verify your account details using the secure portal. Reference "
+
+            def run():
+                # A new text each run unless we're measuring cache hits
+                text = base + ("0" if use_cache else str(next(counter)))
+                if streaming:
+                    for _ in gemini_analysis.analyze_text_stream(text, use_cache=use_cache, use_prescreen=False):
+                        pass
+                else:
+                    gemini_analysis.analyze_text(text, use_cache=use_cache, use_prescreen=False)
+            return run
+        return setup
+
+    params = {"fake_latency_seconds": FAKE_LATENCY_SECONDS}
+    yield "analyze_text_fake_model", "analyze", params, make(False, False)
+    yield "analyze_text_stream_fake_model", "analyze", params, make(True, False)
+    yield "analyze_text_cache_hit", "analyze", params, make(False, True)
+
+
+SUITES = {
+    "extract": extract_cases,
+    "highlight": highlight_cases,
+    "quiz": quiz_cases,
+    "analyze": analyze_cases,
+}
+
+
+def measure(run, repeat, warmup=1):
+    for _ in range(warmup):
+        run()
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        run()
+        samples.append(time.perf_counter() - start)
+    return {
+        "median_seconds": statistics.median(samples),
+        "min_seconds": min(samples),
+        "mean_seconds": statistics.fmean(samples),
+        "repeat": repeat,
+    }
+
+
+def load_thresholds(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as handle:
+        return json.load(handle)
+
+
+def run_suite(suites, repeat=5, thresholds=None):
+    """
+    Runs the selected suites.
+
+    Returns:
+        list: One row per case with status "ok", "regression", "unchecked"
+            (no threshold) or "skipped", plus timings in seconds.
+    """
+    thresholds = thresholds or {}
+    rows = []
+    for suite in suites:
+        for name, group, params, setup in SUITES[suite]():
+            row = {"name": name, "group": group, "params": params}
+            try:
+                run = setup()
+            except Skip as e:
+                row.update(status="skipped", reason=str(e))
+                rows.append(row)
+                continue
+            row.update(measure(run, repeat))
+            limit = thresholds.get(name, {}).get("max_median_seconds")
+            if limit is None:
+                row["status"] = "unchecked"
+            else:
+                row["max_median_seconds"] = limit
+                row["status"] = "regression" if row["median_seconds"] > limit else "ok"
+            rows.append(row)
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--only", nargs="+", choices=sorted(SUITES), default=list(SUITES))
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", help="Write results JSON here (default: stdout only)")
+    parser.add_argument("--thresholds", default=THRESHOLDS_PATH)
+    parser.add_argument("--update-thresholds", type=float, metavar="FACTOR",
+                        help="Rewrite the thresholds file with FACTOR x each measured median "
+                             "(plus THRESHOLD_SLACK_SECONDS so sub-millisecond cases aren't flaky)")
+    args = parser.parse_args(argv)
+
+    thresholds = load_thresholds(args.thresholds)
+    rows = run_suite(args.only, args.repeat, thresholds)
+
+    for row in rows:
+        if row["status"] == "skipped":
+            print(f"{row['name']:<36} skipped ({row['reason']})", file=sys.stderr)
+        else:
+            limit = row.get("max_median_seconds")
+            limit_text = f"limit {limit * 1000:9.2f} ms" if limit is not None else "no limit"
+            print(f"{row['name']:<36} {row['median_seconds'] * 1000:9.2f} ms  {limit_text}  {row['status']}",
+                  file=sys.stderr)
+
+    report = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "results": rows,
+        "regressions": [row["name"] for row in rows if row["status"] == "regression"],
+    }
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as handle:
+            json.dump(report, handle, indent=2)
+
+    if args.update_thresholds:
+        for row in rows:
+            if "median_seconds" in row:
+                thresholds[row["name"]] = {
+                    "max_median_seconds": round(
+                        row["median_seconds"] * args.update_thresholds + THRESHOLD_SLACK_SECONDS, 6
+                    )
+                }
+        with open(args.thresholds, "w", encoding="utf-8") as handle:
+            json.dump(dict(sorted(thresholds.items())), handle, indent=2)
+            handle.write("\n")
+        print(f"Updated {args.thresholds}", file=sys.stderr)
+        return 0
+
+    if report["regressions"]:
+        print(f"{len(report['regressions'])} regression(s): {', '.join(report['regressions'])}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
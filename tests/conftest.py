@@ -0,0 +1,49 @@
+import json
+
+import pytest
+
+from benchmarks.fake_gemini import install_fake_model
+from utils import cache as cache_module
+from utils.cache import AnalysisCache
+from utils.near_duplicate import get_near_duplicate_index
+
+SAFE_ANALYSIS = {
+    "overall_confidence_score": 10,
+    "overall_assessment": "Looks like ordinary communication.",
+    "category_scores": {
+        "phishing": 5,
+        "financial_scam": 5,
+        "misinformation": 5,
+        "emotional_manipulation": 5,
+        "urgency_tactics": 5
+    },
+    "red_flags": [],
+    "suspicious_phrases": [],
+    "recommendation": "No action needed.",
+    "is_safe": True
+}
+
+
+@pytest.fixture
+def analysis_cache(tmp_path, monkeypatch):
+    """A fresh process-wide analysis cache in a temporary directory"""
+    cache = AnalysisCache(path=str(tmp_path / "analysis_cache.sqlite"))
+    monkeypatch.setattr(cache_module, "_default_cache", cache)
+    get_near_duplicate_index().clear()
+    yield cache
+    get_near_duplicate_index().clear()
+
+
+@pytest.fixture
+def fake_model(analysis_cache):
+    """
+    Routes Gemini calls to the bundled fake model. Call it with the
+    response to return; it returns the list of FakeModel instances.
+    """
+    def install(response=None, **options):
+        if isinstance(response, list):
+            response = json.dumps(response)
+        return install_fake_model(response=response, **options)
+
+    yield install
+    install_fake_model(latency=None)
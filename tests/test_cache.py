@@ -0,0 +1,82 @@
+"""Cache keys, expiry and tiers in utils.cache, and cached analyze_text calls"""
+from conftest import SAFE_ANALYSIS
+from utils import cache as cache_module
+from utils import gemini_analysis
+from utils.cache import AnalysisCache, LRUCache, SQLiteCache, make_cache_key
+
+
+def test_cache_key_ignores_whitespace_and_unicode_form():
+    key = make_cache_key("Claim your  prize\nnow, café", "model", 1)
+    assert make_cache_key("  Claim your prize now, café ", "model", 1) == key
+
+
+def test_cache_key_depends_on_case_model_and_prompt_version():
+    key = make_cache_key("Claim your prize", "model", 1)
+    assert make_cache_key("CLAIM YOUR PRIZE", "model", 1) != key
+    assert make_cache_key("Claim your prize", "other-model", 1) != key
+    assert make_cache_key("Claim your prize", "model", 2) != key
+
+
+class Clock:
+    def __init__(self, monkeypatch):
+        self.now = 1_000_000.0
+        monkeypatch.setattr(cache_module.time, "time", lambda: self.now)
+
+
+def test_memory_entries_expire(monkeypatch):
+    clock = Clock(monkeypatch)
+    lru = LRUCache(max_entries=10, ttl_seconds=60)
+    lru.set("key", {"value": 1})
+    clock.now += 59
+    assert lru.get("key") == {"value": 1}
+    clock.now += 2
+    assert lru.get("key") is None
+
+
+def test_memory_tier_evicts_least_recently_used():
+    lru = LRUCache(max_entries=2, ttl_seconds=60)
+    lru.set("a", 1)
+    lru.set("b", 2)
+    lru.get("a")
+    lru.set("c", 3)
+    assert (lru.get("a"), lru.get("b"), lru.get("c")) == (1, None, 3)
+
+
+def test_disk_entries_expire(tmp_path, monkeypatch):
+    clock = Clock(monkeypatch)
+    disk = SQLiteCache(str(tmp_path / "cache.sqlite"), ttl_seconds=60)
+    disk.set("key", {"value": 1})
+    clock.now += 59
+    assert disk.get("key") == {"value": 1}
+    clock.now += 2
+    assert disk.get("key") is None
+    assert len(disk) == 0
+
+
+def test_disk_hits_survive_a_restart_and_are_promoted(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    AnalysisCache(path=path).set("key", {"value": 1})
+    restarted = AnalysisCache(path=path)
+    assert restarted.get("key") == {"value": 1}
+    assert restarted.get("key") == {"value": 1}
+    stats = restarted.stats()
+    assert (stats["disk_hits"], stats["memory_hits"]) == (1, 1)
+
+
+def test_repeat_analysis_is_served_from_cache(fake_model):
+    models = fake_model(SAFE_ANALYSIS)
+    text = "Hi, the team meeting moved to Thursday afternoon, same room as last week."
+    first = gemini_analysis.analyze_text(text, use_prescreen=False)
+    second = gemini_analysis.analyze_text(" " + text.replace(" ", "  "), use_prescreen=False)
+    assert first["source"] == "gemini"
+    assert second["source"] == "cache"
+    assert second["data"] == first["data"]
+    assert sum(model.calls for model in models) == 1
+
+
+def test_use_cache_false_always_calls_the_model(fake_model):
+    models = fake_model(SAFE_ANALYSIS)
+    text = "Hi, the team meeting moved to Thursday afternoon, same room as last week."
+    gemini_analysis.analyze_text(text, use_prescreen=False)
+    assert gemini_analysis.analyze_text(text, use_cache=False, use_prescreen=False)["source"] == "gemini"
+    assert sum(model.calls for model in models) == 2
@@ -0,0 +1,48 @@
+"""Chunk and segment limits in utils.chunking"""
+import pytest
+
+from utils.chunking import CHUNK_MAX_CHARS, split_into_chunks, split_into_segments
+
+SHORT_SENTENCES = ("This sentence is short. " * 12).strip()
+HUGE_SENTENCE = " ".join(["word"] * 4000) + "."
+
+
+@pytest.mark.parametrize("text", [
+    # A short sentence carried as overlap in front of a unit of almost max_chars
+    HUGE_SENTENCE[:3000] + ". " + SHORT_SENTENCES + " " + HUGE_SENTENCE,
+    "\n\n".join([HUGE_SENTENCE[:7900], "A short paragraph.", HUGE_SENTENCE[:7900]] * 3),
+    " ".join(["word"] * 20000),
+])
+def test_chunks_fit_the_limit_including_overlap(text):
+    chunks = split_into_chunks(text)
+    assert len(chunks) > 1
+    assert max(len(chunk) for chunk in chunks) <= CHUNK_MAX_CHARS
+    # Nothing is lost: every chunk's words appear in order and together cover the text
+    assert set(" ".join(chunks).split()) == set(text.split())
+
+
+def test_consecutive_chunks_overlap():
+    sentences = [f"Sentence number {index} is here." for index in range(1000)]
+    chunks = split_into_chunks(" ".join(sentences), max_chars=2000, overlap_chars=200)
+    for previous, chunk in zip(chunks, chunks[1:]):
+        assert chunk.split("\n")[0] in previous
+
+
+def test_short_text_is_one_chunk():
+    assert split_into_chunks("Hello there.") == ["Hello there."]
+
+
+def test_whitespace_only_text_has_no_chunks():
+    assert split_into_chunks(" " * (CHUNK_MAX_CHARS + 1000)) == []
+    assert split_into_segments(" \n\n ") == []
+
+
+def test_segment_boundaries_survive_an_edit():
+    sentences = [f"Sentence {index} talks about the weather and the garden." for index in range(400)]
+    segments = split_into_segments(" ".join(sentences))
+    edited = list(sentences)
+    edited[200] = "This one sentence was rewritten completely by the user."
+    edited_segments = split_into_segments(" ".join(edited))
+    changed = set(edited_segments) - set(segments)
+    assert 1 <= len(changed) <= 2
+    assert all(len(segment) <= 4000 for segment in edited_segments)
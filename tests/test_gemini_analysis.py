@@ -0,0 +1,62 @@
+"""analyze_text, analyze_packed and analyze_long_text against the fake model"""
+from conftest import SAFE_ANALYSIS
+from utils import gemini_analysis
+
+BLOCKLISTED = "Hi team, the quarterly report is ready, please review it at amazon-security-check.com before the meeting."
+LOOKALIKE = "Hi team, your invoice is attached, please review it at paypa1.com/invoices before Friday thanks."
+HARMLESS = "Hi team, lunch is at noon on Thursday in the usual room, see you all there."
+
+
+def packed_response(count):
+    return [dict(SAFE_ANALYSIS, message_index=index + 1) for index in range(count)]
+
+
+def test_packed_blocklisted_link_gets_local_verdict(fake_model):
+    fake_model(packed_response(2))
+    results = gemini_analysis.analyze_packed([BLOCKLISTED, LOOKALIKE, HARMLESS])
+    assert results[0]["source"] == "blocklist"
+    assert results[0]["data"]["is_safe"] is False
+    assert [result["source"] for result in results[1:]] == ["gemini", "gemini"]
+
+
+def test_url_findings_override_a_safe_model_answer(fake_model):
+    fake_model(packed_response(2))
+    lookalike, harmless = gemini_analysis.analyze_packed([LOOKALIKE, HARMLESS])
+    assert lookalike["data"]["is_safe"] is False
+    assert lookalike["data"]["overall_confidence_score"] >= 80
+    assert lookalike["data"]["category_scores"]["phishing"] >= 80
+    assert harmless["data"]["is_safe"] is True
+
+
+def test_blocklist_wins_over_a_cached_safe_answer(fake_model, analysis_cache):
+    fake_model(SAFE_ANALYSIS)
+    analysis_cache.set(gemini_analysis._cache_key(BLOCKLISTED), dict(SAFE_ANALYSIS))
+    result = gemini_analysis.analyze_text(BLOCKLISTED)
+    assert result["source"] == "blocklist"
+    assert result["data"]["is_safe"] is False
+
+
+def test_whitespace_only_long_text_fails_cleanly(fake_model):
+    models = fake_model(SAFE_ANALYSIS)
+    result = gemini_analysis.analyze_text(" " * (gemini_analysis.CHUNK_MAX_CHARS + 1000))
+    assert result == {"success": False, "error": "No text to analyze"}
+    assert sum(model.calls for model in models) == 0
+
+
+def test_first_incremental_analysis_uses_chunks_then_edits_reuse_segments(fake_model):
+    models = fake_model(SAFE_ANALYSIS)
+    calls = lambda: sum(model.calls for model in models)
+    words = "alpha bravo charlie delta echo foxtrot golf hotel india juliet kilo lima".split()
+    sentences = [f"The {words[i % 12]} {words[i * 7 % 12]} note number {i} was filed." for i in range(700)]
+
+    result, state = gemini_analysis.analyze_text_incremental(" ".join(sentences), use_cache=False, use_prescreen=False)
+    assert result["source"] == "chunked"
+    assert calls() == result["chunks"] < len(state["keys"])
+    assert set(state["findings"]) == set(state["keys"])
+
+    sentences[350] = "One sentence in the middle was rewritten by the author."
+    result, state = gemini_analysis.analyze_text_incremental(
+        " ".join(sentences), state, use_cache=False, use_prescreen=False
+    )
+    assert result["source"] == "incremental"
+    assert 1 <= result["reanalyzed"] <= 2
@@ -0,0 +1,76 @@
+"""Quiz banks and the no-repeat QuizSampler"""
+import json
+
+import pytest
+
+from utils.quiz_bank import JsonlQuizBank, ListQuizBank, QuizSampler, SqliteQuizBank, build_quiz_bank
+
+QUIZZES = [
+    {"text": f"Quiz number {i}", "category": "phishing" if i % 2 else "romance",
+     "risk_score": 90 if i % 3 == 0 else 40, "suspicious_phrases": [{"phrase": "number", "reason": "test"}]}
+    for i in range(12)
+]
+
+
+@pytest.mark.parametrize("size", [1, 2, 7, 100])
+def test_sampler_draws_every_position_once_per_round(size):
+    sampler = QuizSampler(size, seed=1)
+    for _ in range(3):
+        assert sorted(sampler.draw() for _ in range(size)) == list(range(size))
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_sampler_does_not_repeat_across_rounds(seed):
+    sampler = QuizSampler(5, seed=seed)
+    draws = [sampler.draw() for _ in range(500)]
+    assert all(a != b for a, b in zip(draws, draws[1:]))
+
+
+def test_sampler_is_reproducible_with_a_seed():
+    first, second = QuizSampler(50, seed=3), QuizSampler(50, seed=3)
+    assert [first.draw() for _ in range(50)] == [second.draw() for _ in range(50)]
+
+
+def test_sampler_keeps_memory_proportional_to_draws():
+    sampler = QuizSampler(10_000_000, seed=4)
+    draws = {sampler.draw() for _ in range(1000)}
+    assert len(draws) == 1000
+    assert len(sampler._swaps) <= 1000
+
+
+def test_empty_sampler_raises():
+    with pytest.raises(Exception):
+        QuizSampler(0).draw()
+
+
+@pytest.fixture(params=["list", "sqlite", "jsonl"])
+def bank(request, tmp_path):
+    if request.param == "list":
+        return ListQuizBank(QUIZZES)
+    if request.param == "sqlite":
+        path = str(tmp_path / "quizzes.sqlite")
+        build_quiz_bank(QUIZZES, path)
+        return SqliteQuizBank(path)
+    path = tmp_path / "quizzes.jsonl"
+    path.write_text("\n".join(json.dumps(quiz) for quiz in QUIZZES) + "\n", encoding="utf-8")
+    return JsonlQuizBank(str(path))
+
+
+@pytest.mark.parametrize("category, difficulty", [
+    (None, None), ("phishing", None), (None, "easy"), ("romance", "hard"),
+])
+def test_banks_filter_by_category_and_difficulty(bank, category, difficulty):
+    expected = [
+        quiz for quiz in QUIZZES
+        if (category is None or quiz["category"] == category)
+        and (difficulty is None or (quiz["risk_score"] >= 80) == (difficulty == "easy"))
+    ]
+    assert bank.count(category, difficulty) == len(expected)
+    sampler = QuizSampler(bank.count(category, difficulty), seed=5)
+    drawn = [bank.get(category, difficulty, sampler.draw()) for _ in expected]
+    assert sorted(quiz["text"] for quiz in drawn) == sorted(quiz["text"] for quiz in expected)
+
+
+def test_banks_list_categories_and_difficulties(bank):
+    assert bank.categories() == ["phishing", "romance"]
+    assert bank.difficulties() == ["easy", "hard"]
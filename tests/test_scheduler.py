@@ -0,0 +1,123 @@
+"""Retries and circuit-breaker transitions in utils.scheduler"""
+import threading
+
+import pytest
+
+from utils import scheduler
+from utils.scheduler import CircuitBreaker, CircuitOpenError, GeminiScheduler
+
+
+class RateLimited(Exception):
+    code = 429
+
+
+@pytest.fixture(autouse=True)
+def no_backoff(monkeypatch):
+    monkeypatch.setattr(scheduler, "backoff_delay", lambda attempt: 0)
+
+
+def make_scheduler(**options):
+    options.setdefault("rate_per_minute", 60_000)
+    options.setdefault("burst", 100)
+    options.setdefault("max_concurrency", 2)
+    return GeminiScheduler(**options)
+
+
+def flaky(failures, error=RateLimited):
+    calls = {"count": 0}
+
+    def fn():
+        calls["count"] += 1
+        if calls["count"] <= failures:
+            raise error("failed")
+        return "ok"
+    return fn, calls
+
+
+def test_retryable_errors_are_retried():
+    fn, calls = flaky(2)
+    assert make_scheduler(max_retries=3).call(fn, timeout=5) == "ok"
+    assert calls["count"] == 3
+
+
+def test_non_retryable_errors_are_not_retried():
+    fn, calls = flaky(1, error=ValueError)
+    with pytest.raises(ValueError):
+        make_scheduler(max_retries=3).call(fn, timeout=5)
+    assert calls["count"] == 1
+
+
+def test_breaker_opens_then_recovers_through_one_trial():
+    breaker = CircuitBreaker(failure_threshold=2, reset_seconds=0)
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+
+    allowed, trial_id = breaker.admit()
+    assert allowed and trial_id is not None
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.admit() == (False, None)
+    assert breaker.rejecting()
+
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+    assert breaker.admit() == (True, None)
+
+
+def test_failed_trial_reopens_the_circuit():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    breaker.record_failure()
+    breaker._opened_at -= 60
+    assert breaker.admit()[0]
+    breaker.record_failure()
+    assert breaker.state == CircuitBreaker.OPEN
+    assert breaker.rejecting()
+
+
+def test_only_the_trial_can_release_the_trial_slot():
+    breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    breaker.record_failure()
+    _, trial_id = breaker.admit()
+    breaker.release_trial(None)
+    assert breaker.admit() == (False, None)
+    breaker.release_trial(trial_id)
+    assert breaker.admit()[0]
+
+
+def test_non_retryable_trial_failure_does_not_wedge_the_circuit():
+    gemini = make_scheduler(max_retries=0)
+    gemini.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=0)
+    with pytest.raises(RateLimited):
+        gemini.call(flaky(1)[0], timeout=5)
+    assert gemini.breaker.state == CircuitBreaker.OPEN
+
+    with pytest.raises(ValueError):
+        gemini.call(flaky(1, error=ValueError)[0], timeout=5)
+    assert gemini.call(lambda: "ok", timeout=5) == "ok"
+    assert gemini.breaker.state == CircuitBreaker.CLOSED
+
+
+def test_queued_calls_are_rejected_once_the_circuit_opens():
+    gemini = make_scheduler(max_concurrency=1)
+    gemini.breaker = CircuitBreaker(failure_threshold=1, reset_seconds=60)
+    started, release = threading.Event(), threading.Event()
+
+    def blocking():
+        started.set()
+        release.wait(5)
+        # Other callers' failures opened the circuit meanwhile
+        gemini.breaker.record_failure()
+        raise ValueError("blocked response")
+
+    queued_calls = []
+    first = gemini.submit(blocking)
+    started.wait(5)
+    second = gemini.submit(lambda: queued_calls.append(1))
+    release.set()
+
+    with pytest.raises(ValueError):
+        first.result(5)
+    with pytest.raises(CircuitOpenError):
+        second.result(5)
+    assert queued_calls == []
@@ -0,0 +1,61 @@
+"""Local scoring and the prescreen thresholds in utils.scoring"""
+import pytest
+
+from conftest import SAFE_ANALYSIS
+from utils import gemini_analysis, scoring
+from utils.scoring import CRITICAL_MIN_SCORE, prescreen, score_text
+
+CRITICAL = (
+    "URGENT: Your account has been compromised. Verify your identity immediately or your account "
+    "will be suspended. Confirm your password to keep access."
+)
+
+
+def test_clear_cut_scam_gets_a_local_critical_verdict():
+    analysis = prescreen(CRITICAL)
+    assert analysis is not None
+    assert analysis["overall_confidence_score"] >= CRITICAL_MIN_SCORE
+    assert analysis["is_safe"] is False
+    assert analysis["suspicious_phrases"]
+
+
+@pytest.mark.parametrize("text", [
+    "See you at lunch tomorrow!",
+    "Thanks for the notes from yesterday's meeting.",
+    # No known phrase matches, but it is a classic scam - only the model can tell
+    "Hi mom, I lost my phone. This is my new number, can you send me some money?",
+])
+def test_low_scores_are_never_reported_safe_locally(text):
+    assert score_text(text)["overall_confidence_score"] < CRITICAL_MIN_SCORE
+    assert prescreen(text) is None
+
+
+def fake_scores(overall, match_count):
+    scores = score_text("placeholder")
+    scores["overall_confidence_score"] = overall
+    scores["matches"] = [
+        {"phrase": f"phrase {index}", "category": "phishing", "weight": 0.9, "reason": "test", "start": 0, "end": 0}
+        for index in range(match_count)
+    ]
+    return scores
+
+
+@pytest.mark.parametrize("overall, match_count, local", [
+    (CRITICAL_MIN_SCORE, 2, True),
+    (100, 5, True),
+    (CRITICAL_MIN_SCORE - 1, 5, False),
+    # Style statistics alone never justify a critical verdict
+    (100, 1, False),
+    (100, 0, False),
+])
+def test_critical_threshold_needs_score_and_two_matches(monkeypatch, overall, match_count, local):
+    monkeypatch.setattr(scoring, "score_text", lambda text: fake_scores(overall, match_count))
+    assert (prescreen("placeholder") is not None) == local
+
+
+def test_prescreen_skips_the_model_only_when_enabled(fake_model):
+    models = fake_model(SAFE_ANALYSIS)
+    assert gemini_analysis.analyze_text(CRITICAL)["source"] == "local"
+    assert sum(model.calls for model in models) == 0
+    assert gemini_analysis.analyze_text(CRITICAL, use_cache=False, use_prescreen=False)["source"] == "gemini"
+    assert sum(model.calls for model in models) == 1
@@ -0,0 +1,85 @@
+"""Single-flight coalescing of identical in-flight analyses"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from conftest import SAFE_ANALYSIS
+from utils import gemini_analysis
+from utils.singleflight import SingleFlight
+
+
+def test_identical_calls_share_one_execution():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+    calls = []
+
+    def work():
+        calls.append(1)
+        started.set()
+        release.wait(5)
+        return "result"
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        leader = pool.submit(flight.do, "key", work)
+        started.wait(5)
+        followers = [pool.submit(flight.do, "key", work) for _ in range(3)]
+        while flight.stats()["coalesced"] < 3:
+            time.sleep(0.001)
+        release.set()
+
+    assert leader.result() == ("result", False)
+    assert [future.result() for future in followers] == [("result", True)] * 3
+    assert len(calls) == 1
+    assert flight.stats() == {"executions": 1, "coalesced": 3, "in_flight": 0}
+
+
+def test_errors_reach_every_waiter_and_release_the_key():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def fail():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        leader = pool.submit(flight.do, "key", fail)
+        started.wait(5)
+        follower = pool.submit(flight.do, "key", fail)
+        while flight.stats()["coalesced"] < 1:
+            time.sleep(0.001)
+        release.set()
+
+    for future in (leader, follower):
+        with pytest.raises(ValueError):
+            future.result()
+    # Not a cache: the next call runs again
+    assert flight.do("key", lambda: "again") == ("again", False)
+
+
+def test_different_keys_do_not_coalesce():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == (1, False)
+    assert flight.do("b", lambda: 2) == (2, False)
+    assert flight.stats()["executions"] == 2
+
+
+def test_concurrent_identical_analyses_call_the_model_once(fake_model):
+    models = fake_model(SAFE_ANALYSIS, latency=0.2)
+    text = "Hey, are we still meeting for coffee on Thursday afternoon?"
+    barrier = threading.Barrier(5)
+
+    def analyze():
+        barrier.wait()
+        return gemini_analysis.analyze_text(text, use_cache=False)
+
+    with ThreadPoolExecutor(max_workers=5) as pool:
+        results = list(pool.map(lambda _: analyze(), range(5)))
+
+    assert sum(model.calls for model in models) == 1
+    assert all(result["success"] for result in results)
+    assert sum(1 for result in results if result.get("coalesced")) == 4
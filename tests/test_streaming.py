@@ -0,0 +1,56 @@
+"""Streamed analyses: incremental JSON parsing and partial results"""
+import json
+
+import pytest
+
+from conftest import SAFE_ANALYSIS
+from utils import gemini_analysis
+from utils.stream_parser import IncrementalJSONParser
+
+
+def feed_in_pieces(text, size):
+    parser = IncrementalJSONParser()
+    events = []
+    for start in range(0, len(text), size):
+        events.extend(parser.feed(text[start:start + size]))
+    return events
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 10_000])
+def test_parser_events_do_not_depend_on_chunk_boundaries(size):
+    analysis = dict(SAFE_ANALYSIS, red_flags=[
+        {"flag": 'Asks for a "code", {braces} and [brackets]', "severity": "high", "explanation": "é ✓"},
+        {"flag": "Second", "severity": "low", "explanation": ""},
+    ])
+    text = "```json\n" + json.dumps(analysis, indent=2, ensure_ascii=False) + "\n```"
+    assert feed_in_pieces(text, size) == feed_in_pieces(text, len(text))
+
+
+def test_parser_emits_array_items_and_scalars():
+    text = json.dumps(dict(SAFE_ANALYSIS, suspicious_phrases=[{"phrase": "act now", "reason": "urgency"}]))
+    events = feed_in_pieces(text, 5)
+    assert ("field", "overall_confidence_score", 10) in events
+    assert ("item", "suspicious_phrases", {"phrase": "act now", "reason": "urgency"}) in events
+
+
+def test_malformed_partial_values_are_coerced_or_dropped(fake_model):
+    malformed = dict(
+        SAFE_ANALYSIS,
+        overall_confidence_score="85",
+        category_scores=dict(SAFE_ANALYSIS["category_scores"], phishing=250),
+        red_flags=["just a string", {"flag": "Real flag", "severity": "HIGH"}],
+    )
+    fake_model(malformed, stream_chunks=40)
+    events = list(gemini_analysis.analyze_text_stream(
+        "Hello, your parcel is waiting, reply to arrange a new delivery slot this week.", use_prescreen=False
+    ))
+    partials = [event["data"] for event in events if event["type"] == "partial"]
+    assert partials
+    for partial in partials:
+        if "overall_confidence_score" in partial:
+            assert partial["overall_confidence_score"] == 85
+        if "category_scores" in partial:
+            assert partial["category_scores"]["phishing"] == 100
+        for flag in partial.get("red_flags", []):
+            assert isinstance(flag, dict) and flag["severity"] in ("low", "medium", "high")
+    assert events[-1]["type"] == "result" and events[-1]["result"]["success"]
@@ -0,0 +1,42 @@
+"""Brand and lookalike checks in utils.url_intel"""
+import pytest
+
+from utils.url_intel import check_urls, is_official_domain
+
+
+@pytest.mark.parametrize("link", [
+    "amazon.com",
+    "amazon.ca",
+    "https://www.amazon.com.au/gp/css/order-history",
+    "login.amazon.co.jp",
+    "google.co.in",
+    "hsbc.co.uk",
+    "paypal.me/alice",
+])
+def test_official_regional_domains_are_not_flagged(link):
+    assert check_urls(f"Please check {link} for details") == []
+
+
+@pytest.mark.parametrize("link, kind", [
+    ("chase-alerts.info", "brand_impersonation"),
+    ("paypal.xyz", "brand_impersonation"),
+    ("paypal.tk", "brand_impersonation"),
+    ("https://paypal.co/login", "brand_impersonation"),
+    ("chase.co", "brand_impersonation"),
+    ("apple.cc", "brand_impersonation"),
+    ("amazon.com.ru/verify", "brand_impersonation"),
+    ("amazon.ca.account-verify.com", "brand_impersonation"),
+    ("paypa1.com", "lookalike"),
+    ("arnazon.ca", "lookalike"),
+])
+def test_impersonating_domains_are_flagged(link, kind):
+    assert [finding["kind"] for finding in check_urls(f"Please check {link} for details")] == [kind]
+
+
+def test_is_official_domain():
+    assert is_official_domain("amazon.de")
+    assert is_official_domain("hsbc.co.uk")
+    assert not is_official_domain("hsbc.info")
+    assert not is_official_domain("paypal.tk")
+    assert not is_official_domain("amazon.com.ru")
+    assert not is_official_domain("hsbcbank.co.uk")
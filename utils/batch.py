@@ -0,0 +1,251 @@
+"""
+Bulk analysis of many messages.
+
+Library use:
+    from utils.batch import analyze_texts
+    for result in analyze_texts(messages, concurrency=16):
+        ...
+
+Command line:
+    python -m utils.batch reported.csv -o results.jsonl --concurrency 16 --pack 10
+    python -m utils.batch reported.csv -o results.jsonl --prefilter 0.9
+"""
+import argparse
+import csv
+import json
+import os
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from utils.gemini_analysis import analyze_text, analyze_packed, configure_gemini
+from utils.scheduler import PRIORITY_BULK
+
+DEFAULT_CONCURRENCY = 8
+
+# Messages longer than this are always sent on their own, even in packed mode
+DEFAULT_PACK_MAX_CHARS = 600
+
+# Messages are run through the offline classifier this many at a time
+OFFLINE_BATCH_SIZE = 1000
+
+
+def _make_units(texts, pack_size, pack_max_chars):
+    """
+    Groups consecutive input messages into work units.
+    Short messages are packed together (up to pack_size per unit); anything
+    longer than pack_max_chars gets a unit of its own.
+    """
+    unit = []
+    for text in texts:
+        if pack_size > 1 and len(text) <= pack_max_chars:
+            unit.append(text)
+            if len(unit) >= pack_size:
+                yield unit
+                unit = []
+        else:
+            if unit:
+                yield unit
+                unit = []
+            yield [text]
+    if unit:
+        yield unit
+
+
+def _analyze_unit(unit, use_cache, use_prescreen):
+    if len(unit) == 1:
+        return [analyze_text(unit[0], use_cache=use_cache, use_prescreen=use_prescreen, priority=PRIORITY_BULK)]
+    return analyze_packed(unit, use_cache=use_cache, use_prescreen=use_prescreen, priority=PRIORITY_BULK)
+
+
+def analyze_texts(texts, concurrency=DEFAULT_CONCURRENCY, pack_size=1,
+                  pack_max_chars=DEFAULT_PACK_MAX_CHARS, use_cache=True, use_prescreen=True):
+    """
+    Analyzes an iterable of messages, yielding one result per message in input order.
+    Calls are queued at bulk priority, so interactive UI requests sharing the
+    process still go first; the overall request rate is capped by the shared
+    Gemini scheduler regardless of concurrency.
+
+    Args:
+        texts: Any iterable of strings. It is consumed lazily, so very large
+            inputs never have to fit in memory.
+        concurrency: Maximum number of Gemini calls in flight at once.
+        pack_size: How many short messages to combine into one prompt.
+            1 disables packing.
+        pack_max_chars: Messages longer than this are never packed.
+        use_cache: Whether to consult and fill the analysis cache.
+        use_prescreen: Whether clear-cut messages may get a local verdict
+            instead of a Gemini call.
+
+    Yields:
+        dict: Same shape as the result of analyze_text.
+    """
+    concurrency = max(1, int(concurrency))
+    # Keep a little more work queued than there are workers so the pool never idles
+    max_in_flight = concurrency * 2
+    in_flight = deque()
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        for unit in _make_units(texts, pack_size, pack_max_chars):
+            in_flight.append(executor.submit(_analyze_unit, unit, use_cache, use_prescreen))
+            # Units are submitted in input order, so draining from the left
+            # keeps the output in input order too
+            while len(in_flight) >= max_in_flight:
+                yield from in_flight.popleft().result()
+
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _batches(texts, batch_size):
+    batch = []
+    for text in texts:
+        batch.append(text)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def analyze_texts_offline(texts, batch_size=OFFLINE_BATCH_SIZE):
+    """
+    Analyzes messages with the offline classifier only - no API calls.
+    Yields results in input order, vectorizing batch_size messages at a time.
+    """
+    from utils.offline_classifier import analyze_offline_batch
+
+    for batch in _batches(texts, batch_size):
+        yield from analyze_offline_batch(batch)
+
+
+def analyze_texts_prefiltered(texts, min_confidence, batch_size=OFFLINE_BATCH_SIZE, **options):
+    """
+    Analyzes messages with the offline classifier first and sends only the
+    ambiguous ones to Gemini.
+
+    A message keeps its offline verdict (source "prefilter") when the
+    classifier is at least min_confidence sure either way, i.e. its scam
+    probability is <= 1 - min_confidence or >= min_confidence. The rest go
+    through analyze_texts with options. Results are yielded in input order.
+    """
+    from utils.offline_classifier import analyze_offline_batch
+
+    for batch in _batches(texts, batch_size):
+        offline = analyze_offline_batch(batch, source="prefilter", label="Offline pre-filter")
+        confident = [
+            max(result["scam_probability"], 1 - result["scam_probability"]) >= min_confidence
+            for result in offline
+        ]
+        ambiguous = [text for text, keep in zip(batch, confident) if not keep]
+        model_results = analyze_texts(ambiguous, **options)
+        for result, keep in zip(offline, confident):
+            yield result if keep else next(model_results)
+
+
+def read_records(path, text_field="text", id_field="id"):
+    """
+    Reads (id, text) pairs from a CSV or JSONL file.
+    The format is picked from the file extension; "-" reads JSONL from stdin.
+    """
+    if path == "-":
+        handle = sys.stdin
+        is_csv = False
+    else:
+        handle = open(path, newline="", encoding="utf-8")
+        is_csv = path.lower().endswith(".csv")
+
+    try:
+        if is_csv:
+            for line_number, row in enumerate(csv.DictReader(handle), 1):
+                if text_field not in row:
+                    raise Exception(f"CSV row {line_number} has no '{text_field}' column")
+                yield row.get(id_field) or line_number, row[text_field] or ""
+        else:
+            for line_number, line in enumerate(handle, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                record = json.loads(line)
+                if isinstance(record, str):
+                    yield line_number, record
+                else:
+                    yield record.get(id_field, line_number), record.get(text_field) or ""
+    finally:
+        if handle is not sys.stdin:
+            handle.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Analyze many messages from a CSV or JSONL file and write JSONL results."
+    )
+    parser.add_argument("input", help="CSV or JSONL file, or - for JSONL on stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file (default: stdout)")
+    parser.add_argument("--text-field", default="text", help="Column/field holding the message text")
+    parser.add_argument("--id-field", default="id", help="Column/field holding a message id")
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY,
+                        help="Maximum Gemini calls in flight")
+    parser.add_argument("--pack", type=int, default=1,
+                        help="Pack up to N short messages into one prompt")
+    parser.add_argument("--pack-max-chars", type=int, default=DEFAULT_PACK_MAX_CHARS,
+                        help="Only pack messages up to this many characters")
+    parser.add_argument("--no-cache", action="store_true", help="Bypass the analysis cache")
+    parser.add_argument("--no-prescreen", action="store_true",
+                        help="Send every message to Gemini, even clear-cut ones")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--offline", action="store_true",
+                      help="Use only the offline classifier (no API calls)")
+    mode.add_argument("--prefilter", type=float, metavar="CONFIDENCE",
+                      help="Keep the offline classifier's verdict when it is at least this sure "
+                           "(0.5-1, e.g. 0.9) and send only the rest to Gemini")
+    args = parser.parse_args(argv)
+    if args.prefilter is not None and not 0.5 <= args.prefilter <= 1:
+        parser.error("--prefilter must be between 0.5 and 1")
+
+    from dotenv import load_dotenv
+
+    load_dotenv()
+    configure_gemini(os.getenv("GOOGLE_API_KEY"))
+
+    records = read_records(args.input, args.text_field, args.id_field)
+    ids = deque()
+
+    def texts():
+        # Remember ids in input order; results come back in the same order
+        for record_id, text in records:
+            ids.append(record_id)
+            yield text
+
+    out = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    total = failures = 0
+    try:
+        options = {
+            "concurrency": args.concurrency,
+            "pack_size": args.pack,
+            "pack_max_chars": args.pack_max_chars,
+            "use_cache": not args.no_cache,
+            "use_prescreen": not args.no_prescreen
+        }
+        if args.offline:
+            results = analyze_texts_offline(texts())
+        elif args.prefilter is not None:
+            results = analyze_texts_prefiltered(texts(), args.prefilter, **options)
+        else:
+            results = analyze_texts(texts(), **options)
+        for result in results:
+            total += 1
+            if not result["success"]:
+                failures += 1
+            out.write(json.dumps({"id": ids.popleft(), **result}, ensure_ascii=False) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+
+    print(f"Analyzed {total} messages, {failures} failed", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""
+Splitting long documents into chunks and merging per-chunk analyses.
+
+Used by analyze_long_text in utils.gemini_analysis: each chunk is analyzed on
+its own (concurrently), then the chunk results are reduced into one analysis
+with the usual shape. analyze_text_incremental does the same with
+sentence-aligned segments (split_into_segments) so edits reuse earlier work.
+"""
+import hashlib
+import re
+
+from utils.matcher import fold_case
+
+# Texts longer than this are analyzed chunk by chunk
+CHUNK_MAX_CHARS = 8000
+
+# Trailing context repeated at the start of the next chunk, so a phrase that
+# straddles a boundary is still seen whole by one of the chunks
+CHUNK_OVERLAP_CHARS = 400
+
+# Segments for incremental re-analysis (see split_into_segments): a segment
+# may end once it has SEGMENT_MIN_CHARS, at a sentence picked by its content,
+# and must end before SEGMENT_MAX_CHARS
+SEGMENT_MIN_CHARS = 1200
+SEGMENT_MAX_CHARS = 4000
+SEGMENT_BOUNDARY_MODULUS = 4
+
+PARAGRAPH_RE = re.compile(r"\n\s*\n")
+SENTENCE_END_RE = re.compile(r"(?<=[.!?])[\"')\]]*\s+")
+
+SEVERITY_RANK = {"low": 0, "medium": 1, "high": 2}
+
+
+def split_sentences(text):
+    """Splits text after sentence-ending punctuation, keeping the punctuation"""
+    sentences = []
+    start = 0
+    for match in SENTENCE_END_RE.finditer(text):
+        sentence = text[start:match.end()].strip()
+        if sentence:
+            sentences.append(sentence)
+        start = match.end()
+    tail = text[start:].strip()
+    if tail:
+        sentences.append(tail)
+    return sentences
+
+
+def _split_units(text, max_chars):
+    """
+    Breaks text into units no longer than max_chars, preferring paragraph
+    boundaries, then sentence boundaries, then whitespace.
+    """
+    units = []
+    for paragraph in PARAGRAPH_RE.split(text):
+        paragraph = paragraph.strip()
+        if not paragraph:
+            continue
+        if len(paragraph) <= max_chars:
+            units.append(paragraph)
+            continue
+        for sentence in split_sentences(paragraph):
+            while len(sentence) > max_chars:
+                cut = sentence.rfind(" ", 0, max_chars)
+                if cut <= 0:
+                    cut = max_chars
+                units.append(sentence[:cut].strip())
+                sentence = sentence[cut:].strip()
+            if sentence:
+                units.append(sentence)
+    return units
+
+
+def sentence_key(sentence):
+    """Stable hash of a sentence, ignoring whitespace differences"""
+    return hashlib.sha1(" ".join(sentence.split()).encode("utf-8")).hexdigest()
+
+
+def split_into_segments(text, min_chars=SEGMENT_MIN_CHARS, max_chars=SEGMENT_MAX_CHARS,
+                        boundary_modulus=SEGMENT_BOUNDARY_MODULUS):
+    """
+    Splits text into runs of whole sentences for incremental re-analysis.
+
+    Boundaries are content-defined: once a segment has min_chars, it ends
+    after the first sentence whose hash is divisible by boundary_modulus.
+    Editing one sentence therefore only changes the segment containing it
+    (and at most its neighbour), instead of shifting every later boundary
+    the way fixed-size chunks would.
+
+    Returns:
+        list: Segment strings in document order, sentences joined by a space.
+    """
+    segments = []
+    current = []
+    current_len = 0
+    for unit in _split_units(text, max_chars):
+        for part in split_sentences(unit):
+            if current and current_len + len(part) + 1 > max_chars:
+                segments.append(" ".join(current))
+                current, current_len = [], 0
+            current.append(part)
+            current_len += len(part) + 1
+            if current_len >= min_chars and int(sentence_key(part)[:8], 16) % boundary_modulus == 0:
+                segments.append(" ".join(current))
+                current, current_len = [], 0
+    if current:
+        segments.append(" ".join(current))
+    return segments
+
+
+def split_into_chunks(text, max_chars=CHUNK_MAX_CHARS, overlap_chars=CHUNK_OVERLAP_CHARS):
+    """
+    Splits text into chunks of at most max_chars characters on paragraph and
+    sentence boundaries.
+
+    Each chunk after the first starts with the last overlap_chars worth of
+    whole units from the previous chunk; the overlap counts towards
+    max_chars, so every chunk fits in one analyze_text call.
+
+    Returns:
+        list: Chunk strings in document order.
+    """
+    if len(text) <= max_chars:
+        return [text]
+
+    chunks = []
+    current = []
+    current_len = 0
+
+    # Leave room for the overlap in front of every unit
+    for unit in _split_units(text, max(1, max_chars - overlap_chars)):
+        if current and current_len + len(unit) + 1 > max_chars:
+            chunks.append("\n".join(current))
+            # Carry whole trailing units forward as overlap
+            overlap = []
+            overlap_len = 0
+            for previous in reversed(current):
+                if overlap_len + len(previous) > overlap_chars:
+                    break
+                overlap.insert(0, previous)
+                overlap_len += len(previous) + 1
+            while overlap and overlap_len + len(unit) > max_chars:
+                overlap_len -= len(overlap.pop(0)) + 1
+            current = overlap
+            current_len = overlap_len
+        current.append(unit)
+        current_len += len(unit) + 1
+
+    if current:
+        chunks.append("\n".join(current))
+    return chunks
+
+
+def _merge_scores(values, weights, mode):
+    if mode == "weighted":
+        total = sum(weights)
+        return int(round(sum(v * w for v, w in zip(values, weights)) / total)) if total else 0
+    return max(values)
+
+
+def merge_analyses(analyses, weights=None, mode="max"):
+    """
+    Reduces several chunk analyses into one.
+
+    Args:
+        analyses: List of analysis dicts (the "data" part of analyze_text results).
+        weights: Optional per-chunk weights, typically chunk lengths.
+        mode: "max" - each score is the highest chunk score, so one scammy
+            section flags the whole document (default).
+            "weighted" - each score is the weighted mean over chunks.
+
+    Returns:
+        dict: A single analysis with the usual keys.
+    """
+    if weights is None:
+        weights = [1] * len(analyses)
+
+    overall = _merge_scores(
+        [a.get("overall_confidence_score", 0) for a in analyses], weights, mode
+    )
+
+    categories = []
+    for analysis in analyses:
+        for category in analysis.get("category_scores", {}):
+            if category not in categories:
+                categories.append(category)
+    category_scores = {
+        category: _merge_scores(
+            [a.get("category_scores", {}).get(category, 0) for a in analyses], weights, mode
+        )
+        for category in categories
+    }
+
+    # Same flag from several chunks: keep one, at the highest severity seen
+    red_flags = {}
+    for analysis in analyses:
+        for flag in analysis.get("red_flags", []):
+            key = fold_case(" ".join(flag.get("flag", "").split()))
+            existing = red_flags.get(key)
+            if existing is None or (
+                SEVERITY_RANK.get(flag.get("severity", "").lower(), 0)
+                > SEVERITY_RANK.get(existing.get("severity", "").lower(), 0)
+            ):
+                red_flags[key] = flag
+
+    suspicious_phrases = {}
+    for analysis in analyses:
+        for phrase_data in analysis.get("suspicious_phrases", []):
+            key = fold_case(" ".join(phrase_data.get("phrase", "").split()))
+            if key and key not in suspicious_phrases:
+                suspicious_phrases[key] = phrase_data
+
+    # Narrative fields come from the riskiest chunk
+    riskiest = max(analyses, key=lambda a: a.get("overall_confidence_score", 0))
+
+    if mode == "max":
+        is_safe = all(a.get("is_safe", False) for a in analyses)
+    else:
+        is_safe = overall < 50
+
+    return {
+        "overall_confidence_score": overall,
+        "overall_assessment": riskiest.get("overall_assessment", ""),
+        "category_scores": category_scores,
+        "red_flags": list(red_flags.values()),
+        "suspicious_phrases": list(suspicious_phrases.values()),
+        "recommendation": riskiest.get("recommendation", ""),
+        "is_safe": is_safe
+    }
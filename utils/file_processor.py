@@ -1,76 +1,234 @@
-import PyPDF2
-import docx
-from PIL import Image
-import pytesseract
+"""
+Text extraction from uploaded files.
+
+Each format has an extractor in EXTRACTORS, registered with the MIME types
+and extensions it handles. The libraries an extractor needs (PyPDF2,
+python-docx, Pillow/pytesseract) are imported inside it, on first use, so
+importing this module - and starting the app - stays cheap.
+"""
 import io
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from utils.metrics import observe, stage_timer
+
+# Parallel PDF extraction only pays off once there are enough pages to split up
+PDF_WORKERS = int(os.getenv("PDF_WORKERS", "1"))
+PDF_PARALLEL_MIN_PAGES = 16
+PDF_PAGES_PER_TASK = 8
+
+
+def _select_pages(page_count, pages=None):
+    """Returns the 0-based page indices to extract, in document order"""
+    if pages is None:
+        return list(range(page_count))
+    return sorted({index for index in pages if 0 <= index < page_count})
+
+
+def iter_pdf_pages(file, pages=None, char_budget=None):
+    """
+    Yields the text of a PDF one page at a time.
+
+    Args:
+        file: File-like object containing the PDF.
+        pages: Optional iterable of 0-based page indices (e.g. range(0, 5)).
+        char_budget: Stop once this many characters have been produced.
+            The last page is truncated to fit.
+    """
+    import PyPDF2
+
+    pdf_reader = PyPDF2.PdfReader(file)
+    remaining = char_budget
+    for index in _select_pages(len(pdf_reader.pages), pages):
+        page_text = pdf_reader.pages[index].extract_text() or ""
+        if remaining is not None:
+            if len(page_text) >= remaining:
+                yield page_text[:remaining]
+                return
+            remaining -= len(page_text)
+        yield page_text
+
+
+_worker_pdf_reader = None
+
+
+def _init_pdf_worker(data):
+    # Each worker process parses the document once and reuses it for every task
+    import PyPDF2
+
+    global _worker_pdf_reader
+    _worker_pdf_reader = PyPDF2.PdfReader(io.BytesIO(data))
+
+
+def _extract_pdf_page_batch(indices):
+    return [_worker_pdf_reader.pages[index].extract_text() or "" for index in indices]
+
+
+def iter_pdf_pages_parallel(data, pages=None, char_budget=None, workers=PDF_WORKERS):
+    """
+    Same as iter_pdf_pages, but extracts pages on a pool of worker processes.
+    Pages are still yielded in document order. Once the character budget
+    is reached, batches that haven't started yet are cancelled.
+
+    Args:
+        data: The PDF as bytes (it is shipped to each worker once).
+    """
+    import PyPDF2
+
+    page_count = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+    indices = _select_pages(page_count, pages)
+    batches = [indices[i:i + PDF_PAGES_PER_TASK] for i in range(0, len(indices), PDF_PAGES_PER_TASK)]
+    remaining = char_budget
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_pdf_worker, initargs=(data,)) as executor:
+        futures = [executor.submit(_extract_pdf_page_batch, batch) for batch in batches]
+        try:
+            for future in futures:
+                for page_text in future.result():
+                    if remaining is not None:
+                        if len(page_text) >= remaining:
+                            yield page_text[:remaining]
+                            return
+                        remaining -= len(page_text)
+                    yield page_text
+        finally:
+            for future in futures:
+                future.cancel()
+
 
-pytesseract.pytesseract.tesseract_cmd = r'C:\Program Files\Tesseract-OCR\tesseract.exe'
+def extract_text_from_pdf(file, pages=None, char_budget=None, workers=None):
+    """
+    Extract text from PDF file
 
-def extract_text_from_pdf(file):
-    """Extract text from PDF file"""
+    Args:
+        file: File-like object containing the PDF
+        pages: Optional iterable of 0-based page indices to extract
+        char_budget: Optional maximum number of characters to extract
+        workers: Number of worker processes; defaults to PDF_WORKERS.
+            Parallel mode is only used for documents with many pages.
+    """
     try:
-        pdf_reader = PyPDF2.PdfReader(file)
-        text = ""
-        for page in pdf_reader.pages:
-            text += page.extract_text() + "\n"
-        return text.strip()
+        workers = PDF_WORKERS if workers is None else workers
+        if workers > 1:
+            import PyPDF2
+
+            data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+            page_count = len(PyPDF2.PdfReader(io.BytesIO(data)).pages)
+            if len(_select_pages(page_count, pages)) >= PDF_PARALLEL_MIN_PAGES:
+                page_texts = iter_pdf_pages_parallel(data, pages, char_budget, workers)
+            else:
+                page_texts = iter_pdf_pages(io.BytesIO(data), pages, char_budget)
+        else:
+            page_texts = iter_pdf_pages(file, pages, char_budget)
+        return "\n".join(page_texts).strip()
     except Exception as e:
         raise Exception(f"Error reading PDF: {str(e)}")
 
 def extract_text_from_docx(file):
     """Extract text from DOCX file"""
     try:
+        import docx
+
         doc = docx.Document(file)
-        text = ""
-        for paragraph in doc.paragraphs:
-            text += paragraph.text + "\n"
-        return text.strip()
+        return "\n".join(paragraph.text for paragraph in doc.paragraphs).strip()
     except Exception as e:
         raise Exception(f"Error reading DOCX: {str(e)}")
 
 def extract_text_from_image(file):
     """Extract text from image using OCR"""
     try:
-        image = Image.open(file)
-        text = pytesseract.image_to_string(image)
-        return text.strip()
+        from utils.ocr import ocr_image_bytes
+
+        data = file.getvalue() if hasattr(file, "getvalue") else file.read()
+        return ocr_image_bytes(data)
     except Exception as e:
         raise Exception(f"Error reading image: {str(e)}")
 
-def process_uploaded_file(uploaded_file):
+def extract_text_from_txt(file):
+    """Extract text from a UTF-8 text file"""
+    return file.read().decode('utf-8')
+
+# kind -> {"extract", "mime_types", "extensions", "budget_aware"}, checked in order
+EXTRACTORS = {}
+
+def register_extractor(kind, extract, mime_types=(), extensions=(), budget_aware=False):
+    """
+    Registers the extractor for a file format.
+
+    Args:
+        kind: Short name of the format, e.g. "pdf". Re-registering replaces it.
+        extract: extract(file) -> str, or extract(file, char_budget) -> str
+            if budget_aware. Import heavy libraries inside it, not at module top.
+        mime_types: MIME types that select this extractor.
+        extensions: File name extensions (with the dot) that select it.
+        budget_aware: The extractor stops early at char_budget itself;
+            otherwise its output is truncated afterwards.
+    """
+    EXTRACTORS[kind] = {
+        "extract": extract,
+        "mime_types": tuple(mime_types),
+        "extensions": tuple(extensions),
+        "budget_aware": budget_aware
+    }
+
+def find_extractor(file_type, file_name):
+    """Returns (kind, extractor entry) for a file, or (None, None) if unsupported"""
+    file_name = file_name.lower()
+    for kind, extractor in EXTRACTORS.items():
+        if file_type in extractor["mime_types"] or file_name.endswith(extractor["extensions"]):
+            return kind, extractor
+    return None, None
+
+register_extractor(
+    "pdf", lambda file, char_budget: extract_text_from_pdf(file, char_budget=char_budget),
+    mime_types=["application/pdf"], extensions=[".pdf"], budget_aware=True
+)
+register_extractor(
+    "docx", extract_text_from_docx,
+    mime_types=["application/vnd.openxmlformats-officedocument.wordprocessingml.document"], extensions=[".docx"]
+)
+register_extractor(
+    "image", extract_text_from_image,
+    mime_types=["image/png", "image/jpeg", "image/jpg"], extensions=[".png", ".jpg", ".jpeg"]
+)
+register_extractor("txt", extract_text_from_txt, mime_types=["text/plain"], extensions=[".txt"])
+
+class UploadedBytes(io.BytesIO):
+    """
+    In-memory upload with the same interface as Streamlit's UploadedFile
+    (also a BytesIO): the name and MIME type process_uploaded_file looks at.
+    Lets callers outside Streamlit (the HTTP API, benchmarks) pass raw bytes.
+    """
+
+    def __init__(self, name, type, data):
+        super().__init__(data)
+        self.name = name
+        self.type = type
+        self.size = len(data)
+
+def process_uploaded_file(uploaded_file, char_budget=None):
     """
     Process uploaded file and extract text based on file type
     
     Args:
         uploaded_file: Streamlit UploadedFile object
+        char_budget: Optional maximum number of characters to extract.
+            PDFs stop reading pages once the budget is reached.
         
     Returns:
         str: Extracted text from the file
     """
-    file_type = uploaded_file.type
-    file_name = uploaded_file.name.lower()
+    kind, extractor = find_extractor(uploaded_file.type, uploaded_file.name)
+    if extractor is None:
+        raise Exception(f"Error processing file: Unsupported file type: {uploaded_file.type}")
     
     try:
-        # PDF files
-        if file_type == "application/pdf" or file_name.endswith('.pdf'):
-            return extract_text_from_pdf(uploaded_file)
-        
-        # Word documents
-        elif file_type == "application/vnd.openxmlformats-officedocument.wordprocessingml.document" or file_name.endswith('.docx'):
-            return extract_text_from_docx(uploaded_file)
-        
-        # Images
-        elif file_type in ["image/png", "image/jpeg", "image/jpg"] or file_name.endswith(('.png', '.jpg', '.jpeg')):
-            return extract_text_from_image(uploaded_file)
-        
-        # Plain text
-        elif file_type == "text/plain" or file_name.endswith('.txt'):
-            return uploaded_file.read().decode('utf-8')
-        
-        else:
-            raise Exception(f"Unsupported file type: {file_type}")
-    
+        with stage_timer("extract", kind=kind):
+            if extractor["budget_aware"]:
+                text = extractor["extract"](uploaded_file, char_budget)
+            else:
+                text = extractor["extract"](uploaded_file)[:char_budget]
     except Exception as e:
         raise Exception(f"Error processing file: {str(e)}")
-
-
+    observe("extracted_chars", len(text), "Characters extracted from uploaded files", kind=kind)
+    return text
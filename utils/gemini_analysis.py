@@ -1,14 +1,74 @@
-import google.generativeai as genai
+import difflib
 import json
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-def analyze_text(text):
-    """
-    Analyzes text using Gemini AI for scams, misinformation, and manipulation.
-    Returns a structured analysis with scores and explanations.
-    """
-    
-    # Create the prompt for Gemini with better scoring instructions
-    prompt = f"""
+from utils.cache import LRUCache, get_analysis_cache, make_cache_key
+from utils.chunking import (
+    CHUNK_MAX_CHARS,
+    merge_analyses,
+    sentence_key,
+    split_into_chunks,
+    split_into_segments,
+    split_sentences
+)
+from utils.metrics import inc, observe, stage_timer, start_timer
+from utils.precomputed import get_precomputed_analysis
+from utils.scheduler import PRIORITY_INTERACTIVE, get_scheduler
+from utils.router import MODEL_TIERS, needs_escalation, routing_signature
+from utils.response_parser import (
+    build_followup_prompt,
+    merge_followup,
+    parse_analysis_response,
+    strip_code_fences,
+    validate_analysis,
+    validate_partial_analysis
+)
+from utils.highlight import create_annotated_text_html  # noqa: F401 - re-exported for app.py
+from utils.matcher import fold_case
+from utils.near_duplicate import adapt_analysis, get_near_duplicate_index
+from utils.scoring import build_local_analysis, prescreen
+from utils.singleflight import SingleFlight
+from utils.url_intel import check_urls, format_url_findings, phishing_floor
+from utils.stream_parser import IncrementalJSONParser
+
+# Fastest model tier; stronger tiers are only used for uncertain answers (see utils.router)
+MODEL_NAME = MODEL_TIERS[0]
+
+# Bump whenever ANALYSIS_PROMPT changes so cached results from the old prompt
+# are not served for the new one
+PROMPT_VERSION = 2
+
+# How many chunks of a long document are analyzed at the same time
+CHUNK_WORKERS = 4
+
+# The app re-analyzes edited texts at least this long segment by segment
+# (see analyze_text_incremental)
+INCREMENTAL_MIN_CHARS = int(os.getenv("INCREMENTAL_MIN_CHARS", str(CHUNK_MAX_CHARS)))
+
+# Fall back to the offline classifier when Gemini can't produce an answer
+OFFLINE_FALLBACK = os.getenv("OFFLINE_FALLBACK", "1") != "0"
+
+# Shared by every session in the process, so identical in-flight requests
+# cost one Gemini call
+_singleflight = SingleFlight()
+
+# Findings per text segment, shared by every session, so a segment seen in
+# any earlier incremental analysis isn't sent again
+_segment_findings = LRUCache(max_entries=int(os.getenv("SEGMENT_FINDINGS_ENTRIES", "2048")))
+
+# Builds the model object for a model name; replaced by benchmarks and tests
+# (see set_model_factory) to run without network access
+_model_factory = None
+
+# google.generativeai takes about a second to import, so it is loaded on the
+# first Gemini call rather than at startup (see configure_gemini)
+_genai = None
+_genai_api_key = None
+_genai_lock = threading.Lock()
+
+ANALYSIS_PROMPT = """
 You are a digital literacy expert. Analyze the following text for potential scams, misinformation, and manipulation tactics.
 
 IMPORTANT SCORING GUIDELINES:
@@ -33,7 +93,7 @@ PHRASE FLAGGING RULES:
 - DO flag: unrealistic promises, requests for money from strangers, suspicious URLs, authority impersonation
 - Consider the SEVERITY: not everything is a red flag, some things are just "be aware"
 
-TEXT TO ANALYZE:
+{url_findings}TEXT TO ANALYZE:
 {text}
 
 Provide a detailed analysis in the following JSON format:
@@ -92,44 +152,730 @@ Text: "I love you. I need $800 for plane ticket via Western Union. I'll pay you
 
 Be thorough and accurate. If the text seems safe, reflect that in low scores. Don't over-flag legitimate communication.
 """
-    
+
+
+PACKED_PROMPT_HEADER = """
+You will analyze {count} SEPARATE messages. Treat each message independently -
+the content of one message must not influence the scores of another.
+Apply the instructions below to every message.
+"""
+
+PACKED_PROMPT_FOOTER = """
+MESSAGES TO ANALYZE:
+{messages}
+{url_findings}
+Return ONLY a JSON array containing exactly {count} objects, one per message,
+in the same order as the messages above. Each object must use the JSON format
+described above plus an extra field "message_index" holding the message number.
+"""
+
+
+def build_prompt(text):
+    """Fills the analysis prompt template with the text to analyze"""
+    with stage_timer("prompt_build", kind="single"):
+        prompt = ANALYSIS_PROMPT.format(text=text, url_findings=format_url_findings(check_urls(text)))
+    observe("prompt_chars", len(prompt), "Prompt size in characters", kind="single")
+    return prompt
+
+
+def build_packed_prompt(texts):
+    """
+    Builds one prompt that asks for an analysis of several short messages.
+    The ~3 KB of instructions is paid once per pack instead of once per message.
+    """
+    with stage_timer("prompt_build", kind="packed"):
+        messages = "\n\n".join(
+            f"[MESSAGE {number}]\n{text}\n[END MESSAGE {number}]"
+            for number, text in enumerate(texts, 1)
+        )
+        url_findings = "".join(
+            format_url_findings(findings).replace("LOCAL URL CHECKS", f"LOCAL URL CHECKS FOR MESSAGE {number}", 1)
+            for number, findings in enumerate((check_urls(text) for text in texts), 1)
+        )
+        prompt = (
+            PACKED_PROMPT_HEADER.format(count=len(texts))
+            + ANALYSIS_PROMPT.format(text="(see the numbered messages at the end)", url_findings="")
+            + PACKED_PROMPT_FOOTER.format(count=len(texts), messages=messages,
+                                          url_findings="\n" + url_findings if url_findings else "")
+        )
+    observe("prompt_chars", len(prompt), "Prompt size in characters", kind="packed")
+    return prompt
+
+
+def configure_gemini(api_key=None):
+    """
+    Sets the Gemini API key without importing the SDK. The SDK is imported
+    and configured on the first Gemini call. Without a key, GOOGLE_API_KEY
+    from the environment is used.
+    """
+    global _genai_api_key
+    with _genai_lock:
+        _genai_api_key = api_key
+        if _genai is not None:
+            _genai.configure(api_key=api_key or os.getenv("GOOGLE_API_KEY"))
+
+
+def _load_genai():
+    global _genai
+    if _genai is None:
+        with _genai_lock:
+            if _genai is None:
+                import google.generativeai as genai
+
+                genai.configure(api_key=_genai_api_key or os.getenv("GOOGLE_API_KEY"))
+                _genai = genai
+    return _genai
+
+
+def set_model_factory(factory):
+    """
+    Replaces genai.GenerativeModel with factory(model_name) for every Gemini
+    call, e.g. with a fake model that returns canned JSON. Pass None to
+    restore the real client.
+    """
+    global _model_factory
+    _model_factory = factory
+
+
+def _get_model(model_name):
+    if _model_factory is not None:
+        return _model_factory(model_name)
+    return _load_genai().GenerativeModel(model_name)
+
+
+def generate(prompt, model_name=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Sends a prompt to Gemini and returns the raw response text.
+    The call goes through the shared scheduler (rate limit, retries,
+    circuit breaker - see utils.scheduler). The gemini_call stage timing
+    includes time spent queued in the scheduler.
+    """
+    model_name = model_name or MODEL_NAME
+    model = _get_model(model_name)
+    with stage_timer("gemini_call", model=model_name):
+        response_text = get_scheduler().call(lambda: model.generate_content(prompt).text, priority)
+    observe("response_chars", len(response_text or ""), "Gemini response size in characters", model=model_name)
+    return response_text
+
+
+def generate_stream(prompt, model_name=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Sends a prompt to Gemini and yields the response text chunk by chunk.
+    Opening the stream goes through the shared scheduler; chunks are read
+    by the caller.
+    """
+    model_name = model_name or MODEL_NAME
+    model = _get_model(model_name)
+    timer = start_timer("gemini_call", model=model_name)
+    size = 0
     try:
-        # Call Gemini API
-        model = genai.GenerativeModel('gemini-1.5-flash') # Ya 'gemini-pro'
-        response = model.generate_content(prompt)
-        # Extract and parse the JSON response
-        response_text = response.text.strip()
-        
-        # Remove markdown code blocks if present
-        if response_text.startswith("```json"):
-            response_text = response_text[7:]
-        if response_text.startswith("```"):
-            response_text = response_text[3:]
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]
-        
-        response_text = response_text.strip()
-        
-        # Parse JSON
-        analysis = json.loads(response_text)
-        
+        response = get_scheduler().call(lambda: model.generate_content(prompt, stream=True), priority)
+        for chunk in response:
+            size += len(chunk.text)
+            yield chunk.text
+    except Exception as e:
+        timer.stop(e)
+        raise
+    timer.stop()
+    observe("response_chars", size, "Gemini response size in characters", model=model_name)
+
+
+def _cache_key(text):
+    return make_cache_key(text, routing_signature(), PROMPT_VERSION)
+
+
+def _fast_path(text, cache, cache_key, use_prescreen):
+    """
+    Returns a result without calling Gemini if one is available:
+    a local verdict for texts with blocklisted links, a cached analysis, a
+    precomputed analysis of a bundled example, the analysis of a
+    near-identical message, or a local verdict for other clear-cut texts.
+    """
+    # A link on the blocklist settles it, whatever an earlier analysis said
+    # (the blocklist may have been updated since)
+    if use_prescreen and any(finding["kind"] == "blocklisted" for finding in check_urls(text)):
+        inc("blocklist_verdicts_total", 1, "Instant verdicts for texts with blocklisted links")
         return {
             "success": True,
-            "data": analysis
+            "data": build_local_analysis(text),
+            "source": "blocklist"
         }
-        
-    except json.JSONDecodeError as e:
-        return {
+
+    if cache is not None:
+        cached = cache.get(cache_key)
+        if cached is not None:
+            return {
+                "success": True,
+                "data": cached,
+                "source": "cache"
+            }
+
+        # Skipped along with the cache, so use_cache=False always gets a fresh answer
+        precomputed = get_example_analysis(text)
+        if precomputed is not None:
+            return {
+                "success": True,
+                "data": precomputed,
+                "source": "precomputed"
+            }
+
+        result = _near_duplicate(text)
+        if result is not None:
+            return result
+
+    if use_prescreen:
+        local_analysis = prescreen(text)
+        if local_analysis is not None:
+            return {
+                "success": True,
+                "data": local_analysis,
+                "source": "local"
+            }
+
+    return None
+
+
+def _near_duplicate(text):
+    """
+    A confident earlier analysis of a near-identical message (another copy
+    of the same campaign), adapted to text, or None.
+    """
+    if len(text) > CHUNK_MAX_CHARS:
+        return None
+    with stage_timer("near_duplicate_lookup"):
+        match = get_near_duplicate_index().query(text)
+        if match is None:
+            return None
+        similarity, stored_text, stored_data = match
+        data = adapt_analysis(stored_text, stored_data, text)
+    if data is None:
+        inc("near_duplicate_rejected_total", 1, "Near-duplicate matches rejected by the local re-check")
+        return None
+    return {
+        "success": True,
+        "data": data,
+        "source": "near_duplicate",
+        "similarity": round(similarity, 3)
+    }
+
+
+def _store_result(cache, cache_key, text, result):
+    """Caches a Gemini result; confident verdicts also go into the near-duplicate index"""
+    # Offline estimates must not outlive the outage
+    if result.get("source") == "offline":
+        return
+    cache.set(cache_key, result["data"])
+    if len(text) <= CHUNK_MAX_CHARS and not needs_escalation(result):
+        get_near_duplicate_index().add(text, result["data"])
+
+
+def get_example_analysis(text):
+    """The build-time analysis of a bundled example text (see utils.precomputed), or None"""
+    return get_precomputed_analysis(text, routing_signature(), PROMPT_VERSION)
+
+
+def analyze_text(text, use_cache=True, use_prescreen=True, priority=PRIORITY_INTERACTIVE):
+    """
+    Analyzes text using Gemini AI for scams, misinformation, and manipulation.
+    Returns a structured analysis with scores and explanations.
+
+    Successful results are cached by a hash of the normalized text, model name
+    and prompt version, so a repeat submission skips the Gemini call entirely.
+    Clearly critical texts get an instant local verdict from utils.scoring;
+    everything else goes to Gemini.
+    Texts longer than CHUNK_MAX_CHARS are analyzed with analyze_long_text.
+
+    priority is passed to the Gemini scheduler: bulk jobs should use
+    utils.scheduler.PRIORITY_BULK so interactive requests go first.
+
+    Identical texts submitted while one is already being analyzed (by any
+    session) wait for that analysis instead of calling Gemini again; their
+    results are marked coalesced=True.
+    """
+    cache = get_analysis_cache() if use_cache else None
+    cache_key = _cache_key(text)
+
+    result = _fast_path(text, cache, cache_key, use_prescreen)
+    if result is not None:
+        return result
+
+    result, shared = _singleflight.do(
+        cache_key, lambda: _analyze_uncached(text, cache, cache_key, use_cache, use_prescreen, priority)
+    )
+    if shared:
+        result = _coalesced(result)
+    if len(text) > CHUNK_MAX_CHARS:
+        # Each chunk already had its own offline fallback
+        return result
+    return _with_offline_fallback(text, result)
+
+
+def _analyze_uncached(text, cache, cache_key, use_cache, use_prescreen, priority):
+    """The Gemini part of analyze_text, run once per set of identical in-flight requests"""
+    if len(text) > CHUNK_MAX_CHARS:
+        result = analyze_long_text(text, use_cache=use_cache, use_prescreen=use_prescreen, priority=priority)
+        if result["success"] and cache is not None and not (result.get("failed_chunks") or result.get("offline_chunks")):
+            cache.set(cache_key, result["data"])
+        return result
+
+    # Create the prompt for Gemini with better scoring instructions
+    prompt = build_prompt(text)
+
+    result = _route(text, prompt, priority=priority)
+    if result["success"] and cache is not None:
+        _store_result(cache, cache_key, text, result)
+    return result
+
+
+def _coalesced(result):
+    """Copy of a result shared from another caller's in-flight request"""
+    result = dict(result)
+    result["coalesced"] = True
+    return result
+
+
+def _with_offline_fallback(text, result):
+    """
+    Replaces a failed Gemini result with an offline classifier verdict,
+    keeping the original error so the UI can say why.
+    """
+    if result["success"] or not OFFLINE_FALLBACK:
+        return result
+    # Imported on first use so NumPy isn't loaded while Gemini is healthy
+    from utils.offline_classifier import analyze_offline
+    fallback = analyze_offline(text)
+    fallback["fallback_reason"] = result.get("error", "AI analysis failed")
+    return fallback
+
+
+def _call_tier(text, prompt, tier, priority):
+    """Runs the analysis prompt on one model tier"""
+    model_name = MODEL_TIERS[tier]
+    try:
+        # Call Gemini API
+        response_text = generate(prompt, model_name, priority)
+        result = _complete_analysis(text, response_text, model_name, priority)
+    except Exception as e:
+        result = {
             "success": False,
-            "error": "Failed to parse AI response",
-            "raw_response": response_text if 'response_text' in locals() else "No response"
+            "error": str(e)
         }
-    except Exception as e:
+    result["model"] = model_name
+    result["tier"] = tier + 1
+    return result
+
+
+def _route(text, prompt, first_tier=0, result=None, priority=PRIORITY_INTERACTIVE):
+    """
+    Sends the prompt to the fastest tier and escalates to stronger tiers
+    while the answer is uncertain or invalid (see utils.router).
+
+    Args:
+        result: An answer already obtained from first_tier, if any.
+    """
+    tier = first_tier
+    if result is None:
+        result = _call_tier(text, prompt, tier, priority)
+
+    while needs_escalation(result) and tier + 1 < len(MODEL_TIERS):
+        tier += 1
+        escalated = _call_tier(text, prompt, tier, priority)
+        # An uncertain answer beats a failed escalation
+        if escalated["success"] or not result["success"]:
+            result = escalated
+            if escalated["success"]:
+                result["escalated"] = True
+
+    return result
+
+
+def _complete_analysis(text, response_text, model_name, priority=PRIORITY_INTERACTIVE):
+    """
+    Turns a raw Gemini response into an analyze_text result.
+
+    Malformed JSON is repaired where possible. Fields that are still missing
+    are requested with a small follow-up prompt instead of re-running the
+    full analysis prompt.
+    """
+    with stage_timer("parse"):
+        analysis, missing = parse_analysis_response(response_text)
+    if missing:
+        inc("parse_missing_fields_total", len(missing), "Fields missing from Gemini responses after repair")
+    if analysis is None:
         return {
             "success": False,
-            "error": str(e)
+            "error": "Failed to parse AI response",
+            "raw_response": response_text or "No response"
         }
 
+    if missing:
+        followup_text = generate(build_followup_prompt(text, missing), model_name, priority)
+        analysis, missing = merge_followup(analysis, followup_text, missing)
+        if missing:
+            return {
+                "success": False,
+                "error": f"AI response was missing: {', '.join(missing)}",
+                "raw_response": response_text
+            }
+
+    return {
+        "success": True,
+        "data": _apply_url_findings(text, analysis),
+        "source": "gemini"
+    }
+
+
+def _apply_url_findings(text, analysis):
+    """
+    Raises the phishing and overall scores to the floor the local URL checks
+    justify; a message with such a finding is never reported as safe.
+    """
+    floor = phishing_floor(check_urls(text))
+    if not floor:
+        return analysis
+    category_scores = analysis.get("category_scores")
+    if isinstance(category_scores, dict) and category_scores.get("phishing", 0) < floor:
+        category_scores["phishing"] = floor
+    if analysis.get("overall_confidence_score", 0) < floor:
+        analysis["overall_confidence_score"] = floor
+    analysis["is_safe"] = False
+    return analysis
+
+
+def analyze_text_stream(text, use_cache=True, use_prescreen=True):
+    """
+    Streaming version of analyze_text.
+
+    Yields events as the Gemini response arrives:
+        {"type": "partial", "data": {...}} - the fields received so far. Arrays
+            such as red_flags grow one element at a time.
+        {"type": "result", "result": {...}} - the final result, same shape as
+            analyze_text. Always the last event.
+
+    Cache hits, local verdicts and requests coalesced onto an identical
+    in-flight analysis produce a single "result" event.
+    """
+    cache = get_analysis_cache() if use_cache else None
+    cache_key = _cache_key(text)
+
+    result = _fast_path(text, cache, cache_key, use_prescreen)
+    if result is None and len(text) > CHUNK_MAX_CHARS:
+        # Chunks are analyzed in parallel, so there is no single stream to follow
+        result = analyze_text(text, use_cache=use_cache, use_prescreen=use_prescreen)
+    if result is not None:
+        yield {"type": "result", "result": result}
+        return
+
+    call, is_leader = _singleflight.begin(cache_key)
+    if not is_leader:
+        result = _coalesced(call.wait())
+        yield {"type": "result", "result": _with_offline_fallback(text, result)}
+        return
+
+    # The streaming caller leads the flight; waiters get its final result.
+    # finish() also runs if the generator is abandoned mid-stream
+    result = {"success": False, "error": "Analysis was interrupted"}
+    try:
+        for event in _stream_uncached(text, cache, cache_key):
+            if event["type"] == "result":
+                result = event["result"]
+            else:
+                yield event
+    finally:
+        _singleflight.finish(cache_key, call, result=result)
+
+    yield {"type": "result", "result": _with_offline_fallback(text, result)}
+
+
+def _stream_uncached(text, cache, cache_key):
+    """The Gemini part of analyze_text_stream; the last event holds the raw result"""
+    prompt = build_prompt(text)
+    parser = IncrementalJSONParser()
+    partial = {}
+    response_text = ""
+
+    # Only the first tier is streamed; an escalation replaces it with the
+    # stronger model's complete answer
+    try:
+        for chunk in generate_stream(prompt, MODEL_NAME):
+            response_text += chunk
+            events = parser.feed(chunk)
+            for kind, key, value in events:
+                if kind == "item":
+                    partial.setdefault(key, []).append(value)
+                else:
+                    partial[key] = value
+            if events:
+                # Same coercion as the final answer, so a malformed value
+                # can't break the live rendering
+                yield {"type": "partial", "data": validate_partial_analysis(partial)}
+
+        result = _complete_analysis(text, response_text, MODEL_NAME)
+    except Exception as e:
+        result = {"success": False, "error": str(e)}
+    result["model"] = MODEL_NAME
+    result["tier"] = 1
+
+    result = _route(text, prompt, result=result)
+    if result["success"] and cache is not None:
+        _store_result(cache, cache_key, text, result)
+
+    yield {"type": "result", "result": result}
+
+
+def analyze_long_text(text, use_cache=True, use_prescreen=True, max_workers=CHUNK_WORKERS, merge_mode="max",
+                      priority=PRIORITY_INTERACTIVE):
+    """
+    Map-reduce analysis for documents too long for one prompt.
+
+    The text is split on paragraph/sentence boundaries with some overlap,
+    the chunks are analyzed concurrently, and the chunk analyses are merged
+    with utils.chunking.merge_analyses. Latency grows with the number of
+    rounds of parallel chunk calls rather than with document length.
+
+    Returns:
+        dict: Same shape as analyze_text, plus "chunks" (number of chunks),
+            "failed_chunks" (how many chunk analyses failed) and
+            "offline_chunks" (how many fell back to the offline classifier).
+            If every chunk fell back, source is "offline"; if any did, the
+            result carries their "fallback_reason".
+    """
+    chunks = split_into_chunks(text)
+    if not chunks:
+        return {"success": False, "error": "No text to analyze"}
+    chunk_results = _analyze_chunks(chunks, use_cache, use_prescreen, max_workers, priority)
+    return _merge_chunk_results(chunks, chunk_results, merge_mode)
+
+
+def _analyze_chunks(chunks, use_cache, use_prescreen, max_workers, priority):
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+        return list(executor.map(
+            lambda chunk: analyze_text(chunk, use_cache=use_cache, use_prescreen=use_prescreen, priority=priority),
+            chunks
+        ))
+
+
+def _merge_chunk_results(chunks, chunk_results, merge_mode="max"):
+    succeeded = [(chunk, r) for chunk, r in zip(chunks, chunk_results) if r["success"]]
+    if not succeeded:
+        return chunk_results[0]
+
+    merged = merge_analyses(
+        [r["data"] for _, r in succeeded],
+        weights=[len(chunk) for chunk, _ in succeeded],
+        mode=merge_mode
+    )
+    offline = [r for _, r in succeeded if r.get("source") == "offline"]
+    result = {
+        "success": True,
+        "data": merged,
+        "source": "offline" if len(offline) == len(succeeded) else "chunked",
+        "chunks": len(chunks),
+        "failed_chunks": len(chunks) - len(succeeded),
+        "offline_chunks": len(offline)
+    }
+    if offline:
+        result["fallback_reason"] = offline[0]["fallback_reason"]
+    return result
+
+
+def analyze_text_incremental(text, previous=None, use_cache=True, use_prescreen=True,
+                             max_workers=CHUNK_WORKERS, priority=PRIORITY_INTERACTIVE):
+    """
+    Re-analyzes an edited text, sending Gemini only the parts that changed.
+
+    The text is split into sentence-aligned segments and diffed (difflib)
+    against the segments of the previous call. Unchanged segments reuse
+    their findings; changed ones are analyzed concurrently, each with the
+    sentence before and after it as context. Segment findings are merged
+    like analyze_long_text's chunks.
+
+    The first analysis of a document (previous shares no segments with it)
+    is done with analyze_long_text's larger chunks, which takes several
+    times fewer calls; each segment's findings are then taken from the
+    chunks that contain its sentences, ready for the next edit.
+
+    Args:
+        previous: The state returned by the previous call for this user, or None.
+
+    Returns:
+        tuple: (result, state). result has the analyze_text shape plus
+            "segments", "reanalyzed" (segments sent for analysis),
+            "failed_segments" and "offline_segments" (answered by the offline
+            classifier, with their "fallback_reason"). The first analysis of
+            a document returns analyze_long_text's result instead. Pass
+            state back as previous on the next call.
+    """
+    segments = split_into_segments(text)
+    keys = [_cache_key(segment) for segment in segments]
+    previous = previous or {"keys": [], "findings": {}}
+    if not segments:
+        return {"success": False, "error": "No text to analyze"}, previous
+    if not any(key in previous["findings"] for key in keys):
+        return _first_incremental_analysis(text, segments, keys, use_cache, use_prescreen, max_workers, priority)
+
+    findings = {}
+    changed = []
+    matcher = difflib.SequenceMatcher(None, previous["keys"], keys, autojunk=False)
+    for tag, _, _, start, end in matcher.get_opcodes():
+        for index in range(start, end):
+            key = keys[index]
+            data = previous["findings"].get(key) if tag == "equal" else None
+            if data is None:
+                data = _segment_findings.get(key)
+            if data is None:
+                changed.append(index)
+            else:
+                findings[key] = data
+
+    def analyze_segment(index):
+        before = split_sentences(segments[index - 1])[-1] if index > 0 else ""
+        after = split_sentences(segments[index + 1])[0] if index + 1 < len(segments) else ""
+        context_text = "\n".join(part for part in (before, segments[index], after) if part)
+        return analyze_text(context_text, use_cache=use_cache, use_prescreen=use_prescreen, priority=priority)
+
+    failed = 0
+    first_failure = None
+    first_offline = None
+    offline_keys = set()
+    if changed:
+        with ThreadPoolExecutor(max_workers=max(1, max_workers)) as executor:
+            segment_results = list(executor.map(analyze_segment, changed))
+        for index, result in zip(changed, segment_results):
+            if not result["success"]:
+                failed += 1
+                first_failure = first_failure or result
+                continue
+            data = _segment_only_findings(result["data"], segments[index])
+            findings[keys[index]] = data
+            # Offline estimates are used for this answer but not kept
+            if result.get("source") == "offline":
+                offline_keys.add(keys[index])
+                first_offline = first_offline or result
+            else:
+                _segment_findings.set(keys[index], data)
+    inc("incremental_segments_total", len(segments) - len(changed), "Incremental analysis segments by outcome",
+        outcome="reused")
+    inc("incremental_segments_total", len(changed), outcome="reanalyzed")
+
+    present = [(segment, findings[key]) for segment, key in zip(segments, keys) if key in findings]
+    # Offline segments are left out of the state so the next call retries them
+    state = {
+        "keys": keys,
+        "findings": {key: findings[key] for key in keys if key in findings and key not in offline_keys}
+    }
+    if not present:
+        return first_failure, state
+
+    result = {
+        "success": True,
+        "data": merge_analyses([data for _, data in present], weights=[len(segment) for segment, _ in present]),
+        "source": "incremental",
+        "segments": len(segments),
+        "reanalyzed": len(changed),
+        "failed_segments": failed,
+        "offline_segments": len(offline_keys)
+    }
+    if first_offline is not None:
+        result["fallback_reason"] = first_offline["fallback_reason"]
+    return result, state
+
+
+def _first_incremental_analysis(text, segments, keys, use_cache, use_prescreen, max_workers, priority):
+    """analyze_long_text, plus per-segment findings derived from its chunks"""
+    chunks = split_into_chunks(text)
+    chunk_results = _analyze_chunks(chunks, use_cache, use_prescreen, max_workers, priority)
+    result = _merge_chunk_results(chunks, chunk_results)
+
+    # Offline chunks are left out so the next edit asks Gemini about them
+    answered = [
+        ({sentence_key(sentence) for sentence in split_sentences(chunk)}, chunk_result["data"])
+        for chunk, chunk_result in zip(chunks, chunk_results)
+        if chunk_result["success"] and chunk_result.get("source") != "offline"
+    ]
+    findings = {}
+    for segment, key in zip(segments, keys):
+        sentence_keys = {sentence_key(sentence) for sentence in split_sentences(segment)}
+        covering = [data for chunk_keys, data in answered if chunk_keys & sentence_keys]
+        if covering:
+            findings[key] = _segment_only_findings(merge_analyses(covering), segment)
+    return result, {"keys": keys, "findings": findings}
+
+
+def _segment_only_findings(data, segment):
+    """data with the suspicious phrases that only occur in the context sentences removed"""
+    folded_segment = fold_case(" ".join(segment.split()))
+    data = dict(data)
+    data["suspicious_phrases"] = [
+        phrase_data for phrase_data in data.get("suspicious_phrases", [])
+        if fold_case(" ".join(phrase_data.get("phrase", "").split())) in folded_segment
+    ]
+    return data
+
+
+def analyze_packed(texts, use_cache=True, use_prescreen=True, priority=PRIORITY_INTERACTIVE):
+    """
+    Analyzes several short messages with a single Gemini call.
+
+    Returns one result per input, in input order, with the same shape as
+    analyze_text. Messages with an answer from _fast_path (blocklist, cache,
+    precomputed, near-duplicate, prescreen) are not sent. If the packed
+    response can't be matched back to its messages, the affected messages
+    are analyzed one at a time instead.
+    """
+    texts = list(texts)
+    cache = get_analysis_cache() if use_cache else None
+    results = [None] * len(texts)
+    pending = []
+
+    for idx, text in enumerate(texts):
+        results[idx] = _fast_path(text, cache, _cache_key(text), use_prescreen)
+        if results[idx] is None:
+            pending.append(idx)
+
+    if len(pending) == 1:
+        results[pending[0]] = analyze_text(texts[pending[0]], use_cache=use_cache, use_prescreen=False, priority=priority)
+    elif pending:
+        try:
+            response_text = strip_code_fences(generate(build_packed_prompt([texts[i] for i in pending]), priority=priority))
+            analyses = json.loads(response_text)
+        except Exception:
+            analyses = None
+
+        if isinstance(analyses, list) and len(analyses) == len(pending):
+            for idx, raw_analysis in zip(pending, analyses):
+                analysis, missing = validate_analysis(raw_analysis)
+                if missing:
+                    results[idx] = analyze_text(texts[idx], use_cache=use_cache, use_prescreen=False, priority=priority)
+                    continue
+                analysis = _apply_url_findings(texts[idx], analysis)
+                result = {"success": True, "data": analysis, "source": "gemini", "model": MODEL_NAME, "tier": 1}
+                if needs_escalation(result):
+                    result = _route(texts[idx], build_prompt(texts[idx]), result=result, priority=priority)
+                if cache is not None and result["success"]:
+                    _store_result(cache, _cache_key(texts[idx]), texts[idx], result)
+                results[idx] = result
+        else:
+            for idx in pending:
+                results[idx] = analyze_text(texts[idx], use_cache=use_cache, use_prescreen=False, priority=priority)
+
+    return results
+
+
+def get_cache_stats():
+    """Returns hit/miss counters for the analysis result cache"""
+    return get_analysis_cache().stats()
+
+
+def get_scheduler_stats():
+    """Returns call/retry counters, queue length and circuit state of the Gemini scheduler"""
+    return get_scheduler().stats()
+
+
+def get_singleflight_stats():
+    """Returns how many analyses ran and how many identical requests were coalesced onto them"""
+    return _singleflight.stats()
+
 
 def get_severity_color(severity):
     """Returns color for severity levels"""
@@ -165,59 +911,3 @@ def get_category_icon(category):
         "urgency_tactics": "⚠️"
     }
     return icons.get(category, "❓")
-
-
-def create_annotated_text_html(original_text, suspicious_phrases):
-    """
-    Creates HTML-annotated version of text with highlighted suspicious parts.
-    Returns HTML string with proper escaping.
-    """
-    if not suspicious_phrases:
-        return f"""
-        <div style='background-color: #1e1e1e; padding: 20px; border-radius: 10px; border: 2px solid #444; font-size: 16px; line-height: 1.8;'>
-            {original_text}
-        </div>
-        """
-    
-    import html
-    
-    # Escape the entire text first
-    escaped_text = html.escape(original_text)
-    
-    # Track replacements to make
-    replacements = []
-    
-    # Find all phrase positions in ORIGINAL text (not escaped)
-    for phrase_data in suspicious_phrases:
-        phrase = phrase_data["phrase"]
-        reason = html.escape(phrase_data["reason"])
-        
-        # Find phrase in original text (case-insensitive)
-        start_pos = original_text.lower().find(phrase.lower())
-        if start_pos != -1:
-            end_pos = start_pos + len(phrase)
-            original_phrase_text = original_text[start_pos:end_pos]
-            
-            replacements.append({
-                "original": original_phrase_text,
-                "escaped": html.escape(original_phrase_text),
-                "reason": reason
-            })
-    
-    # Now replace in the escaped text
-    highlighted_text = escaped_text
-    for replacement in replacements:
-        # Create the highlighted span
-        highlighted_span = f"""<span style='background-color: #ff4444; color: white; padding: 2px 6px; border-radius: 4px; font-weight: bold; cursor: help;' title='{replacement["reason"]}'>{replacement["escaped"]}</span>"""
-        
-        # Replace first occurrence
-        highlighted_text = highlighted_text.replace(replacement["escaped"], highlighted_span, 1)
-    
-    # Wrap in container
-    html_content = f"""
-    <div style='background-color: #1e1e1e; padding: 20px; border-radius: 10px; border: 2px solid #444; font-size: 16px; line-height: 1.8; color: #ffffff;'>
-        {highlighted_text}
-    </div>
-    """
-    
-    return html_content 
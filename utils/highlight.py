@@ -0,0 +1,89 @@
+import html
+
+from utils.matcher import PhraseMatcher, fold_case
+
+CONTAINER_STYLE = (
+    "background-color: #1e1e1e; padding: 20px; border-radius: 10px; border: 2px solid #444; "
+    "font-size: 16px; line-height: 1.8; color: #ffffff;"
+)
+HIGHLIGHT_STYLE = (
+    "background-color: #ff4444; color: white; padding: 2px 6px; border-radius: 4px; "
+    "font-weight: bold; cursor: help;"
+)
+
+
+def find_phrase_spans(text, suspicious_phrases):
+    """
+    Locates every occurrence of every suspicious phrase in text (case-insensitive)
+    and merges overlapping occurrences into single spans.
+
+    Returns:
+        list: (start, end, reasons) tuples sorted by start, non-overlapping.
+            reasons lists the reason of every phrase that fell inside the span.
+    """
+    # The same phrase can be reported more than once; keep one pattern per
+    # phrase and collect all of its reasons
+    patterns = []
+    reasons_by_pattern = []
+    index_by_phrase = {}
+    for phrase_data in suspicious_phrases:
+        phrase = phrase_data.get("phrase") or ""
+        if not phrase.strip():
+            continue
+        key = fold_case(phrase)
+        if key not in index_by_phrase:
+            index_by_phrase[key] = len(patterns)
+            patterns.append(phrase)
+            reasons_by_pattern.append([])
+        reason = phrase_data.get("reason") or ""
+        if reason and reason not in reasons_by_pattern[index_by_phrase[key]]:
+            reasons_by_pattern[index_by_phrase[key]].append(reason)
+
+    if not patterns:
+        return []
+
+    occurrences = sorted(PhraseMatcher(patterns).find_all(text))
+
+    spans = []
+    for start, end, index in occurrences:
+        if spans and start < spans[-1][1]:
+            last = spans[-1]
+            last[1] = max(last[1], end)
+            last[2].add(index)
+        else:
+            spans.append([start, end, {index}])
+
+    return [
+        (start, end, [reason for index in sorted(indexes) for reason in reasons_by_pattern[index]])
+        for start, end, indexes in spans
+    ]
+
+
+def create_annotated_text_html(original_text, suspicious_phrases):
+    """
+    Creates HTML-annotated version of text with highlighted suspicious parts.
+    Returns HTML string with proper escaping.
+
+    Every occurrence of every phrase is highlighted. Overlapping phrases are
+    merged into one highlight whose tooltip lists all of their reasons.
+    The output is built in a single left-to-right pass over the text.
+    """
+    spans = find_phrase_spans(original_text, suspicious_phrases or [])
+
+    parts = []
+    pos = 0
+    for start, end, reasons in spans:
+        parts.append(html.escape(original_text[pos:start]))
+        parts.append(
+            f"<span style='{HIGHLIGHT_STYLE}' title='{html.escape(' | '.join(reasons))}'>"
+            f"{html.escape(original_text[start:end])}</span>"
+        )
+        pos = end
+    parts.append(html.escape(original_text[pos:]))
+
+    # Wrap in container
+    return f"""
+    <div style='{CONTAINER_STYLE}'>
+        {"".join(parts)}
+    </div>
+    """
@@ -0,0 +1,126 @@
+import re
+
+
+def fold_case(text):
+    """
+    Lowercases text while keeping every character at the same index.
+    str.lower() can change the length of a string (e.g. 'İ' becomes two
+    characters), which would shift match offsets away from the original text.
+    """
+    folded = text.lower()
+    if len(folded) == len(text):
+        return folded
+    return "".join(ch if len(ch.lower()) != 1 else ch.lower() for ch in text)
+
+
+class PhraseMatcher:
+    """
+    Case-insensitive multi-phrase matcher (Aho-Corasick automaton).
+
+    The automaton is compiled once from the phrase list; each search is then
+    a single pass over the text no matter how many phrases there are.
+    Overlapping and repeated occurrences are all reported.
+    """
+
+    def __init__(self, phrases):
+        self.phrases = list(phrases)
+        self._lengths = []
+
+        # Trie: one dict of {char: next_state} per state
+        self._goto = [{}]
+        self._out = [[]]
+
+        for index, phrase in enumerate(self.phrases):
+            folded = fold_case(phrase)
+            self._lengths.append(len(folded))
+            if not folded:
+                continue
+            state = 0
+            for ch in folded:
+                nxt = self._goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self._goto)
+                    self._goto[state][ch] = nxt
+                    self._goto.append({})
+                    self._out.append([])
+                state = nxt
+            self._out[state].append(index)
+
+        # Breadth-first pass to build failure links and merge outputs
+        self._fail = [0] * len(self._goto)
+        queue = list(self._goto[0].values())
+        head = 0
+        while head < len(queue):
+            state = queue[head]
+            head += 1
+            for ch, nxt in self._goto[state].items():
+                queue.append(nxt)
+                fallback = self._fail[state]
+                while fallback and ch not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                candidate = self._goto[fallback].get(ch, 0)
+                self._fail[nxt] = candidate if candidate != nxt else 0
+                self._out[nxt] = self._out[nxt] + self._out[self._fail[nxt]]
+
+        # Lets the scan jump straight to the next character that can start a
+        # match instead of stepping through unrelated text one char at a time
+        first_chars = "".join(sorted(self._goto[0]))
+        self._start_re = re.compile("[" + re.escape(first_chars) + "]") if first_chars else None
+
+    def __len__(self):
+        return len(self.phrases)
+
+    def find_all(self, text, whole_words=False):
+        """
+        Finds every occurrence of every phrase in text.
+
+        Args:
+            text: The text to search.
+            whole_words: Only report matches that don't start or end in the
+                middle of a word (so "win" doesn't match inside "window").
+
+        Returns:
+            list: (start, end, phrase_index) tuples ordered by end position.
+        """
+        matches = []
+        if self._start_re is None or not text:
+            return matches
+
+        folded = fold_case(text)
+        goto, fail, out, lengths = self._goto, self._fail, self._out, self._lengths
+        start_re = self._start_re
+        n = len(folded)
+        state = 0
+        i = 0
+
+        while i < n:
+            if state == 0:
+                found = start_re.search(folded, i)
+                if found is None:
+                    break
+                i = found.start()
+
+            ch = folded[i]
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+
+            if out[state]:
+                end = i + 1
+                for index in out[state]:
+                    start = end - lengths[index]
+                    if whole_words and not _on_word_boundary(folded, start, end):
+                        continue
+                    matches.append((start, end, index))
+            i += 1
+
+        return matches
+
+
+def _on_word_boundary(text, start, end):
+    """True if text[start:end] isn't glued to letters or digits on either side"""
+    if start > 0 and text[start - 1].isalnum() and text[start].isalnum():
+        return False
+    if end < len(text) and text[end].isalnum() and text[end - 1].isalnum():
+        return False
+    return True
@@ -0,0 +1,294 @@
+"""
+Per-stage latency and throughput metrics.
+
+Each pipeline stage (file extraction, prompt building, the Gemini call, JSON
+parsing, rendering) is timed with stage_timer(). Durations and sizes are kept
+as summaries with p50/p95/p99 over a window of recent samples; errors are
+counted by stage and exception class.
+
+Every timed stage is also logged as one JSON line on the "metrics" logger,
+and render_prometheus() produces the Prometheus text exposition format, served
+by start_metrics_server() at http://127.0.0.1:<METRICS_PORT>/metrics.
+
+Configuration (environment):
+    METRICS_PORT     port for the /metrics endpoint (unset: no server)
+    METRICS_LOG      "1" to print the JSON log lines to stderr
+    METRICS_WINDOW   samples kept per series for quantiles (default 2048)
+"""
+import json
+import logging
+import os
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = os.getenv("METRICS_PORT", "")
+METRICS_LOG = os.getenv("METRICS_LOG", "0") == "1"
+METRICS_WINDOW = int(os.getenv("METRICS_WINDOW", "2048"))
+METRIC_PREFIX = "dla_"
+QUANTILES = (0.5, 0.95, 0.99)
+
+logger = logging.getLogger("metrics")
+if METRICS_LOG and not logger.handlers:
+    _handler = logging.StreamHandler()
+    _handler.setFormatter(logging.Formatter("%(message)s"))
+    logger.addHandler(_handler)
+    logger.setLevel(logging.INFO)
+
+
+def quantile(sorted_values, q):
+    """Linear-interpolated quantile of an already sorted list"""
+    if not sorted_values:
+        return 0.0
+    position = q * (len(sorted_values) - 1)
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    fraction = position - lower
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * fraction
+
+
+class Summary:
+    """Count and sum over all time, quantiles over the most recent samples"""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.count = 0
+        self.total = 0.0
+        self.samples = deque(maxlen=window)
+
+    def observe(self, value):
+        self.count += 1
+        self.total += value
+        self.samples.append(value)
+
+    def snapshot(self):
+        values = sorted(self.samples)
+        return {
+            "count": self.count,
+            "sum": self.total,
+            "quantiles": {q: quantile(values, q) for q in QUANTILES}
+        }
+
+
+class MetricsRegistry:
+    """Thread-safe store of counters and summaries, keyed by name and labels"""
+
+    def __init__(self, window=METRICS_WINDOW):
+        self.window = window
+        self._counters = {}
+        self._summaries = {}
+        self._help = {}
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(name, labels):
+        return name, tuple(sorted((key, str(value)) for key, value in labels.items()))
+
+    def inc(self, name, amount=1, help_text="", **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+            self._help.setdefault(name, help_text)
+
+    def observe(self, name, value, help_text="", **labels):
+        key = self._key(name, labels)
+        with self._lock:
+            summary = self._summaries.get(key)
+            if summary is None:
+                summary = self._summaries[key] = Summary(self.window)
+            summary.observe(value)
+            self._help.setdefault(name, help_text)
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: {"counters": {(name, labels): value},
+                   "summaries": {(name, labels): {"count", "sum", "quantiles"}}}
+        """
+        with self._lock:
+            return {
+                "counters": dict(self._counters),
+                "summaries": {key: summary.snapshot() for key, summary in self._summaries.items()}
+            }
+
+    def stage_stats(self):
+        """Per-stage count and p50/p95/p99 in milliseconds, for quick inspection"""
+        stats = {}
+        for (name, labels), summary in self.snapshot()["summaries"].items():
+            if name != "stage_seconds":
+                continue
+            stage = dict(labels)["stage"]
+            entry = stats.setdefault(stage, {"count": 0})
+            entry["count"] += summary["count"]
+            for q, value in summary["quantiles"].items():
+                label = f"p{int(q * 100)}_ms"
+                entry[label] = max(entry.get(label, 0.0), round(value * 1000, 2))
+        return stats
+
+    def clear(self):
+        with self._lock:
+            self._counters.clear()
+            self._summaries.clear()
+
+    def render_prometheus(self):
+        """Formats every metric in the Prometheus text exposition format"""
+        snapshot = self.snapshot()
+        lines = []
+
+        def header(name, kind):
+            help_text = self._help.get(name) or name.replace("_", " ")
+            lines.append(f"# HELP {METRIC_PREFIX}{name} {help_text}")
+            lines.append(f"# TYPE {METRIC_PREFIX}{name} {kind}")
+
+        seen = set()
+        for (name, labels), value in sorted(snapshot["counters"].items()):
+            if name not in seen:
+                header(name, "counter")
+                seen.add(name)
+            lines.append(f"{METRIC_PREFIX}{name}{_format_labels(labels)} {value}")
+
+        seen = set()
+        for (name, labels), summary in sorted(snapshot["summaries"].items()):
+            if name not in seen:
+                header(name, "summary")
+                seen.add(name)
+            for q, value in summary["quantiles"].items():
+                quantile_labels = labels + (("quantile", str(q)),)
+                lines.append(f"{METRIC_PREFIX}{name}{_format_labels(quantile_labels)} {value:.6g}")
+            lines.append(f"{METRIC_PREFIX}{name}_sum{_format_labels(labels)} {summary['sum']:.6g}")
+            lines.append(f"{METRIC_PREFIX}{name}_count{_format_labels(labels)} {summary['count']}")
+
+        return "\n".join(lines) + "\n"
+
+
+def _format_labels(labels):
+    if not labels:
+        return ""
+    pairs = []
+    for key, value in labels:
+        value = value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{key}="{value}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+registry = MetricsRegistry()
+
+
+def inc(name, amount=1, help_text="", **labels):
+    """Adds to a counter in the process-wide registry"""
+    registry.inc(name, amount, help_text, **labels)
+
+
+def observe(name, value, help_text="", **labels):
+    """Records a sample (a size, a duration) in the process-wide registry"""
+    registry.observe(name, value, help_text, **labels)
+
+
+class StageTimer:
+    """
+    Times one run of a pipeline stage. Use as a context manager, or call
+    start_timer() and stop() where a with-block doesn't fit.
+
+    An exception raised inside the with-block is counted under its class name
+    in stage_errors_total and re-raised.
+    """
+
+    def __init__(self, stage, **labels):
+        self.stage = stage
+        self.labels = labels
+        self.started = None
+        self.seconds = None
+
+    def start(self):
+        self.started = time.perf_counter()
+        return self
+
+    def stop(self, error=None):
+        if self.seconds is not None:
+            return self.seconds
+        self.seconds = time.perf_counter() - self.started
+        observe("stage_seconds", self.seconds, "Duration of each pipeline stage in seconds",
+                stage=self.stage, **self.labels)
+        record = {"event": "stage", "stage": self.stage, "ms": round(self.seconds * 1000, 3)}
+        record.update(self.labels)
+        if error is not None:
+            error_class = type(error).__name__
+            inc("stage_errors_total", 1, "Pipeline stage failures by exception class",
+                stage=self.stage, error=error_class)
+            record["error"] = error_class
+        logger.info(json.dumps(record, default=str))
+        return self.seconds
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop(exc)
+        return False
+
+
+def stage_timer(stage, **labels):
+    """Context manager that times a pipeline stage"""
+    return StageTimer(stage, **labels)
+
+
+def start_timer(stage, **labels):
+    """Starts timing a stage; call .stop() on the returned timer when it ends"""
+    return StageTimer(stage, **labels).start()
+
+
+def render_prometheus():
+    return registry.render_prometheus()
+
+
+def get_stage_stats():
+    return registry.stage_stats()
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = render_prometheus().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        # Scrapes every few seconds would flood the console
+        pass
+
+
+_server = None
+_server_failed = False
+_server_lock = threading.Lock()
+
+
+def start_metrics_server(port=None, host="127.0.0.1"):
+    """
+    Serves /metrics on a background thread. Safe to call on every Streamlit
+    rerun: only the first call starts a server. If the port can't be bound
+    (say another process already uses it), that is logged once and metrics
+    are only collected in-process.
+
+    Returns:
+        The server, or None if no port is configured or binding failed.
+    """
+    global _server, _server_failed
+    port = port or METRICS_PORT
+    if not port:
+        return None
+    with _server_lock:
+        if _server is None and not _server_failed:
+            try:
+                _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            except OSError as e:
+                _server_failed = True
+                logger.warning(f"Metrics server not started on {host}:{port}: {e}")
+                return None
+            _server.daemon_threads = True
+            threading.Thread(target=_server.serve_forever, name="metrics-server", daemon=True).start()
+    return _server
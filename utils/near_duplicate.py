@@ -0,0 +1,226 @@
+"""
+Near-duplicate lookup for scam-campaign variants.
+
+A campaign sends one template with different names, amounts and links, so
+the exact-text cache misses every copy. This index keeps MinHash signatures
+of confidently analyzed messages in banded LSH tables; a new message that
+shares most of its word 3-grams with one of them (after numbers, amounts,
+links and emails are replaced by placeholders) reuses that analysis. The
+words that differ are re-checked with the local rules in utils.scoring
+before the stored verdict is trusted.
+
+Queries touch NEAR_DUPLICATE_BANDS buckets and compare a handful of
+signatures, so their cost doesn't depend on how many messages are indexed.
+
+Configuration (environment):
+    NEAR_DUPLICATE_THRESHOLD     estimated Jaccard similarity needed for a match (default 0.8)
+    NEAR_DUPLICATE_MAX_ENTRIES   messages kept, oldest dropped first (default 100000)
+"""
+import difflib
+import os
+import re
+import threading
+import zlib
+from collections import OrderedDict
+
+from utils.matcher import fold_case
+from utils.scoring import MONEY_RE, URL_RE, score_text
+
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("NEAR_DUPLICATE_THRESHOLD", "0.8"))
+NEAR_DUPLICATE_MAX_ENTRIES = int(os.getenv("NEAR_DUPLICATE_MAX_ENTRIES", "100000"))
+
+# 16 bands of 4 rows: a message at similarity 0.8 shares at least one band
+# with its template with probability > 0.999, one at 0.4 with about 0.34
+NEAR_DUPLICATE_BANDS = 16
+NEAR_DUPLICATE_ROWS = 4
+NUM_PERMUTATIONS = NEAR_DUPLICATE_BANDS * NEAR_DUPLICATE_ROWS
+
+# Messages with fewer shingles than this are too short to compare reliably
+MIN_SHINGLES = 6
+SHINGLE_WORDS = 3
+
+_MERSENNE_PRIME = (1 << 61) - 1
+EMAIL_RE = re.compile(r"\b[\w.+-]+@[\w-]+(?:\.[\w-]+)+\b")
+NUMBER_RE = re.compile(r"\d+(?:[.,]\d+)*")
+TOKEN_RE = re.compile(r"<\w+>|\w+(?:'\w+)?")
+
+_permutations = None
+
+
+def template_tokens(text):
+    """
+    Words of text with the parts a campaign varies per recipient replaced
+    by placeholders: links, email addresses, amounts of money and numbers.
+    """
+    text = EMAIL_RE.sub(" <email> ", text)
+    text = URL_RE.sub(" <url> ", text)
+    text = MONEY_RE.sub(" <money> ", text)
+    text = NUMBER_RE.sub(" <num> ", text)
+    return TOKEN_RE.findall(fold_case(text))
+
+
+def _shingles(tokens):
+    grams = {
+        " ".join(tokens[i:i + SHINGLE_WORDS])
+        for i in range(max(1, len(tokens) - SHINGLE_WORDS + 1))
+    }
+    return [zlib.crc32(gram.encode("utf-8")) for gram in grams]
+
+
+def _get_permutations():
+    global _permutations
+    if _permutations is None:
+        import numpy as np
+        rng = np.random.default_rng(1)
+        # Multipliers must span the whole field: with small ones, a * x mod p
+        # barely wraps and the hash keeps the order of x, biasing the estimate
+        _permutations = (
+            rng.integers(1, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64),
+            rng.integers(0, _MERSENNE_PRIME, NUM_PERMUTATIONS, dtype=np.uint64),
+        )
+    return _permutations
+
+
+def minhash_signature(text):
+    """
+    MinHash signature of text's template shingles.
+
+    Returns:
+        numpy.ndarray: NUM_PERMUTATIONS uint32 values, or None if text is too short.
+    """
+    # Imported here so NumPy isn't loaded at startup
+    import numpy as np
+
+    shingles = _shingles(template_tokens(text))
+    if len(shingles) < MIN_SHINGLES:
+        return None
+    a, b = _get_permutations()
+    values = np.array(shingles, dtype=np.uint64)[:, None]
+    # Unsigned overflow just wraps, which is fine for hashing
+    hashed = (values * a + b) % np.uint64(_MERSENNE_PRIME)
+    return (hashed.min(axis=0) & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+
+
+def _band_keys(signature):
+    rows = NEAR_DUPLICATE_ROWS
+    return [hash(signature[band * rows:(band + 1) * rows].tobytes()) for band in range(NEAR_DUPLICATE_BANDS)]
+
+
+class NearDuplicateIndex:
+    """MinHash-LSH index of analyzed messages; thread-safe"""
+
+    def __init__(self, threshold=NEAR_DUPLICATE_THRESHOLD, max_entries=NEAR_DUPLICATE_MAX_ENTRIES):
+        self.threshold = threshold
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._bands = [{} for _ in range(NEAR_DUPLICATE_BANDS)]
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def add(self, text, data, signature=None):
+        """Indexes text with its analysis data. Returns False if text is too short to index."""
+        signature = minhash_signature(text) if signature is None else signature
+        if signature is None:
+            return False
+        keys = _band_keys(signature)
+        with self._lock:
+            entry_id = self._next_id
+            self._next_id += 1
+            self._entries[entry_id] = (signature, keys, text, data)
+            for band, key in zip(self._bands, keys):
+                band.setdefault(key, []).append(entry_id)
+            while len(self._entries) > self.max_entries:
+                self._evict_oldest()
+        return True
+
+    def _evict_oldest(self):
+        entry_id, (_, keys, _, _) = self._entries.popitem(last=False)
+        for band, key in zip(self._bands, keys):
+            bucket = band.get(key)
+            if bucket is not None:
+                bucket.remove(entry_id)
+                if not bucket:
+                    del band[key]
+
+    def query(self, text, signature=None):
+        """
+        Finds the most similar indexed message.
+
+        Returns:
+            tuple: (similarity, stored text, stored data) for the best match at
+                or above the threshold, or None.
+        """
+        signature = minhash_signature(text) if signature is None else signature
+        if signature is None:
+            return None
+        with self._lock:
+            candidates = set()
+            for band, key in zip(self._bands, _band_keys(signature)):
+                candidates.update(band.get(key, ()))
+            best = None
+            for entry_id in candidates:
+                stored_signature, _, stored_text, data = self._entries[entry_id]
+                similarity = float((stored_signature == signature).mean())
+                if similarity >= self.threshold and (best is None or similarity > best[0]):
+                    best = (similarity, stored_text, data)
+        return best
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bands = [{} for _ in range(NEAR_DUPLICATE_BANDS)]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+def differing_spans(stored_text, text):
+    """The runs of words in text that are not in stored_text, in order"""
+    old_words = stored_text.split()
+    new_words = text.split()
+    matcher = difflib.SequenceMatcher(None, old_words, new_words, autojunk=False)
+    return [
+        " ".join(new_words[start:end])
+        for tag, _, _, start, end in matcher.get_opcodes()
+        if tag in ("replace", "insert")
+    ]
+
+
+def adapt_analysis(stored_text, stored_data, text):
+    """
+    Re-checks the words that differ between text and the stored message and
+    adapts the stored analysis to text.
+
+    Returns:
+        dict: The adapted analysis, or None if the differences carry risk
+            signals the stored verdict didn't account for (a "safe" verdict
+            whose new words contain links or known scam phrases).
+    """
+    spans = differing_spans(stored_text, text)
+    scores = score_text("\n".join(spans)) if spans else None
+    if scores is not None and stored_data.get("is_safe") and (scores["matches"] or scores["urls"]):
+        return None
+
+    folded_text = fold_case(" ".join(text.split()))
+    phrases = [
+        phrase_data for phrase_data in stored_data.get("suspicious_phrases", [])
+        if fold_case(" ".join(phrase_data.get("phrase", "").split())) in folded_text
+    ]
+    known = {fold_case(phrase_data["phrase"]) for phrase_data in phrases}
+    if scores is not None:
+        for match in scores["matches"]:
+            if match["weight"] >= 0.4 and fold_case(match["phrase"]) not in known:
+                known.add(fold_case(match["phrase"]))
+                phrases.append({"phrase": match["phrase"], "reason": match["reason"]})
+
+    data = dict(stored_data)
+    data["suspicious_phrases"] = phrases
+    return data
+
+
+_index = NearDuplicateIndex()
+
+
+def get_near_duplicate_index():
+    """The process-wide index, shared by every session"""
+    return _index
@@ -0,0 +1,198 @@
+"""
+OCR subsystem for image uploads.
+
+- Finds the Tesseract binary on Windows, macOS and Linux (or TESSERACT_CMD).
+- Preprocesses images before OCR: fix rotation, grayscale, downscale
+  oversized screenshots, binarize with Otsu's threshold.
+- Runs OCR on a bounded pool of workers shared by every session.
+- Caches OCR output by a hash of the image bytes.
+"""
+import hashlib
+import io
+import os
+import shutil
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+import pytesseract
+from PIL import Image, ImageOps
+
+from utils.cache import LRUCache
+
+TESSERACT_CANDIDATES = [
+    r"C:\Program Files\Tesseract-OCR\tesseract.exe",
+    r"C:\Program Files (x86)\Tesseract-OCR\tesseract.exe",
+    "/usr/bin/tesseract",
+    "/usr/local/bin/tesseract",
+    "/opt/homebrew/bin/tesseract",
+]
+
+# Tesseract runs as a subprocess, so threads are enough to keep several busy
+OCR_WORKERS = int(os.getenv("OCR_WORKERS", str(min(4, os.cpu_count() or 1))))
+
+# Phone screenshots are often 3000+ px tall; text stays readable well below that
+OCR_MAX_SIDE = int(os.getenv("OCR_MAX_SIDE", "2000"))
+OCR_LANG = os.getenv("OCR_LANG", "eng")
+OCR_CONFIG = os.getenv("OCR_CONFIG", "--psm 3")
+OCR_CACHE_ENTRIES = int(os.getenv("OCR_CACHE_ENTRIES", "256"))
+
+_configure_lock = threading.Lock()
+_configured_cmd = None
+
+
+def find_tesseract():
+    """
+    Returns the path to the Tesseract binary, or None if it can't be found.
+    Checks TESSERACT_CMD, then PATH, then the usual install locations.
+    """
+    candidates = [os.getenv("TESSERACT_CMD"), shutil.which("tesseract")] + TESSERACT_CANDIDATES
+    for candidate in candidates:
+        if candidate and os.path.isfile(candidate):
+            return candidate
+    return None
+
+
+def configure_tesseract():
+    """Points pytesseract at the Tesseract binary; raises if none is installed"""
+    global _configured_cmd
+    if _configured_cmd is not None:
+        return _configured_cmd
+    with _configure_lock:
+        if _configured_cmd is None:
+            cmd = find_tesseract()
+            if cmd is None:
+                raise Exception(
+                    "Tesseract OCR is not installed. Install it (e.g. 'apt install tesseract-ocr') "
+                    "or set TESSERACT_CMD to the tesseract executable."
+                )
+            pytesseract.pytesseract.tesseract_cmd = cmd
+            _configured_cmd = cmd
+    return _configured_cmd
+
+
+def _otsu_threshold(histogram):
+    """Picks the grayscale threshold that best separates text from background"""
+    total = sum(histogram)
+    sum_all = sum(level * count for level, count in enumerate(histogram))
+    sum_background = 0
+    weight_background = 0
+    best_threshold = 127
+    best_variance = 0.0
+
+    for level, count in enumerate(histogram):
+        weight_background += count
+        if weight_background == 0:
+            continue
+        weight_foreground = total - weight_background
+        if weight_foreground == 0:
+            break
+        sum_background += level * count
+        mean_background = sum_background / weight_background
+        mean_foreground = (sum_all - sum_background) / weight_foreground
+        variance = weight_background * weight_foreground * (mean_background - mean_foreground) ** 2
+        if variance > best_variance:
+            best_variance = variance
+            best_threshold = level
+
+    return best_threshold
+
+
+def preprocess_image(image, max_side=OCR_MAX_SIDE):
+    """
+    Prepares an image for OCR: applies EXIF rotation, converts to grayscale,
+    downscales anything larger than max_side and binarizes it.
+    Dark-mode screenshots are inverted so text always ends up dark on light.
+    """
+    image = ImageOps.exif_transpose(image)
+    image = image.convert("L")
+
+    if max(image.size) > max_side:
+        scale = max_side / max(image.size)
+        image = image.resize(
+            (max(1, int(image.width * scale)), max(1, int(image.height * scale))),
+            Image.LANCZOS
+        )
+
+    histogram = image.histogram()
+    threshold = _otsu_threshold(histogram)
+    image = image.point(lambda value: 255 if value > threshold else 0)
+
+    # More dark pixels than light ones means light text on a dark background
+    dark_pixels = sum(histogram[:threshold + 1])
+    if dark_pixels > sum(histogram) / 2:
+        image = ImageOps.invert(image)
+
+    return image
+
+
+def image_hash(data):
+    return hashlib.sha256(data).hexdigest()
+
+
+class OCRPool:
+    """Bounded pool of OCR workers with a result cache keyed by image hash"""
+
+    def __init__(self, workers=OCR_WORKERS, cache_entries=OCR_CACHE_ENTRIES):
+        self.workers = max(1, workers)
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="ocr")
+        self._cache = LRUCache(max_entries=cache_entries)
+        self._stats_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _run(self, data):
+        configure_tesseract()
+        image = preprocess_image(Image.open(io.BytesIO(data)))
+        return pytesseract.image_to_string(image, lang=OCR_LANG, config=OCR_CONFIG).strip()
+
+    def _run_and_cache(self, key, data):
+        text = self._run(data)
+        self._cache.set(key, text)
+        return text
+
+    def submit(self, data):
+        """Queues OCR for one image (as bytes) and returns a Future of its text"""
+        key = image_hash(data)
+        cached = self._cache.get(key)
+        with self._stats_lock:
+            if cached is not None:
+                self.cache_hits += 1
+            else:
+                self.cache_misses += 1
+        if cached is not None:
+            return _completed_future(cached)
+        return self._executor.submit(self._run_and_cache, key, data)
+
+    def ocr(self, data):
+        """OCRs one image and waits for the result"""
+        return self.submit(data).result()
+
+    def ocr_many(self, images):
+        """OCRs several images concurrently; results are in input order"""
+        futures = [self.submit(data) for data in images]
+        return [future.result() for future in futures]
+
+
+def _completed_future(value):
+    future = Future()
+    future.set_result(value)
+    return future
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_ocr_pool():
+    """Returns the process-wide OCR pool, creating it on first use"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = OCRPool()
+    return _pool
+
+
+def ocr_image_bytes(data):
+    """Extracts text from an image given as bytes"""
+    return get_ocr_pool().ocr(data)
@@ -0,0 +1,307 @@
+"""
+Offline scam classifier.
+
+A hashed n-gram logistic regression trained from the bundled quiz and
+comparison corpora (plus any extra labeled JSONL). It needs no network, so it
+serves as the fallback when Gemini is unreachable and as a cheap bulk
+pre-filter. Inference is vectorized with NumPy and scores thousands of
+messages per second on one core.
+
+Train and save a model with extra data:
+    python -m utils.offline_classifier train --extra labeled.jsonl --out model.npz
+
+Each JSONL line is {"text": ..., "label": 0/1} or {"text": ..., "risk_score": 0-100}.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+from data.quiz_examples import QUIZ_EXAMPLES, COMPARISON_EXAMPLES
+from utils.scoring import build_local_analysis, score_text
+
+N_FEATURES = 2 ** 18
+OFFLINE_MODEL_PATH = os.getenv("OFFLINE_MODEL_PATH", "")
+
+TOKEN_RE = re.compile(r"[a-z0-9$€£₹%]+(?:['.,][a-z0-9]+)*")
+
+# The bundled corpora are almost all scams; these everyday messages give the
+# model enough negatives to learn what normal communication looks like
+BENIGN_SEED_MESSAGES = [
+    "Hey, are we still on for lunch tomorrow at 1?",
+    "Your order #4821 has shipped and should arrive on Thursday. Track it in your account.",
+    "Reminder: your dentist appointment is on Monday at 10:30 AM. Reply C to confirm.",
+    "LIMITED TIME SALE! 50% off all shoes - Today Only! Shop now: www.nike.com",
+    "Thanks for your payment. Your receipt is attached for your records.",
+    "Team meeting moved to 3pm in room 204. Agenda is in the shared folder.",
+    "Happy birthday! Hope you have a wonderful day with your family.",
+    "Your library book is due back next Friday. You can renew it online.",
+    "We've updated our privacy policy. You can read the changes on our website.",
+    "The school will be closed on Monday for the public holiday.",
+    "Can you pick up milk and bread on your way home?",
+    "Your monthly statement is now available. Log in to the app to view it.",
+]
+
+_TRAINING_CACHE_LOCK = threading.Lock()
+
+
+def _hash(feature):
+    return zlib.crc32(feature.encode("utf-8")) % N_FEATURES
+
+
+def extract_features(text, scores=None):
+    """
+    Hashes a text into sparse features: word unigrams, word bigrams, character
+    trigrams of each word, a few style signals (shouting, exclamations) and the
+    category scores of the rule engine in utils.scoring (pass scores if the
+    caller already has score_text(text)).
+
+    Returns:
+        dict: {feature index: value}, L2-normalized.
+    """
+    lowered = text.lower()
+    tokens = TOKEN_RE.findall(lowered)
+    counts = {}
+
+    def add(feature, value=1.0):
+        index = _hash(feature)
+        counts[index] = counts.get(index, 0.0) + value
+
+    for token in tokens:
+        add("w:" + token)
+        padded = f"<{token}>"
+        for i in range(len(padded) - 2):
+            add("c:" + padded[i:i + 3], 0.3)
+    for first, second in zip(tokens, tokens[1:]):
+        add("b:" + first + " " + second)
+
+    words = text.split()
+    if words:
+        caps = sum(1 for word in words if len(word) > 2 and word.isupper())
+        add("s:caps", 3.0 * caps / len(words))
+        add("s:exclaim", 3.0 * text.count("!") / len(words))
+    if "http" in lowered or "www." in lowered:
+        add("s:url")
+
+    # The rule engine's category scores generalize far beyond the small
+    # training corpus, so they are features too
+    scores = score_text(text) if scores is None else scores
+    for category, score in scores["category_scores"].items():
+        if score:
+            add("r:" + category, 4.0 * score / 100)
+    add("s:bias")
+
+    norm = sum(value * value for value in counts.values()) ** 0.5 or 1.0
+    return {index: value / norm for index, value in counts.items()}
+
+
+def vectorize(texts, scores=None):
+    """
+    Turns texts into a flat sparse batch. scores, if given, holds
+    score_text(text) for each text.
+
+    Returns:
+        tuple: (indices, values, doc_ids) NumPy arrays, one entry per non-zero
+            feature; doc_ids says which text each entry belongs to.
+    """
+    indices, values, doc_ids = [], [], []
+    for doc_id, text in enumerate(texts):
+        features = extract_features(text, scores[doc_id] if scores is not None else None)
+        indices.extend(features.keys())
+        values.extend(features.values())
+        doc_ids.extend([doc_id] * len(features))
+    return (
+        np.asarray(indices, dtype=np.int64),
+        np.asarray(values, dtype=np.float32),
+        np.asarray(doc_ids, dtype=np.int64)
+    )
+
+
+def bundled_training_data():
+    """
+    Builds (text, label, sample weight) triples from the bundled corpora.
+    Labels are probabilities of being a scam; quiz risk scores become soft labels.
+    """
+    examples = []
+    for quiz in QUIZ_EXAMPLES:
+        examples.append((quiz["text"], quiz["risk_score"] / 100, 1.0))
+        # Each flagged phrase is itself a small positive example
+        for phrase in quiz["suspicious_phrases"]:
+            examples.append((phrase["phrase"], 0.9, 0.3))
+    for comparison in COMPARISON_EXAMPLES:
+        examples.append((comparison["suspicious"], 0.95, 1.0))
+        examples.append((comparison["legitimate"], 0.05, 1.0))
+    for text in BENIGN_SEED_MESSAGES:
+        examples.append((text, 0.05, 1.0))
+    return examples
+
+
+def load_labeled_jsonl(path):
+    """Reads extra (text, label, weight) triples from a labeled JSONL file"""
+    examples = []
+    with open(path, encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, 1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if "label" in record:
+                label = float(record["label"])
+            elif "risk_score" in record:
+                label = float(record["risk_score"]) / 100
+            else:
+                raise Exception(f"{path}:{line_number} needs a 'label' or 'risk_score' field")
+            examples.append((record["text"], min(max(label, 0.0), 1.0), float(record.get("weight", 1.0))))
+    return examples
+
+
+class OfflineClassifier:
+    """Logistic regression over hashed n-gram features"""
+
+    def __init__(self, weights=None):
+        self.weights = weights if weights is not None else np.zeros(N_FEATURES, dtype=np.float32)
+
+    def fit(self, examples, epochs=300, learning_rate=2.0, l2=1e-4):
+        """
+        Trains with full-batch gradient descent.
+
+        Args:
+            examples: (text, label, sample weight) triples, label in [0, 1].
+        """
+        texts = [text for text, _, _ in examples]
+        labels = np.asarray([label for _, label, _ in examples], dtype=np.float32)
+        sample_weights = np.asarray([weight for _, _, weight in examples], dtype=np.float32)
+        sample_weights /= sample_weights.sum()
+        indices, values, doc_ids = vectorize(texts)
+
+        weights = np.zeros(N_FEATURES, dtype=np.float32)
+        for _ in range(epochs):
+            logits = np.bincount(doc_ids, weights=weights[indices] * values, minlength=len(texts))
+            errors = (_sigmoid(logits) - labels) * sample_weights
+            gradient = np.bincount(indices, weights=values * errors[doc_ids], minlength=N_FEATURES)
+            weights -= learning_rate * (gradient.astype(np.float32) + l2 * weights)
+
+        self.weights = weights
+        return self
+
+    def predict_proba(self, texts, scores=None):
+        """Returns the scam probability of each text as a NumPy array"""
+        texts = list(texts)
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        indices, values, doc_ids = vectorize(texts, scores)
+        logits = np.bincount(doc_ids, weights=self.weights[indices] * values, minlength=len(texts))
+        return _sigmoid(logits)
+
+    def save(self, path):
+        # Only the non-zero weights are stored; hashed models are very sparse
+        nonzero = np.flatnonzero(self.weights)
+        np.savez_compressed(path, indices=nonzero, values=self.weights[nonzero])
+
+    @classmethod
+    def load(cls, path):
+        stored = np.load(path)
+        weights = np.zeros(N_FEATURES, dtype=np.float32)
+        weights[stored["indices"]] = stored["values"]
+        return cls(weights)
+
+
+def _sigmoid(x):
+    return 1.0 / (1.0 + np.exp(-np.clip(x, -30, 30)))
+
+
+_default_classifier = None
+
+
+def get_offline_classifier():
+    """
+    Returns the process-wide classifier: loaded from OFFLINE_MODEL_PATH if
+    that file exists, otherwise trained from the bundled corpora (well under
+    a second) on first use.
+    """
+    global _default_classifier
+    if _default_classifier is None:
+        with _TRAINING_CACHE_LOCK:
+            if _default_classifier is None:
+                if OFFLINE_MODEL_PATH and os.path.exists(OFFLINE_MODEL_PATH):
+                    _default_classifier = OfflineClassifier.load(OFFLINE_MODEL_PATH)
+                else:
+                    _default_classifier = OfflineClassifier().fit(bundled_training_data())
+    return _default_classifier
+
+
+def analyze_offline_batch(texts, source="offline", label="Offline analysis (AI service unavailable)"):
+    """
+    Analyzes texts without any network calls.
+
+    Returns:
+        list: One result per text with the same shape as analyze_text,
+            tagged with source and the classifier's "scam_probability".
+            label prefixes the overall assessment.
+    """
+    texts = list(texts)
+    all_scores = [score_text(text) for text in texts]
+    probabilities = get_offline_classifier().predict_proba(texts, all_scores)
+    results = []
+    for text, scores, probability in zip(texts, all_scores, probabilities):
+        # The classifier decides the overall score; the rule engine supplies
+        # the category breakdown and the phrases to highlight
+        overall = int(round(0.6 * float(probability) * 100 + 0.4 * scores["overall_confidence_score"]))
+        scores["overall_confidence_score"] = overall
+        analysis = build_local_analysis(text, scores)
+        analysis["overall_assessment"] = f"{label}: {analysis['overall_assessment']}"
+        results.append({
+            "success": True,
+            "data": analysis,
+            "source": source,
+            "scam_probability": round(float(probability), 4)
+        })
+    return results
+
+
+def analyze_offline(text):
+    """Offline analysis of a single text; same result shape as analyze_text"""
+    return analyze_offline_batch([text])[0]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the offline scam classifier.")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    train = subparsers.add_parser("train", help="Train from the bundled corpora plus optional JSONL")
+    train.add_argument("--extra", action="append", default=[], help="Labeled JSONL file (repeatable)")
+    train.add_argument("--out", required=True, help="Where to write the .npz model")
+    train.add_argument("--epochs", type=int, default=300)
+
+    score = subparsers.add_parser("score", help="Score JSONL/plain-text lines from stdin")
+    score.add_argument("--model", default=OFFLINE_MODEL_PATH, help="Model .npz (default: train from bundled data)")
+
+    args = parser.parse_args(argv)
+
+    if args.command == "train":
+        examples = bundled_training_data()
+        for path in args.extra:
+            examples.extend(load_labeled_jsonl(path))
+        classifier = OfflineClassifier().fit(examples, epochs=args.epochs)
+        classifier.save(args.out)
+        print(f"Trained on {len(examples)} examples, saved to {args.out}", file=sys.stderr)
+        return 0
+
+    classifier = (
+        OfflineClassifier.load(args.model) if args.model and os.path.exists(args.model)
+        else OfflineClassifier().fit(bundled_training_data())
+    )
+    lines = [line.rstrip("\n") for line in sys.stdin if line.strip()]
+    texts = [json.loads(line)["text"] if line.lstrip().startswith("{") else line for line in lines]
+    for text, probability in zip(texts, classifier.predict_proba(texts)):
+        print(json.dumps({"text": text, "scam_probability": round(float(probability), 4)}, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""
+Precomputed analyses of the bundled examples (data/quiz_examples.py).
+
+The quiz texts and the Spot the Difference pairs never change between
+deploys, so they are analyzed once at build time and written to a small
+versioned artifact. analyze_text serves those analyses without a Gemini
+call, as long as the artifact was built with the current model tiers and
+prompt version. The same artifact is the golden corpus for `check`, which
+re-analyzes every example and reports score drift.
+
+Build (needs GOOGLE_API_KEY), then commit or ship the artifact:
+    python -m utils.precomputed build
+    python -m utils.precomputed check --tolerance 10     # exit 1 on drift
+
+Configuration (environment):
+    PRECOMPUTED_ANALYSES_PATH   artifact location (default data/precomputed_analyses.json)
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import threading
+import time
+
+from utils.cache import normalize_text
+
+PRECOMPUTED_ANALYSES_PATH = os.getenv(
+    "PRECOMPUTED_ANALYSES_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "precomputed_analyses.json")
+)
+
+# Bump when the artifact layout changes; artifacts of another format are ignored
+ARTIFACT_FORMAT = 1
+
+# Score changes (0-100 scale) larger than this count as drift in `check`
+DEFAULT_DRIFT_TOLERANCE = 10
+
+_artifact = None
+_artifact_loaded = False
+_artifact_lock = threading.Lock()
+
+
+def text_key(text):
+    """Artifact key for a text: a hash of its normalized form"""
+    return hashlib.sha256(normalize_text(text).encode("utf-8")).hexdigest()[:32]
+
+
+def bundled_examples():
+    """
+    Every bundled example text.
+
+    Returns:
+        list: (example id, text) pairs, e.g. ("quiz-1", ...), ("comparison-2-legitimate", ...)
+    """
+    from data.quiz_examples import QUIZ_EXAMPLES, COMPARISON_EXAMPLES
+
+    examples = [(f"quiz-{quiz['id']}", quiz["text"]) for quiz in QUIZ_EXAMPLES]
+    for comparison in COMPARISON_EXAMPLES:
+        examples.append((f"comparison-{comparison['id']}-suspicious", comparison["suspicious"]))
+        examples.append((f"comparison-{comparison['id']}-legitimate", comparison["legitimate"]))
+    return examples
+
+
+def build_artifact(analyze, model_signature, prompt_version, examples=None):
+    """
+    Analyzes every example with analyze(text) -> result dict.
+
+    Returns:
+        dict: The artifact. Raises if any example fails or only got an
+            offline estimate, so a partial artifact is never written.
+    """
+    entries = {}
+    for example_id, text in examples or bundled_examples():
+        result = analyze(text)
+        if not result["success"]:
+            raise Exception(f"Analysis of {example_id} failed: {result.get('error', 'unknown error')}")
+        if result.get("source") == "offline":
+            raise Exception(f"Analysis of {example_id} fell back to the offline classifier: {result.get('fallback_reason')}")
+        entries[text_key(text)] = {"id": example_id, "data": result["data"]}
+    return {
+        "format": ARTIFACT_FORMAT,
+        "model": model_signature,
+        "prompt_version": prompt_version,
+        "built_at": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+        "entries": dict(sorted(entries.items(), key=lambda item: item[1]["id"])),
+    }
+
+
+def write_artifact(artifact, path=PRECOMPUTED_ANALYSES_PATH):
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    with open(temp_path, "w", encoding="utf-8") as handle:
+        json.dump(artifact, handle, ensure_ascii=False, separators=(",", ":"))
+        handle.write("\n")
+    os.replace(temp_path, path)
+
+
+def read_artifact(path=PRECOMPUTED_ANALYSES_PATH):
+    """The artifact at path, or None if it is missing, unreadable or of another format"""
+    try:
+        with open(path, encoding="utf-8") as handle:
+            artifact = json.load(handle)
+    except (OSError, ValueError):
+        return None
+    if not isinstance(artifact, dict) or artifact.get("format") != ARTIFACT_FORMAT:
+        return None
+    return artifact
+
+
+def _load_artifact():
+    global _artifact, _artifact_loaded
+    if not _artifact_loaded:
+        with _artifact_lock:
+            if not _artifact_loaded:
+                _artifact = read_artifact()
+                _artifact_loaded = True
+    return _artifact
+
+
+def get_precomputed_analysis(text, model_signature, prompt_version):
+    """
+    The precomputed analysis for text, or None if text isn't a bundled
+    example or the artifact was built for another model or prompt version.
+    The artifact is read on the first call.
+    """
+    artifact = _load_artifact()
+    if artifact is None:
+        return None
+    if artifact.get("model") != model_signature or artifact.get("prompt_version") != prompt_version:
+        return None
+    entry = artifact["entries"].get(text_key(text))
+    return entry["data"] if entry is not None else None
+
+
+def reset_precomputed():
+    """Forgets the loaded artifact so the next lookup reads it again"""
+    global _artifact, _artifact_loaded
+    with _artifact_lock:
+        _artifact = None
+        _artifact_loaded = False
+
+
+def compare_analyses(golden, current, tolerance=DEFAULT_DRIFT_TOLERANCE):
+    """
+    Score differences between two analyses of the same text.
+
+    Returns:
+        list: {"field", "golden", "current"} for each score that moved more
+            than tolerance points.
+    """
+    drifted = []
+    fields = [("overall_confidence_score", golden.get("overall_confidence_score"),
+               current.get("overall_confidence_score"))]
+    golden_categories = golden.get("category_scores") or {}
+    current_categories = current.get("category_scores") or {}
+    for category in sorted(set(golden_categories) | set(current_categories)):
+        fields.append((f"category_scores.{category}", golden_categories.get(category),
+                       current_categories.get(category)))
+    for field, old, new in fields:
+        if old is None or new is None or abs(old - new) > tolerance:
+            drifted.append({"field": field, "golden": old, "current": new})
+    return drifted
+
+
+def check_drift(artifact, analyze, tolerance=DEFAULT_DRIFT_TOLERANCE, examples=None):
+    """
+    Re-analyzes every example in the golden artifact with analyze(text) and
+    compares the scores.
+
+    Returns:
+        dict: "drifted" maps example id -> score differences (or an error),
+            "missing" lists examples not in the artifact.
+    """
+    report = {"checked": 0, "drifted": {}, "missing": []}
+    for example_id, text in examples or bundled_examples():
+        entry = artifact["entries"].get(text_key(text))
+        if entry is None:
+            report["missing"].append(example_id)
+            continue
+        report["checked"] += 1
+        result = analyze(text)
+        if not result["success"]:
+            report["drifted"][example_id] = {"error": result.get("error", "analysis failed")}
+            continue
+        drifted = compare_analyses(entry["data"], result["data"], tolerance)
+        if drifted:
+            report["drifted"][example_id] = drifted
+    return report
+
+
+def _fresh_analysis(text):
+    """
+    A live Gemini analysis, bypassing the cache, the artifact and the
+    prescreen. An offline fallback is reported as a failure.
+    """
+    from utils.gemini_analysis import analyze_text
+    result = analyze_text(text, use_cache=False, use_prescreen=False)
+    if result.get("source") == "offline":
+        return {"success": False, "error": f"AI analysis failed: {result.get('fallback_reason')}"}
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    build = subparsers.add_parser("build", help="Analyze every bundled example and write the artifact")
+    build.add_argument("--out", default=PRECOMPUTED_ANALYSES_PATH)
+    check = subparsers.add_parser("check", help="Re-analyze the examples and compare with the artifact")
+    check.add_argument("--artifact", default=PRECOMPUTED_ANALYSES_PATH)
+    check.add_argument("--tolerance", type=int, default=DEFAULT_DRIFT_TOLERANCE,
+                       help="Largest allowed score change, in points")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    from utils.gemini_analysis import PROMPT_VERSION, configure_gemini
+    from utils.router import routing_signature
+
+    load_dotenv()
+    configure_gemini(os.getenv("GOOGLE_API_KEY"))
+
+    if args.command == "build":
+        artifact = build_artifact(_fresh_analysis, routing_signature(), PROMPT_VERSION)
+        write_artifact(artifact, args.out)
+        print(f"Wrote {len(artifact['entries'])} analyses to {args.out}", file=sys.stderr)
+        return 0
+
+    artifact = read_artifact(args.artifact)
+    if artifact is None:
+        print(f"No usable artifact at {args.artifact}", file=sys.stderr)
+        return 2
+    if artifact["model"] != routing_signature() or artifact["prompt_version"] != PROMPT_VERSION:
+        print(f"Golden built with {artifact['model']} / prompt v{artifact['prompt_version']}; "
+              f"comparing against {routing_signature()} / prompt v{PROMPT_VERSION}", file=sys.stderr)
+    report = check_drift(artifact, _fresh_analysis, args.tolerance)
+    print(json.dumps(report, indent=2))
+    return 1 if report["drifted"] or report["missing"] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
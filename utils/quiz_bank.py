@@ -0,0 +1,316 @@
+"""
+Quiz bank: where the quiz game gets its questions.
+
+Three backends share one interface - count(category, difficulty) and
+get(category, difficulty, position):
+
+    ListQuizBank    an in-memory list (the built-in QUIZ_EXAMPLES)
+    SqliteQuizBank  a SQLite file built by build_quiz_bank(); items are read
+                    one row at a time, so opening a bank of any size is instant
+    JsonlQuizBank   a JSONL file (one quiz per line); indexed into a SQLite
+                    file next to it on first use and whenever the JSONL changes
+
+Items are indexed by category and difficulty. QuizSampler draws positions
+without repeats (a sparse Fisher-Yates shuffle), so each session sees every
+matching quiz once before any repeats, and each draw is O(1) whatever the
+bank size.
+
+Configuration (environment):
+    QUIZ_BANK_PATH    a .jsonl or .sqlite/.db quiz bank (default: built-in examples)
+
+Build a SQLite bank from JSONL ahead of deployment:
+    python -m utils.quiz_bank quizzes.jsonl quizzes.sqlite
+"""
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+
+QUIZ_BANK_PATH = os.getenv("QUIZ_BANK_PATH", "")
+DIFFICULTIES = ("easy", "medium", "hard")
+
+# Stored in place of a category or difficulty to mean "any"
+ANY = ""
+
+
+def quiz_difficulty(quiz):
+    """
+    The quiz's difficulty: its own "difficulty" field if set, otherwise
+    derived from risk_score - blatant scams are easy to spot, subtle ones hard.
+    """
+    difficulty = quiz.get("difficulty")
+    if difficulty:
+        return str(difficulty).lower()
+    risk_score = quiz.get("risk_score", 0)
+    if risk_score >= 80:
+        return "easy"
+    if risk_score >= 50:
+        return "medium"
+    return "hard"
+
+
+def validate_quiz(quiz):
+    """Raises if quiz is missing a field the quiz game needs"""
+    if not isinstance(quiz, dict):
+        raise Exception("Quiz item must be a JSON object")
+    if not isinstance(quiz.get("text"), str) or not quiz["text"].strip():
+        raise Exception("Quiz item has no 'text'")
+    phrases = quiz.get("suspicious_phrases")
+    if not isinstance(phrases, list) or not all(isinstance(sp, dict) and sp.get("phrase") for sp in phrases):
+        raise Exception("Quiz item needs a 'suspicious_phrases' list of {phrase, reason} objects")
+
+
+def _group_keys(category, difficulty):
+    """Every (category, difficulty) filter an item with these values matches"""
+    return [(category, difficulty), (category, ANY), (ANY, difficulty), (ANY, ANY)]
+
+
+class ListQuizBank:
+    """Quiz bank over an in-memory list of quiz dicts"""
+
+    def __init__(self, items):
+        self.items = list(items)
+        self._groups = {}
+        for index, quiz in enumerate(self.items):
+            for key in _group_keys(quiz.get("category", ""), quiz_difficulty(quiz)):
+                self._groups.setdefault(key, []).append(index)
+
+    def count(self, category=None, difficulty=None):
+        return len(self._groups.get((category or ANY, difficulty or ANY), ()))
+
+    def get(self, category, difficulty, position):
+        return self.items[self._groups[(category or ANY, difficulty or ANY)][position]]
+
+    def categories(self):
+        return sorted({category for category, difficulty in self._groups if category != ANY})
+
+    def difficulties(self):
+        return [d for d in DIFFICULTIES if (ANY, d) in self._groups] + sorted(
+            {d for category, d in self._groups if d != ANY and d not in DIFFICULTIES}
+        )
+
+
+def build_quiz_bank(items, path, source=None):
+    """
+    Writes items (an iterable of quiz dicts) to a SQLite quiz bank at path.
+    The file is built beside path and moved into place, so readers never see
+    a half-built bank.
+
+    Returns:
+        int: Number of items written.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    temp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    if os.path.exists(temp_path):
+        os.remove(temp_path)
+
+    conn = sqlite3.connect(temp_path)
+    try:
+        conn.executescript("""
+            CREATE TABLE quizzes (
+                id INTEGER PRIMARY KEY,
+                category TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                data TEXT NOT NULL
+            );
+            CREATE TABLE slots (
+                category TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                quiz_id INTEGER NOT NULL,
+                PRIMARY KEY (category, difficulty, position)
+            ) WITHOUT ROWID;
+            CREATE TABLE groups (
+                category TEXT NOT NULL,
+                difficulty TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                PRIMARY KEY (category, difficulty)
+            ) WITHOUT ROWID;
+            CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+        """)
+        sizes = {}
+        count = 0
+        for quiz in items:
+            validate_quiz(quiz)
+            category = quiz.get("category", "")
+            difficulty = quiz_difficulty(quiz)
+            quiz_id = conn.execute(
+                "INSERT INTO quizzes (category, difficulty, data) VALUES (?, ?, ?)",
+                (category, difficulty, json.dumps(quiz, ensure_ascii=False))
+            ).lastrowid
+            for key in _group_keys(category, difficulty):
+                position = sizes.get(key, 0)
+                sizes[key] = position + 1
+                conn.execute("INSERT INTO slots VALUES (?, ?, ?, ?)", (*key, position, quiz_id))
+            count += 1
+        conn.executemany("INSERT INTO groups VALUES (?, ?, ?)", [(*key, size) for key, size in sizes.items()])
+        if source is not None:
+            conn.executemany("INSERT INTO meta VALUES (?, ?)", [(k, str(v)) for k, v in source.items()])
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(temp_path, path)
+    return count
+
+
+class SqliteQuizBank:
+    """Quiz bank backed by a SQLite file from build_quiz_bank(); reads one item per draw"""
+
+    def __init__(self, path):
+        if not os.path.exists(path):
+            raise Exception(f"Quiz bank not found: {path}")
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True, check_same_thread=False)
+        # Group sizes are tiny (categories x difficulties); keep them in memory
+        self._sizes = {
+            (category, difficulty): size
+            for category, difficulty, size in self._conn.execute("SELECT category, difficulty, size FROM groups")
+        }
+
+    def count(self, category=None, difficulty=None):
+        return self._sizes.get((category or ANY, difficulty or ANY), 0)
+
+    def get(self, category, difficulty, position):
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT q.data FROM slots s JOIN quizzes q ON q.id = s.quiz_id "
+                "WHERE s.category = ? AND s.difficulty = ? AND s.position = ?",
+                (category or ANY, difficulty or ANY, position)
+            ).fetchone()
+        if row is None:
+            raise Exception(f"No quiz at position {position} for category '{category}', difficulty '{difficulty}'")
+        return json.loads(row[0])
+
+    def categories(self):
+        return sorted({category for category, difficulty in self._sizes if category != ANY})
+
+    def difficulties(self):
+        return [d for d in DIFFICULTIES if (ANY, d) in self._sizes] + sorted(
+            {d for category, d in self._sizes if d != ANY and d not in DIFFICULTIES}
+        )
+
+
+def iter_jsonl(path):
+    """Yields the quiz dicts in a JSONL file, skipping blank lines"""
+    with open(path, encoding="utf-8") as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as e:
+                raise Exception(f"{path}:{line_number}: invalid JSON ({e})")
+
+
+class JsonlQuizBank(SqliteQuizBank):
+    """
+    Quiz bank over a JSONL file. The first worker to open it (or the first
+    after the file changes) indexes it into index_path; everyone else just
+    opens the index.
+    """
+
+    def __init__(self, path, index_path=None):
+        if not os.path.exists(path):
+            raise Exception(f"Quiz bank not found: {path}")
+        index_path = index_path or path + ".index.sqlite"
+        stat = os.stat(path)
+        source = {"source_size": stat.st_size, "source_mtime_ns": stat.st_mtime_ns}
+        if not _index_matches(index_path, source):
+            build_quiz_bank(iter_jsonl(path), index_path, source)
+        self.jsonl_path = path
+        super().__init__(index_path)
+
+
+def _index_matches(index_path, source):
+    if not os.path.exists(index_path):
+        return False
+    try:
+        conn = sqlite3.connect(f"file:{index_path}?mode=ro", uri=True)
+        try:
+            meta = dict(conn.execute("SELECT key, value FROM meta"))
+        finally:
+            conn.close()
+    except sqlite3.Error:
+        return False
+    return all(meta.get(key) == str(value) for key, value in source.items())
+
+
+def open_quiz_bank(path):
+    """Opens the quiz bank at path, picking the backend from the extension"""
+    if path.endswith(".jsonl"):
+        return JsonlQuizBank(path)
+    return SqliteQuizBank(path)
+
+
+_bank = None
+_bank_lock = threading.Lock()
+
+
+def get_quiz_bank():
+    """The process-wide quiz bank: QUIZ_BANK_PATH if set, otherwise the built-in examples"""
+    global _bank
+    with _bank_lock:
+        if _bank is None:
+            if QUIZ_BANK_PATH:
+                _bank = open_quiz_bank(QUIZ_BANK_PATH)
+            else:
+                from data.quiz_examples import QUIZ_EXAMPLES
+                _bank = ListQuizBank(QUIZ_EXAMPLES)
+        return _bank
+
+
+class QuizSampler:
+    """
+    Draws positions 0..size-1 in random order without repeats.
+
+    A Fisher-Yates shuffle done lazily: only the swapped slots are stored,
+    so a draw is O(1) and memory grows with the number of draws, not with
+    size. When every position has been drawn a new round starts.
+    """
+
+    def __init__(self, size, seed=None):
+        self.size = size
+        self._random = random.Random(seed)
+        self._swaps = {}
+        self._remaining = size
+        self._last = None
+
+    def draw(self):
+        if self.size <= 0:
+            raise Exception("No quizzes to draw from")
+        if self._remaining == 0:
+            self._swaps = {}
+            self._remaining = self.size
+        index = self._random.randrange(self._remaining)
+        last_slot = self._remaining - 1
+        position = self._swaps.get(index, index)
+        # Don't start a new round with the quiz that ended the last one
+        if position == self._last and self._remaining > 1:
+            index = last_slot if index != last_slot else 0
+            position = self._swaps.get(index, index)
+        # Move the value in the last live slot into the drawn one
+        if index != last_slot:
+            self._swaps[index] = self._swaps.get(last_slot, last_slot)
+        self._swaps.pop(last_slot, None)
+        self._remaining -= 1
+        self._last = position
+        return position
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 2:
+        print("Usage: python -m utils.quiz_bank QUIZZES.jsonl OUTPUT.sqlite", file=sys.stderr)
+        return 2
+    count = build_quiz_bank(iter_jsonl(argv[0]), argv[1])
+    print(f"Wrote {count} quizzes to {argv[1]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,124 @@
+"""
+Quiz scoring for the "Test Your Scam Detection Skills" game.
+
+A QuizEngine is built once per quiz. It splits the text into the words the
+app shows as buttons and maps every word index to the suspicious phrase (if
+any) that covers it. Selections are word spans, (start, end) with end
+exclusive, so toggling, rendering and scoring are lookups instead of
+substring scans over every phrase and selection.
+"""
+import bisect
+import threading
+
+from utils.matcher import PhraseMatcher
+
+MAX_CACHED_ENGINES = 64
+
+
+class QuizEngine:
+    def __init__(self, quiz):
+        self.quiz = quiz
+        self.words = quiz["text"].split()
+        self.phrases = [sp["phrase"] for sp in quiz["suspicious_phrases"]]
+
+        # Match against the words joined by single spaces, so phrases match
+        # whatever whitespace the text uses; starts[i] is word i's offset
+        starts = []
+        offset = 0
+        for word in self.words:
+            starts.append(offset)
+            offset += len(word) + 1
+        joined = " ".join(self.words)
+
+        # phrase_spans[i] is the word span of phrase i's first occurrence,
+        # or None when the phrase doesn't appear in the text
+        self.phrase_spans = [None] * len(self.phrases)
+        normalized = [" ".join(phrase.split()) for phrase in self.phrases]
+        if any(normalized):
+            for start, end, index in sorted(PhraseMatcher(normalized).find_all(joined)):
+                if not normalized[index] or self.phrase_spans[index] is not None:
+                    continue
+                first_word = bisect.bisect_right(starts, start) - 1
+                last_word = bisect.bisect_right(starts, end - 1) - 1
+                self.phrase_spans[index] = (first_word, last_word + 1)
+
+        # Word index -> phrase index; the earliest listed phrase wins where
+        # phrases overlap
+        self.phrase_at = {}
+        for index, span in enumerate(self.phrase_spans):
+            if span is not None:
+                for word_index in range(*span):
+                    self.phrase_at.setdefault(word_index, index)
+
+    def span_for_word(self, word_index):
+        """The span a click on word_index selects: its phrase, or just the word"""
+        phrase_index = self.phrase_at.get(word_index)
+        if phrase_index is None:
+            return (word_index, word_index + 1)
+        return self.phrase_spans[phrase_index]
+
+    def toggle(self, selections, word_index):
+        """
+        Adds or removes the span a click on word_index selects.
+
+        Returns:
+            list: The new selections (the input list is not modified).
+        """
+        span = tuple(self.span_for_word(word_index))
+        selections = [tuple(selection) for selection in selections]
+        if span in selections:
+            selections.remove(span)
+        else:
+            selections.append(span)
+        return selections
+
+    def selected_words(self, selections):
+        """The set of word indices covered by selections"""
+        return {word_index for start, end in selections for word_index in range(start, end)}
+
+    def selection_text(self, selection):
+        start, end = selection
+        return " ".join(self.words[start:end])
+
+    def phrases_found(self, selections):
+        """Indices of the suspicious phrases that overlap at least one selection"""
+        found = set()
+        for word_index in self.selected_words(selections):
+            phrase_index = self.phrase_at.get(word_index)
+            if phrase_index is not None:
+                found.add(phrase_index)
+        # A phrase covered entirely by earlier phrases has no words of its
+        # own in phrase_at; check its span directly
+        for index, span in enumerate(self.phrase_spans):
+            if span is not None and index not in found:
+                if any(start < span[1] and span[0] < end for start, end in selections):
+                    found.add(index)
+        return found
+
+    def score(self, selections):
+        """
+        Scores selections by span overlap with the suspicious phrases.
+
+        Returns:
+            tuple: (correct_count, total_possible, score_percent)
+        """
+        total_possible = len(self.phrases)
+        correct_count = len(self.phrases_found(selections))
+        score_percent = (correct_count / total_possible * 100) if total_possible > 0 else 0
+        return correct_count, total_possible, score_percent
+
+
+_engines = {}
+_engines_lock = threading.Lock()
+
+
+def get_quiz_engine(quiz):
+    """Returns the QuizEngine for quiz, building it on first use"""
+    key = (quiz.get("id"), quiz["text"])
+    with _engines_lock:
+        engine = _engines.get(key)
+        if engine is None:
+            if len(_engines) >= MAX_CACHED_ENGINES:
+                _engines.pop(next(iter(_engines)))
+            engine = _engines[key] = QuizEngine(quiz)
+        return engine
@@ -0,0 +1,304 @@
+"""
+Parsing, repair and validation of Gemini analysis responses.
+
+Gemini's JSON is usually fine, but sometimes it comes wrapped in prose, has
+trailing commas, or is cut off mid-array. Rather than losing the whole call,
+parse_analysis_response repairs what it can and reports which fields are
+still missing, so the caller can ask for just those fields.
+"""
+import json
+
+from utils.scoring import CATEGORIES
+
+REQUIRED_FIELDS = [
+    "overall_confidence_score",
+    "overall_assessment",
+    "category_scores",
+    "red_flags",
+    "suspicious_phrases",
+    "recommendation",
+    "is_safe"
+]
+
+# Schema snippets used when asking Gemini for specific missing fields
+FIELD_SCHEMAS = {
+    "overall_confidence_score": '"overall_confidence_score": <number 0-100>',
+    "overall_assessment": '"overall_assessment": "<brief summary of the text\'s trustworthiness>"',
+    "category_scores": (
+        '"category_scores": {"phishing": <0-100>, "financial_scam": <0-100>, '
+        '"misinformation": <0-100>, "emotional_manipulation": <0-100>, "urgency_tactics": <0-100>}'
+    ),
+    "red_flags": '"red_flags": [{"flag": "<description>", "severity": "<low/medium/high>", "explanation": "<why>"}]',
+    "suspicious_phrases": '"suspicious_phrases": [{"phrase": "<exact phrase from text>", "reason": "<why>"}]',
+    "recommendation": '"recommendation": "<what the user should do>"',
+    "is_safe": '"is_safe": <true/false>'
+}
+
+FOLLOWUP_PROMPT = """
+You are a digital literacy expert analyzing the text below for scams, misinformation and manipulation.
+Respond with ONLY a JSON object containing exactly these fields:
+
+{{
+    {fields}
+}}
+
+TEXT TO ANALYZE:
+{text}
+"""
+
+
+def strip_code_fences(response_text):
+    """Removes markdown code blocks that Gemini sometimes wraps JSON in"""
+    response_text = response_text.strip()
+    if response_text.startswith("```json"):
+        response_text = response_text[7:]
+    if response_text.startswith("```"):
+        response_text = response_text[3:]
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]
+    return response_text.strip()
+
+
+def _remove_trailing_commas(text):
+    """Drops commas that directly precede a closing bracket (outside strings)"""
+    out = []
+    in_string = False
+    escape = False
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "}]":
+            # Walk back over whitespace to a dangling comma
+            idx = len(out) - 1
+            while idx >= 0 and out[idx].isspace():
+                idx -= 1
+            if idx >= 0 and out[idx] == ",":
+                del out[idx]
+        out.append(ch)
+    return "".join(out)
+
+
+def _close_truncated(text):
+    """
+    Repairs JSON that was cut off: drops the incomplete trailing member or
+    element and closes every bracket that is still open.
+    """
+    stack = []
+    in_string = False
+    escape = False
+    # (cut index, brackets open at that point)
+    safe_cut = None
+
+    for i, ch in enumerate(text):
+        if in_string:
+            if escape:
+                escape = False
+            elif ch == "\\":
+                escape = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in "{[":
+            stack.append(ch)
+            safe_cut = (i + 1, list(stack))
+        elif ch in "}]":
+            if stack:
+                stack.pop()
+            safe_cut = (i + 1, list(stack))
+            if not stack:
+                return text[:i + 1]
+        elif ch == ",":
+            safe_cut = (i, list(stack))
+
+    if safe_cut is None:
+        return text
+    cut, open_brackets = safe_cut
+    closers = "".join("}" if bracket == "{" else "]" for bracket in reversed(open_brackets))
+    return text[:cut] + closers
+
+
+def extract_json_object(response_text):
+    """
+    Pulls the first JSON object out of a model response, repairing common
+    defects (code fences, surrounding prose, trailing commas, truncation).
+
+    Returns:
+        dict or None: The decoded object, or None if nothing could be recovered.
+    """
+    text = strip_code_fences(response_text or "")
+    start = text.find("{")
+    if start == -1:
+        return None
+    text = text[start:]
+
+    decoder = json.JSONDecoder()
+    candidates = [text]
+    candidates.append(_remove_trailing_commas(text))
+    candidates.append(_remove_trailing_commas(_close_truncated(candidates[-1])))
+
+    for candidate in candidates:
+        try:
+            # raw_decode ignores anything after the object, e.g. trailing prose
+            value, _ = decoder.raw_decode(candidate)
+        except json.JSONDecodeError:
+            continue
+        if isinstance(value, dict):
+            return value
+    return None
+
+
+def _as_score(value):
+    if isinstance(value, bool):
+        return None
+    if isinstance(value, str):
+        value = value.strip().rstrip("%")
+        try:
+            value = float(value)
+        except ValueError:
+            return None
+    if isinstance(value, (int, float)):
+        return int(round(min(max(value, 0), 100)))
+    return None
+
+
+def _as_text(value):
+    if isinstance(value, str) and value.strip():
+        return value.strip()
+    return None
+
+
+def _as_bool(value):
+    if isinstance(value, bool):
+        return value
+    if isinstance(value, str) and value.strip().lower() in ("true", "false"):
+        return value.strip().lower() == "true"
+    return None
+
+
+def validate_analysis(data):
+    """
+    Checks an analysis dict against the expected schema and normalizes it.
+    Scores are coerced to ints in 0-100, severities to low/medium/high, and
+    malformed list items are dropped.
+
+    Returns:
+        tuple: (normalized dict, list of fields that are missing or invalid)
+    """
+    data = data if isinstance(data, dict) else {}
+    normalized = {}
+    missing = []
+
+    score = _as_score(data.get("overall_confidence_score"))
+    if score is None:
+        missing.append("overall_confidence_score")
+    else:
+        normalized["overall_confidence_score"] = score
+
+    for field in ("overall_assessment", "recommendation"):
+        value = _as_text(data.get(field))
+        if value is None:
+            missing.append(field)
+        else:
+            normalized[field] = value
+
+    category_scores = data.get("category_scores")
+    if isinstance(category_scores, dict):
+        scores = {category: _as_score(category_scores.get(category)) for category in CATEGORIES}
+        if None in scores.values():
+            missing.append("category_scores")
+        else:
+            normalized["category_scores"] = scores
+    else:
+        missing.append("category_scores")
+
+    red_flags = data.get("red_flags")
+    if isinstance(red_flags, list):
+        normalized["red_flags"] = []
+        for flag in red_flags:
+            if not isinstance(flag, dict) or not _as_text(flag.get("flag")):
+                continue
+            severity = str(flag.get("severity", "")).strip().lower()
+            normalized["red_flags"].append({
+                "flag": flag["flag"].strip(),
+                "severity": severity if severity in ("low", "medium", "high") else "medium",
+                "explanation": _as_text(flag.get("explanation")) or ""
+            })
+    else:
+        missing.append("red_flags")
+
+    phrases = data.get("suspicious_phrases")
+    if isinstance(phrases, list):
+        normalized["suspicious_phrases"] = [
+            {"phrase": phrase["phrase"], "reason": _as_text(phrase.get("reason")) or ""}
+            for phrase in phrases
+            if isinstance(phrase, dict) and _as_text(phrase.get("phrase"))
+        ]
+    else:
+        missing.append("suspicious_phrases")
+
+    is_safe = _as_bool(data.get("is_safe"))
+    if is_safe is None and score is not None:
+        # Cheap to derive, not worth another request
+        is_safe = score < 50
+    if is_safe is None:
+        missing.append("is_safe")
+    else:
+        normalized["is_safe"] = is_safe
+
+    return normalized, missing
+
+
+def validate_partial_analysis(partial):
+    """
+    Normalizes the fields of a streamed, still incomplete analysis the same
+    way validate_analysis does. Fields that haven't arrived, or arrived
+    malformed, are left out.
+    """
+    normalized, _ = validate_analysis(partial)
+    return {field: value for field, value in normalized.items() if field in partial}
+
+
+def parse_analysis_response(response_text):
+    """
+    Parses and validates a full analysis response.
+
+    Returns:
+        tuple: (analysis dict or None, list of missing fields). None means
+            no JSON object could be recovered at all.
+    """
+    data = extract_json_object(response_text)
+    if data is None:
+        return None, list(REQUIRED_FIELDS)
+    return validate_analysis(data)
+
+
+def build_followup_prompt(text, missing_fields):
+    """Builds a small prompt that asks only for the given fields"""
+    fields = ",\n    ".join(FIELD_SCHEMAS[field] for field in missing_fields)
+    return FOLLOWUP_PROMPT.format(fields=fields, text=text)
+
+
+def merge_followup(analysis, followup_text, missing_fields):
+    """
+    Fills the missing fields of analysis from a follow-up response.
+
+    Returns:
+        tuple: (merged normalized analysis, fields that are still missing)
+    """
+    followup = extract_json_object(followup_text) or {}
+    combined = dict(analysis)
+    for field in missing_fields:
+        if field in followup:
+            combined[field] = followup[field]
+    return validate_analysis(combined)
@@ -0,0 +1,56 @@
+"""
+Tiered model routing.
+
+Every request goes to the fastest model first. The answer is escalated to the
+next (stronger, slower) model only when it is uncertain - its overall score
+falls inside UNCERTAINTY_BAND - or when it couldn't be parsed/validated.
+
+Configuration (environment):
+    GEMINI_MODEL_TIERS       comma-separated models, fastest first
+                             (default: gemini-2.5-flash,gemini-2.5-pro)
+    ROUTER_UNCERTAINTY_BAND  "low,high" inclusive score band that escalates
+                             (default: 35,65)
+"""
+import os
+
+DEFAULT_MODEL_TIERS = "gemini-2.5-flash,gemini-2.5-pro"
+DEFAULT_UNCERTAINTY_BAND = "35,65"
+
+
+def _parse_tiers(value):
+    tiers = [name.strip() for name in value.split(",") if name.strip()]
+    if not tiers:
+        raise Exception("GEMINI_MODEL_TIERS must name at least one model")
+    return tiers
+
+
+def _parse_band(value):
+    try:
+        low, high = (int(part) for part in value.split(","))
+    except ValueError:
+        raise Exception(f"ROUTER_UNCERTAINTY_BAND must look like '35,65', got '{value}'")
+    return min(low, high), max(low, high)
+
+
+MODEL_TIERS = _parse_tiers(os.getenv("GEMINI_MODEL_TIERS", DEFAULT_MODEL_TIERS))
+UNCERTAINTY_BAND = _parse_band(os.getenv("ROUTER_UNCERTAINTY_BAND", DEFAULT_UNCERTAINTY_BAND))
+
+
+def routing_signature(tiers=None):
+    """
+    Identifies the routing setup, for use in cache keys.
+    Changing the tier list invalidates previously cached answers.
+    """
+    return "+".join(tiers or MODEL_TIERS)
+
+
+def needs_escalation(result, band=None):
+    """
+    True if a tier's result should be retried on the next tier:
+    the analysis failed, or its overall score is inside the uncertainty band.
+    """
+    if not result.get("success"):
+        return True
+    low, high = band or UNCERTAINTY_BAND
+    score = result["data"].get("overall_confidence_score", 0)
+    return low <= score <= high
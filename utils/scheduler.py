@@ -0,0 +1,291 @@
+"""
+Shared scheduler for every Gemini call in the process.
+
+- A token bucket keeps the request rate at or below our quota.
+- Calls that fail with 429 / 5xx are retried with jittered exponential backoff.
+- A priority queue lets interactive UI requests jump ahead of bulk jobs.
+- A circuit breaker fails fast while the API is down, so callers can drop to
+  degraded mode (the offline classifier) instead of piling up retries.
+
+Configuration (environment):
+    GEMINI_RATE_PER_MINUTE   sustained request rate (default 60)
+    GEMINI_BURST             token bucket capacity (default 10)
+    GEMINI_MAX_CONCURRENCY   calls in flight at once (default 8)
+    GEMINI_MAX_RETRIES       retries per call on 429/5xx (default 4)
+"""
+import heapq
+import itertools
+import os
+import random
+import threading
+import time
+from concurrent.futures import Future
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+RATE_PER_MINUTE = float(os.getenv("GEMINI_RATE_PER_MINUTE", "60"))
+BURST = int(os.getenv("GEMINI_BURST", "10"))
+MAX_CONCURRENCY = int(os.getenv("GEMINI_MAX_CONCURRENCY", "8"))
+MAX_RETRIES = int(os.getenv("GEMINI_MAX_RETRIES", "4"))
+
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 30.0
+
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_SECONDS = 30.0
+
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+RETRYABLE_ERROR_NAMES = {
+    "ResourceExhausted",
+    "TooManyRequests",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "BadGateway",
+    "GatewayTimeout",
+    "DeadlineExceeded"
+}
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling Gemini while the circuit breaker is open"""
+
+
+def is_retryable(error):
+    """True for rate-limit (429) and server-side (5xx) errors"""
+    if type(error).__name__ in RETRYABLE_ERROR_NAMES:
+        return True
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            code = code()
+        except Exception:
+            code = None
+    if isinstance(code, int) and code in RETRYABLE_STATUS_CODES:
+        return True
+    message = str(error).lower()
+    return "429" in message or "quota" in message or "rate limit" in message
+
+
+def backoff_delay(attempt, base=BACKOFF_BASE_SECONDS, cap=BACKOFF_MAX_SECONDS):
+    """Full-jitter exponential backoff: uniform between 0 and min(cap, base * 2^attempt)"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class TokenBucket:
+    """Classic token bucket; acquire() blocks until a token is available"""
+
+    def __init__(self, rate_per_second, capacity):
+        self.rate = rate_per_second
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self):
+        with self._lock:
+            self._refill()
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return True
+            return False
+
+    def acquire(self):
+        while True:
+            with self._lock:
+                self._refill()
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+
+class CircuitBreaker:
+    """
+    Opens after failure_threshold consecutive failures. While open every call
+    fails fast; after reset_seconds one trial call is let through (half-open)
+    and its outcome closes or re-opens the circuit.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold=CIRCUIT_FAILURE_THRESHOLD, reset_seconds=CIRCUIT_RESET_SECONDS):
+        self.failure_threshold = failure_threshold
+        self.reset_seconds = reset_seconds
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._trials = itertools.count(1)
+        self._trial_id = None
+        self._lock = threading.Lock()
+
+    def rejecting(self):
+        """True if a call arriving now would be turned away; changes no state"""
+        with self._lock:
+            if self.state == self.CLOSED:
+                return False
+            if self.state == self.OPEN:
+                return time.monotonic() - self._opened_at < self.reset_seconds
+            return self._trial_in_flight
+
+    def admit(self):
+        """
+        Decides, right before a call runs, whether it may run.
+
+        Returns:
+            tuple: (allowed, trial_id). trial_id is set when the call is the
+                half-open trial; pass it to release_trial when the call ends.
+        """
+        with self._lock:
+            if self.state == self.CLOSED:
+                return True, None
+            if self.state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_seconds:
+                self.state = self.HALF_OPEN
+                self._trial_in_flight = False
+            if self.state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                self._trial_id = next(self._trials)
+                return True, self._trial_id
+            return False, None
+
+    def record_success(self):
+        with self._lock:
+            self._failures = 0
+            self.state = self.CLOSED
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            if self.state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self.state = self.OPEN
+                self._opened_at = time.monotonic()
+            self._trial_in_flight = False
+
+    def release_trial(self, trial_id):
+        """
+        Frees the half-open trial slot held by trial_id if the trial ended
+        without recording an outcome (a non-retryable error), so the next
+        call can be the trial instead of the circuit rejecting everything.
+        """
+        with self._lock:
+            if self._trial_id == trial_id:
+                self._trial_in_flight = False
+
+
+class GeminiScheduler:
+    """
+    Runs Gemini calls on a fixed set of worker threads, highest priority
+    (lowest number) first, FIFO within a priority.
+    """
+
+    def __init__(self, rate_per_minute=RATE_PER_MINUTE, burst=BURST,
+                 max_concurrency=MAX_CONCURRENCY, max_retries=MAX_RETRIES):
+        self.bucket = TokenBucket(rate_per_minute / 60.0, burst)
+        self.breaker = CircuitBreaker()
+        self.max_retries = max_retries
+
+        self._queue = []
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._stats_lock = threading.Lock()
+        self._stats = {"calls": 0, "retries": 0, "failures": 0, "rejected": 0}
+
+        for number in range(max(1, max_concurrency)):
+            threading.Thread(target=self._worker, name=f"gemini-scheduler-{number}", daemon=True).start()
+
+    def _count(self, name):
+        with self._stats_lock:
+            self._stats[name] += 1
+
+    def submit(self, fn, priority=PRIORITY_INTERACTIVE):
+        """Queues fn() and returns a Future for its result"""
+        future = Future()
+        if self.breaker.rejecting():
+            self._reject(future)
+            return future
+        with self._condition:
+            heapq.heappush(self._queue, (priority, next(self._sequence), fn, future))
+            self._condition.notify()
+        return future
+
+    def _reject(self, future):
+        self._count("rejected")
+        future.set_exception(CircuitOpenError("Gemini API is unavailable right now - try again shortly"))
+
+    def call(self, fn, priority=PRIORITY_INTERACTIVE, timeout=None):
+        """Runs fn() through the scheduler and waits for its result"""
+        return self.submit(fn, priority).result(timeout)
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not self._queue:
+                    self._condition.wait()
+                _, _, fn, future = heapq.heappop(self._queue)
+            if not future.set_running_or_notify_cancel():
+                continue
+            # Checked again here: the circuit may have opened while fn was queued
+            allowed, trial_id = self.breaker.admit()
+            if not allowed:
+                self._reject(future)
+                continue
+            try:
+                self._run(fn, future)
+            finally:
+                if trial_id is not None:
+                    self.breaker.release_trial(trial_id)
+
+    def _run(self, fn, future):
+        attempt = 0
+        while True:
+            self.bucket.acquire()
+            self._count("calls")
+            try:
+                result = fn()
+            except Exception as error:
+                retryable = is_retryable(error)
+                if retryable:
+                    self.breaker.record_failure()
+                if retryable and attempt < self.max_retries and self.breaker.state != CircuitBreaker.OPEN:
+                    self._count("retries")
+                    time.sleep(backoff_delay(attempt))
+                    attempt += 1
+                    continue
+                self._count("failures")
+                future.set_exception(error)
+                return
+            self.breaker.record_success()
+            future.set_result(result)
+            return
+
+    def stats(self):
+        with self._stats_lock:
+            stats = dict(self._stats)
+        with self._condition:
+            stats["queued"] = len(self._queue)
+        stats["circuit"] = self.breaker.state
+        return stats
+
+
+_scheduler = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler():
+    """Returns the process-wide scheduler, starting its workers on first use"""
+    global _scheduler
+    if _scheduler is None:
+        with _scheduler_lock:
+            if _scheduler is None:
+                _scheduler = GeminiScheduler()
+    return _scheduler
@@ -0,0 +1,339 @@
+"""
+Local rule-based pre-screener.
+
+Scores text on the same five categories the Gemini prompt asks for, using a
+phrase automaton, a few regexes and simple style statistics. Messages that
+are clearly critical get an instant local verdict; everything else goes to
+Gemini, since a low local score only means no known pattern matched.
+"""
+import math
+import re
+
+from utils.matcher import PhraseMatcher
+from utils.url_intel import FINDING_EVIDENCE, check_urls
+
+CATEGORIES = [
+    "phishing",
+    "financial_scam",
+    "misinformation",
+    "emotional_manipulation",
+    "urgency_tactics"
+]
+
+# Scores at or above this are reported as critical without asking Gemini
+CRITICAL_MIN_SCORE = 85
+
+# (phrase, category, weight, reason)
+# Weight is roughly "how much this phrase alone should worry you" on a 0-1 scale.
+PHRASE_RULES = [
+    # Phishing
+    ("verify your account", "phishing", 0.7, "Requests account verification through a message"),
+    ("verify your identity", "phishing", 0.7, "Requests identity verification through a message"),
+    ("confirm your identity", "phishing", 0.7, "Requests identity confirmation through a message"),
+    ("confirm your password", "phishing", 0.9, "Asks for a password - legitimate services never do this"),
+    ("enter your password", "phishing", 0.8, "Asks for a password - legitimate services never do this"),
+    ("update your payment", "phishing", 0.6, "Asks you to update payment details via a link"),
+    ("account has been compromised", "phishing", 0.6, "Claims your account is compromised without details"),
+    ("has been compromised", "phishing", 0.5, "Claims something is compromised without details"),
+    ("unusual activity", "phishing", 0.25, "Security alert wording - verify through official channels"),
+    ("account will be suspended", "phishing", 0.6, "Threatens account suspension"),
+    ("permanently suspended", "phishing", 0.6, "Threatens permanent account suspension"),
+    ("will be locked", "phishing", 0.5, "Threatens to lock your account"),
+    ("click here", "phishing", 0.4, "Generic link prompt that hides the destination"),
+    ("click this link", "phishing", 0.45, "Pushes you to click a link"),
+    ("login details", "phishing", 0.6, "Asks for login details"),
+    ("one-time password", "phishing", 0.7, "Asks for a one-time password"),
+    ("otp", "phishing", 0.5, "Mentions a one-time password - never share it"),
+    ("social security number", "phishing", 0.8, "Asks for a Social Security number"),
+    ("pin code", "phishing", 0.6, "Asks for a PIN"),
+
+    # Financial scams
+    ("western union", "financial_scam", 0.8, "Untraceable money transfer service favoured by scammers"),
+    ("moneygram", "financial_scam", 0.8, "Untraceable money transfer service favoured by scammers"),
+    ("gift card", "financial_scam", 0.8, "Legitimate organizations never ask for payment in gift cards"),
+    ("gift cards", "financial_scam", 0.8, "Legitimate organizations never ask for payment in gift cards"),
+    ("wire transfer", "financial_scam", 0.5, "Asks for a wire transfer"),
+    ("bitcoin", "financial_scam", 0.4, "Cryptocurrency payment request"),
+    ("crypto", "financial_scam", 0.3, "Cryptocurrency mention"),
+    ("bank details", "financial_scam", 0.8, "Requests bank details"),
+    ("send your bank", "financial_scam", 0.9, "Requests bank details"),
+    ("you won", "financial_scam", 0.7, "Unsolicited prize claim"),
+    ("you've won", "financial_scam", 0.7, "Unsolicited prize claim"),
+    ("you have won", "financial_scam", 0.7, "Unsolicited prize claim"),
+    ("cash prize", "financial_scam", 0.7, "Unsolicited prize claim"),
+    ("claim your prize", "financial_scam", 0.8, "Asks you to claim a prize you never entered for"),
+    ("lottery", "financial_scam", 0.5, "Lottery winnings claim"),
+    ("inheritance", "financial_scam", 0.5, "Unexpected inheritance claim"),
+    ("nigerian prince", "financial_scam", 0.95, "Classic advance-fee fraud"),
+    ("commission", "financial_scam", 0.3, "Promise of commission payments"),
+    ("per week", "financial_scam", 0.2, "Income promise"),
+    ("working from home", "financial_scam", 0.25, "Work-from-home income promise"),
+    ("from home", "financial_scam", 0.15, "Work-from-home income promise"),
+    ("no experience", "financial_scam", 0.5, "High pay with no requirements"),
+    ("guaranteed return", "financial_scam", 0.8, "No real investment is guaranteed"),
+    ("double your money", "financial_scam", 0.9, "Unrealistic investment promise"),
+    ("investment opportunity", "financial_scam", 0.4, "Unsolicited investment pitch"),
+    ("processing fee", "financial_scam", 0.6, "Upfront fee request"),
+    ("training materials", "financial_scam", 0.3, "Upfront fee for job materials"),
+    ("back taxes", "financial_scam", 0.5, "Tax debt claim"),
+    ("transferring funds", "financial_scam", 0.6, "Asks for help moving money"),
+
+    # Misinformation
+    ("miracle cure", "misinformation", 0.8, "Miracle cures don't exist"),
+    ("doctors hate", "misinformation", 0.8, "Clickbait health claim"),
+    ("they don't want you to know", "misinformation", 0.8, "Conspiracy framing"),
+    ("mainstream media won't", "misinformation", 0.7, "Conspiracy framing"),
+    ("100% guaranteed", "misinformation", 0.5, "Absolute claim that can't be true"),
+    ("share before it's deleted", "misinformation", 0.8, "Pressure to spread unverified content"),
+    ("share before deleted", "misinformation", 0.8, "Pressure to spread unverified content"),
+    ("forward this to", "misinformation", 0.5, "Chain message"),
+    ("scientists confirm", "misinformation", 0.3, "Vague appeal to authority"),
+    ("secret cure", "misinformation", 0.8, "Miracle cures don't exist"),
+
+    # Emotional manipulation
+    ("congratulations", "emotional_manipulation", 0.4, "Excitement used to lower your guard"),
+    ("you've been selected", "emotional_manipulation", 0.6, "Unsolicited 'selected' claim"),
+    ("you have been selected", "emotional_manipulation", 0.4, "Unsolicited 'selected' claim"),
+    ("i love you", "emotional_manipulation", 0.4, "Fast affection - common in romance scams"),
+    ("dear friend", "emotional_manipulation", 0.3, "Generic intimacy from a stranger"),
+    ("avoid arrest", "emotional_manipulation", 0.9, "Threat of arrest to create panic"),
+    ("arrest", "emotional_manipulation", 0.6, "Threat of arrest to create panic"),
+    ("lawsuit", "emotional_manipulation", 0.4, "Legal threat"),
+    ("forfeit", "emotional_manipulation", 0.6, "Threat of losing something"),
+    ("lose forever", "emotional_manipulation", 0.7, "Threat of permanent loss"),
+    ("don't tell anyone", "emotional_manipulation", 0.8, "Secrecy request - isolates the victim"),
+    ("keep this confidential", "emotional_manipulation", 0.6, "Secrecy request"),
+    ("in danger", "emotional_manipulation", 0.5, "Fear of harm"),
+    ("i need your help", "emotional_manipulation", 0.4, "Appeal for help from a stranger"),
+    ("pay you back", "emotional_manipulation", 0.5, "Promise of repayment"),
+
+    # Urgency
+    ("urgent", "urgency_tactics", 0.5, "Urgency pressure"),
+    ("immediately", "urgency_tactics", 0.5, "Pressures instant action"),
+    ("act now", "urgency_tactics", 0.6, "Pressures instant action"),
+    ("right now", "urgency_tactics", 0.4, "Pressures instant action"),
+    ("click here now", "urgency_tactics", 0.7, "Urgent call to action"),
+    ("join now", "urgency_tactics", 0.4, "Urgent call to action"),
+    ("claim now", "urgency_tactics", 0.5, "Urgent call to action"),
+    ("within 24 hours", "urgency_tactics", 0.6, "Artificial deadline"),
+    ("in 2 hours", "urgency_tactics", 0.7, "Extreme deadline"),
+    ("before midnight", "urgency_tactics", 0.6, "Artificial deadline"),
+    ("expires today", "urgency_tactics", 0.4, "Deadline pressure"),
+    ("today only", "urgency_tactics", 0.25, "Sales deadline"),
+    ("last chance", "urgency_tactics", 0.4, "Deadline pressure"),
+    ("final notice", "urgency_tactics", 0.6, "Deadline pressure"),
+    ("limited spots", "urgency_tactics", 0.5, "Artificial scarcity"),
+    ("limited time", "urgency_tactics", 0.2, "Sales deadline"),
+    ("don't miss out", "urgency_tactics", 0.3, "Fear of missing out"),
+    ("start today", "urgency_tactics", 0.3, "Pressure to start immediately"),
+]
+
+URL_RE = re.compile(
+    r"\b(?:https?://|www\.)[^\s<>\"']+|\b[a-z0-9][a-z0-9-]*(?:\.[a-z0-9-]+)*\.(?:com|net|org|info|biz|xyz|top|io|co|ly|me|ru|cn|tk|in)\b(?:/[^\s<>\"']*)?",
+    re.IGNORECASE
+)
+SHORTENER_RE = re.compile(r"\b(?:bit\.ly|tinyurl\.com|goo\.gl|t\.co|ow\.ly|is\.gd|cutt\.ly|rb\.gy)\b", re.IGNORECASE)
+IP_URL_RE = re.compile(r"\b(?:https?://)?\d{1,3}(?:\.\d{1,3}){3}\b")
+# Hyphenated "brand-security-login.com" style domains
+LOOKALIKE_DOMAIN_RE = re.compile(
+    r"\b[a-z0-9]+-(?:[a-z0-9]+-)*(?:security|secure|verify|login|account|update|support|check)[a-z0-9-]*\.[a-z]{2,}\b",
+    re.IGNORECASE
+)
+MONEY_RE = re.compile(
+    r"(?:[$€£₹]\s?\d[\d,]*(?:\.\d+)?(?:\s?(?:k|million|billion|m|bn))?"
+    r"|\b\d[\d,]*(?:\.\d+)?\s?(?:dollars|usd|euros|rupees|rs\.?|inr|million|billion)\b"
+    r"|\brs\.?\s?\d[\d,]*)",
+    re.IGNORECASE
+)
+LARGE_MONEY_RE = re.compile(r"(?:\d{1,3}(?:,\d{3}){1,}|\d{4,}|\bmillion\b|\bbillion\b)", re.IGNORECASE)
+CAPS_WORD_RE = re.compile(r"\b[A-Z]{3,}\b")
+WORD_RE = re.compile(r"\b\w+\b")
+
+_matcher = PhraseMatcher(rule[0] for rule in PHRASE_RULES)
+
+
+def _saturate(evidence, scale=1.0):
+    """Maps unbounded evidence onto 0-100 with diminishing returns"""
+    return 100 * (1 - math.exp(-evidence / scale))
+
+
+def score_text(text):
+    """
+    Computes local heuristic scores for text.
+
+    Returns:
+        dict: {
+            "overall_confidence_score": int,
+            "category_scores": {category: int},
+            "matches": [{"phrase", "category", "weight", "reason", "start", "end"}],
+            "urls": [str], "money": [str],
+            "caps_ratio": float, "exclamation_ratio": float
+        }
+    """
+    evidence = {category: 0.0 for category in CATEGORIES}
+    matches = []
+    seen = set()
+
+    for start, end, index in _matcher.find_all(text, whole_words=True):
+        phrase, category, weight, reason = PHRASE_RULES[index]
+        if index in seen:
+            # Repeats add a little, but one phrase can't dominate by itself
+            evidence[category] += weight * 0.1
+            continue
+        seen.add(index)
+        evidence[category] += weight
+        matches.append({
+            "phrase": text[start:end],
+            "category": category,
+            "weight": weight,
+            "reason": reason,
+            "start": start,
+            "end": end
+        })
+
+    urls = [m.group(0) for m in URL_RE.finditer(text)]
+    money = [m.group(0) for m in MONEY_RE.finditer(text)]
+
+    if urls:
+        evidence["phishing"] += 0.15
+    if SHORTENER_RE.search(text):
+        evidence["phishing"] += 0.7
+    if IP_URL_RE.search(text):
+        evidence["phishing"] += 0.8
+    for found in LOOKALIKE_DOMAIN_RE.finditer(text):
+        evidence["phishing"] += 0.9
+        matches.append({
+            "phrase": found.group(0),
+            "category": "phishing",
+            "weight": 0.9,
+            "reason": "Lookalike domain - real companies don't use hyphenated 'security/verify' domains",
+            "start": found.start(),
+            "end": found.end()
+        })
+
+    # Blocklist and brand checks from utils.url_intel; a domain the regex
+    # above already flagged isn't counted twice
+    flagged = [(m["start"], m["end"]) for m in matches if m["category"] == "phishing"]
+    for finding in check_urls(text):
+        weight = FINDING_EVIDENCE.get(finding["kind"])
+        if weight is None:
+            continue
+        if finding["kind"] != "blocklisted" and any(
+            start < finding["end"] and finding["start"] < end for start, end in flagged
+        ):
+            continue
+        evidence["phishing"] += weight
+        matches.append({
+            "phrase": text[finding["start"]:finding["end"]],
+            "category": "phishing",
+            "weight": min(weight, 1.0),
+            "reason": finding["detail"],
+            "start": finding["start"],
+            "end": finding["end"]
+        })
+
+    if money:
+        evidence["financial_scam"] += 0.2
+        if any(LARGE_MONEY_RE.search(amount) for amount in money):
+            evidence["financial_scam"] += 0.3
+
+    # Style: shouting and exclamation marks
+    words = WORD_RE.findall(text)
+    word_count = max(len(words), 1)
+    caps_ratio = len(CAPS_WORD_RE.findall(text)) / word_count
+    exclamation_ratio = text.count("!") / word_count
+    evidence["urgency_tactics"] += min(caps_ratio * 1.5, 0.4) + min(exclamation_ratio * 2.0, 0.3)
+    evidence["emotional_manipulation"] += min(exclamation_ratio * 2.0, 0.3)
+
+    category_scores = {
+        category: int(round(_saturate(evidence[category]))) for category in CATEGORIES
+    }
+
+    # Overall: the strongest category, pushed up by corroborating evidence
+    ranked = sorted(category_scores.values(), reverse=True)
+    top, second, third = ranked[0], ranked[1], ranked[2]
+    overall = top + (100 - top) * (0.5 * second + 0.25 * third) / 100
+    overall_score = int(round(min(overall, 100)))
+
+    return {
+        "overall_confidence_score": overall_score,
+        "category_scores": category_scores,
+        "matches": sorted(matches, key=lambda m: m["start"]),
+        "urls": urls,
+        "money": money,
+        "caps_ratio": caps_ratio,
+        "exclamation_ratio": exclamation_ratio
+    }
+
+
+def _severity(weight):
+    if weight >= 0.7:
+        return "high"
+    if weight >= 0.4:
+        return "medium"
+    return "low"
+
+
+def build_local_analysis(text, scores=None):
+    """
+    Turns local scores into the same data shape that analyze_text returns
+    from Gemini, so the UI can render it unchanged.
+    """
+    scores = scores or score_text(text)
+    overall = scores["overall_confidence_score"]
+    is_safe = overall < 50
+
+    red_flags = []
+    seen_reasons = set()
+    for match in scores["matches"]:
+        if match["reason"] in seen_reasons:
+            continue
+        seen_reasons.add(match["reason"])
+        red_flags.append({
+            "flag": match["reason"],
+            "severity": _severity(match["weight"]),
+            "explanation": f"The text contains \"{match['phrase']}\". {match['reason']}."
+        })
+
+    suspicious_phrases = [
+        {"phrase": match["phrase"], "reason": match["reason"]}
+        for match in scores["matches"]
+        if match["weight"] >= 0.4
+    ]
+
+    if is_safe:
+        assessment = "No common scam or manipulation patterns were found in this text."
+        recommendation = "This message looks like normal communication. As always, verify the sender if anything feels off."
+    else:
+        assessment = "This text matches several well-known scam patterns."
+        recommendation = "Do not click links, reply, or send money or personal details. Contact the organization directly using official contact information."
+
+    return {
+        "overall_confidence_score": overall,
+        "overall_assessment": assessment,
+        "category_scores": dict(scores["category_scores"]),
+        "red_flags": red_flags,
+        "suspicious_phrases": suspicious_phrases,
+        "recommendation": recommendation,
+        "is_safe": is_safe
+    }
+
+
+def prescreen(text):
+    """
+    Returns a local analysis if the text is clearly critical, or None if it
+    should go to Gemini.
+
+    There is deliberately no local "safe" verdict: a scam with no known
+    phrases ("Hi mom, this is my new number, can you send me some money?")
+    scores as low as a harmless note.
+    """
+    scores = score_text(text)
+    overall = scores["overall_confidence_score"]
+
+    # Style statistics alone never justify a critical verdict - require
+    # at least two concrete matched patterns as well
+    if overall >= CRITICAL_MIN_SCORE and len(scores["matches"]) >= 2:
+        return build_local_analysis(text, scores)
+
+    return None
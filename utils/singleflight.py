@@ -0,0 +1,89 @@
+"""
+Single-flight request coalescing.
+
+When many sessions ask for the same thing at the same time (a scam wave, with
+everyone pasting the identical message), only the first caller does the work;
+the others wait for it and share its result. Keys are only "in flight" while
+the work runs - this is not a cache.
+"""
+import threading
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+        self.waiters = 0
+
+    def wait(self, timeout=None):
+        if not self.done.wait(timeout):
+            raise TimeoutError("Timed out waiting for an in-flight request")
+        if self.error is not None:
+            raise self.error
+        return self.result
+
+
+class SingleFlight:
+    """Coalesces concurrent calls that share a key into one execution"""
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self._stats = {"executions": 0, "coalesced": 0}
+
+    def begin(self, key):
+        """
+        Joins the in-flight call for key, or starts a new one.
+
+        Returns:
+            tuple: (call, is_leader). The leader must call finish() exactly
+                once; followers call call.wait().
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                self._stats["coalesced"] += 1
+                return call, False
+            call = _Call()
+            self._calls[key] = call
+            self._stats["executions"] += 1
+            return call, True
+
+    def finish(self, key, call, result=None, error=None):
+        """Publishes the leader's outcome to every waiter and releases the key"""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
+        call.result = result
+        call.error = error
+        call.done.set()
+
+    def do(self, key, fn):
+        """
+        Runs fn() unless an identical call is already running, in which case
+        it waits for that call instead.
+
+        Returns:
+            tuple: (result, shared) - shared is True if the result came from
+                another caller's execution.
+        """
+        call, is_leader = self.begin(key)
+        if not is_leader:
+            return call.wait(), True
+
+        try:
+            result = fn()
+        except BaseException as error:
+            self.finish(key, call, error=error)
+            raise
+        self.finish(key, call, result=result)
+        return result, False
+
+    def stats(self):
+        """Executions, coalesced callers, and keys currently in flight"""
+        with self._lock:
+            stats = dict(self._stats)
+            stats["in_flight"] = len(self._calls)
+        return stats
@@ -0,0 +1,125 @@
+import json
+
+
+class IncrementalJSONParser:
+    """
+    Incremental parser for a single streamed JSON object.
+
+    Feed it chunks of text as they arrive and it reports each top-level field
+    as soon as that field's value is complete. Elements of top-level arrays
+    (red_flags, suspicious_phrases, ...) are reported one by one as well, so
+    the UI doesn't have to wait for the whole array to close.
+
+    Text before the opening brace (markdown fences, stray prose) is skipped.
+    Each character is scanned exactly once no matter how many chunks arrive.
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._pos = 0
+        self._started = False
+        self.done = False
+
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+        self._key = None
+        self._key_start = None
+        self._value_start = None
+        self._in_array = False
+        self._item_start = None
+
+    def feed(self, chunk):
+        """
+        Adds a chunk of text and returns the events it completed.
+
+        Returns:
+            list: ("field", key, value) once a top-level value is complete and
+                ("item", key, value) for each complete element of a top-level array.
+        """
+        events = []
+        if self.done or not chunk:
+            return events
+
+        self._buffer += chunk
+        buf = self._buffer
+        i = self._pos
+        n = len(buf)
+
+        while i < n and not self.done:
+            ch = buf[i]
+
+            if not self._started:
+                if ch == "{":
+                    self._started = True
+                    self._depth = 1
+                i += 1
+                continue
+
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif ch == "\\":
+                    self._escape = True
+                elif ch == '"':
+                    self._in_string = False
+                    if self._key_start is not None:
+                        self._key = json.loads(buf[self._key_start:i + 1])
+                        self._key_start = None
+                i += 1
+                continue
+
+            if ch == '"':
+                self._in_string = True
+                if self._depth == 1 and self._value_start is None:
+                    self._key_start = i
+            elif ch == ":" and self._depth == 1:
+                self._value_start = i + 1
+            elif ch in "[{":
+                self._depth += 1
+                if ch == "[" and self._depth == 2 and self._value_start is not None:
+                    self._in_array = True
+                    self._item_start = i + 1
+            elif ch in "]}":
+                if self._in_array and self._depth == 2 and ch == "]":
+                    self._emit_item(buf[self._item_start:i], events)
+                    self._in_array = False
+                self._depth -= 1
+                if self._depth == 0:
+                    self._emit_field(buf[self._value_start:i] if self._value_start is not None else "", events)
+                    self.done = True
+            elif ch == ",":
+                if self._depth == 1:
+                    self._emit_field(buf[self._value_start:i], events)
+                elif self._depth == 2 and self._in_array:
+                    self._emit_item(buf[self._item_start:i], events)
+                    self._item_start = i + 1
+
+            i += 1
+
+        self._pos = i
+        return events
+
+    def _emit_field(self, raw, events):
+        raw = raw.strip()
+        if self._key is not None and raw:
+            try:
+                events.append(("field", self._key, json.loads(raw)))
+            except json.JSONDecodeError:
+                pass
+        self._key = None
+        self._value_start = None
+
+    def _emit_item(self, raw, events):
+        raw = raw.strip()
+        if raw:
+            try:
+                events.append(("item", self._key, json.loads(raw)))
+            except json.JSONDecodeError:
+                pass
+
+    @property
+    def text(self):
+        """Everything fed so far"""
+        return self._buffer
@@ -0,0 +1,425 @@
+"""
+Local URL intelligence: what can be said about the links in a message
+without asking Gemini.
+
+    extract_urls        finds URLs and bare domains in text
+    BloomFilter         compact blocklist of known-bad domains and URLs;
+                        millions of entries in a few MB
+    BKTree              edit-distance index over brand names, for spotting
+                        lookalike domains such as paypa1.com or arnazon.com
+    check_urls          runs all of the above and returns findings
+
+Findings go into the Gemini prompt (format_url_findings), raise the local
+phishing score (utils.scoring) and a blocklisted link gives an instant
+high-risk verdict (utils.gemini_analysis).
+
+Configuration (environment):
+    URL_BLOCKLIST_PATH   a blocklist: a text file with one domain or URL per
+                         line, or a .bloom file from build-blocklist
+                         (default data/domain_blocklist.txt)
+
+Compile a large blocklist once:
+    python -m utils.url_intel build-blocklist domains.txt blocklist.bloom
+"""
+import hashlib
+import math
+import os
+import re
+import struct
+import sys
+import threading
+
+URL_BLOCKLIST_PATH = os.getenv(
+    "URL_BLOCKLIST_PATH",
+    os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "data", "domain_blocklist.txt")
+)
+
+# False positive rate of a blocklist compiled from a text file
+BLOCKLIST_ERROR_RATE = 1e-6
+
+# Official domains of brands that scammers imitate; name -> domains, main
+# domain first. Regional sites must be listed: the brand's name on an
+# unlisted suffix is reported as impersonation
+BRAND_DOMAINS = {
+    "amazon": [
+        "amazon.com", "amazon.co.uk", "amazon.in", "amazon.de", "amazon.ca", "amazon.com.au", "amazon.co.jp",
+        "amazon.fr", "amazon.it", "amazon.es", "amazon.nl", "amazon.se", "amazon.pl", "amazon.com.br",
+        "amazon.com.mx", "amazon.sg", "amazon.ae", "amazon.sa", "amazon.com.tr", "amazon.eg",
+    ],
+    "apple": ["apple.com", "icloud.com", "apple.co"],
+    "paypal": ["paypal.com", "paypal.me"],
+    "google": [
+        "google.com", "gmail.com", "google.co.uk", "google.co.in", "google.ca", "google.com.au", "google.de",
+        "google.fr", "google.co.jp", "google.com.br", "google.es", "google.it",
+    ],
+    "microsoft": ["microsoft.com", "live.com", "outlook.com", "office.com"],
+    "netflix": ["netflix.com"],
+    "facebook": ["facebook.com"],
+    "instagram": ["instagram.com"],
+    "whatsapp": ["whatsapp.com"],
+    "linkedin": ["linkedin.com"],
+    "ebay": ["ebay.com", "ebay.co.uk", "ebay.de", "ebay.com.au", "ebay.ca", "ebay.fr", "ebay.it"],
+    "chase": ["chase.com"],
+    "wellsfargo": ["wellsfargo.com"],
+    "bankofamerica": ["bankofamerica.com"],
+    "citibank": ["citibank.com", "citi.com"],
+    "hsbc": ["hsbc.com", "hsbc.co.uk", "hsbc.com.hk", "hsbc.co.in", "hsbc.ca"],
+    "coinbase": ["coinbase.com"],
+    "binance": ["binance.com"],
+    "fedex": ["fedex.com"],
+    "usps": ["usps.com"],
+    "dhl": ["dhl.com", "dhl.de"],
+    "irs": ["irs.gov"],
+    "dropbox": ["dropbox.com"],
+    "docusign": ["docusign.com", "docusign.net"],
+}
+
+# Brand names this short match too many ordinary words to allow typos
+MIN_FUZZY_BRAND_LENGTH = 5
+
+SHORTENERS = {"bit.ly", "tinyurl.com", "goo.gl", "t.co", "ow.ly", "is.gd", "cutt.ly", "rb.gy"}
+
+# Second-level labels under which the registered domain has three labels (example.co.uk)
+SECOND_LEVEL_LABELS = {"co", "com", "org", "net", "gov", "ac", "edu"}
+
+TLDS = (
+    "com|net|org|info|biz|xyz|top|io|co|ly|me|ru|cn|tk|in|uk|de|gov|edu|us|ca|au|app|site|online|"
+    "shop|live|club|link|click|support|account|security|help|pw|cc|ws|gl|gd|"
+    "jp|fr|it|es|nl|se|pl|br|mx|sg|ae|sa|tr|eg|hk"
+)
+URL_RE = re.compile(
+    r"(?:\bhttps?://[^\s<>\"']+"
+    r"|\bwww\.[^\s<>\"']+"
+    r"|\b(?:[a-z0-9](?:[a-z0-9-]*[a-z0-9])?\.)+(?:" + TLDS + r")\b(?:[/?#][^\s<>\"']*)?"
+    r"|\b\d{1,3}(?:\.\d{1,3}){3}\b(?:[/:][^\s<>\"']*)?)",
+    re.IGNORECASE
+)
+IP_RE = re.compile(r"^\d{1,3}(?:\.\d{1,3}){3}$")
+
+# Characters scammers swap in for letters that look alike
+HOMOGLYPHS = str.maketrans({"0": "o", "1": "l", "3": "e", "4": "a", "5": "s", "7": "t", "$": "s", "@": "a"})
+
+_BLOOM_MAGIC = b"DLABLOOM1"
+
+
+def extract_urls(text):
+    """
+    Finds URLs and bare domains in text.
+
+    Returns:
+        list: {"url", "host", "path", "start", "end"} per link, in text
+            order. host is lowercased with any "www." and port removed.
+    """
+    urls = []
+    for match in URL_RE.finditer(text):
+        url = match.group(0).rstrip(".,;:!?)]}'\"")
+        rest = re.sub(r"^https?://", "", url, flags=re.IGNORECASE)
+        host, _, path = rest.partition("/")
+        host = host.split("?")[0].split("#")[0].split("@")[-1].split(":")[0].lower()
+        if host.startswith("www."):
+            host = host[4:]
+        if not host:
+            continue
+        urls.append({
+            "url": url,
+            "host": host,
+            "path": path,
+            "start": match.start(),
+            "end": match.start() + len(url)
+        })
+    return urls
+
+
+def registered_domain(host):
+    """The domain someone registered: example.com for login.example.com, example.co.uk for a.example.co.uk"""
+    labels = host.split(".")
+    if len(labels) >= 3 and len(labels[-1]) == 2 and labels[-2] in SECOND_LEVEL_LABELS:
+        return ".".join(labels[-3:])
+    return ".".join(labels[-2:])
+
+
+class BloomFilter:
+    """
+    Set membership in m bits with k hash functions: no false negatives and
+    a tunable false positive rate. Positions come from one BLAKE2b digest
+    with double hashing.
+    """
+
+    def __init__(self, size_bits, hash_count, bits=None):
+        self.size_bits = size_bits
+        self.hash_count = hash_count
+        self.bits = bits if bits is not None else bytearray((size_bits + 7) // 8)
+
+    @classmethod
+    def for_capacity(cls, capacity, error_rate=BLOCKLIST_ERROR_RATE):
+        capacity = max(1, capacity)
+        size_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / (math.log(2) ** 2))))
+        hash_count = max(1, int(round(size_bits / capacity * math.log(2))))
+        return cls(size_bits, hash_count)
+
+    def _positions(self, item):
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1, h2 = struct.unpack("<QQ", digest)
+        h2 |= 1
+        return [(h1 + i * h2) % self.size_bits for i in range(self.hash_count)]
+
+    def add(self, item):
+        for position in self._positions(item):
+            self.bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def save(self, path):
+        with open(path, "wb") as handle:
+            handle.write(_BLOOM_MAGIC + struct.pack("<QI", self.size_bits, self.hash_count))
+            handle.write(self.bits)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, "rb") as handle:
+            header = handle.read(len(_BLOOM_MAGIC) + 12)
+            if not header.startswith(_BLOOM_MAGIC):
+                raise Exception(f"Not a blocklist file: {path}")
+            size_bits, hash_count = struct.unpack("<QI", header[len(_BLOOM_MAGIC):])
+            return cls(size_bits, hash_count, bytearray(handle.read()))
+
+
+def normalize_blocklist_entry(entry):
+    """Blocklist entries and lookups use lowercased host[/path] without scheme or www."""
+    entry = re.sub(r"^https?://", "", entry.strip().lower())
+    if entry.startswith("www."):
+        entry = entry[4:]
+    return entry.rstrip("/")
+
+
+def read_blocklist_entries(path):
+    with open(path, encoding="utf-8") as handle:
+        for line in handle:
+            line = line.split("#", 1)[0].strip()
+            if line:
+                yield normalize_blocklist_entry(line)
+
+
+def build_blocklist(entries, error_rate=BLOCKLIST_ERROR_RATE):
+    entries = list(entries)
+    bloom = BloomFilter.for_capacity(len(entries), error_rate)
+    for entry in entries:
+        bloom.add(entry)
+    return bloom
+
+
+def levenshtein(a, b):
+    if len(a) < len(b):
+        a, b = b, a
+    previous = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        current = [i]
+        for j, cb in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (ca != cb)))
+        previous = current
+    return previous[-1]
+
+
+class BKTree:
+    """Burkhard-Keller tree: finds every word within an edit distance without comparing against all of them"""
+
+    def __init__(self, words=()):
+        self._root = None
+        for word in words:
+            self.add(word)
+
+    def add(self, word):
+        if self._root is None:
+            self._root = (word, {})
+            return
+        node = self._root
+        while True:
+            distance = levenshtein(word, node[0])
+            if distance == 0:
+                return
+            child = node[1].get(distance)
+            if child is None:
+                node[1][distance] = (word, {})
+                return
+            node = child
+
+    def search(self, word, max_distance):
+        """(distance, word) for every word within max_distance of word, closest first"""
+        found = []
+        stack = [self._root] if self._root is not None else []
+        while stack:
+            node_word, children = stack.pop()
+            distance = levenshtein(word, node_word)
+            if distance <= max_distance:
+                found.append((distance, node_word))
+            for child_distance, child in children.items():
+                if distance - max_distance <= child_distance <= distance + max_distance:
+                    stack.append(child)
+        return sorted(found)
+
+
+_blocklist = None
+_blocklist_loaded = False
+_brand_tree = None
+_official_domains = None
+_lock = threading.Lock()
+
+
+def get_blocklist():
+    """The blocklist at URL_BLOCKLIST_PATH as a BloomFilter, loaded on first use; None if there is none"""
+    global _blocklist, _blocklist_loaded
+    if not _blocklist_loaded:
+        with _lock:
+            if not _blocklist_loaded:
+                if os.path.exists(URL_BLOCKLIST_PATH):
+                    if URL_BLOCKLIST_PATH.endswith(".bloom"):
+                        _blocklist = BloomFilter.load(URL_BLOCKLIST_PATH)
+                    else:
+                        _blocklist = build_blocklist(read_blocklist_entries(URL_BLOCKLIST_PATH))
+                _blocklist_loaded = True
+    return _blocklist
+
+
+def set_blocklist(bloom):
+    """Replaces the blocklist (None disables it)"""
+    global _blocklist, _blocklist_loaded
+    with _lock:
+        _blocklist = bloom
+        _blocklist_loaded = True
+
+
+def _brand_index():
+    global _brand_tree, _official_domains
+    if _brand_tree is None:
+        with _lock:
+            if _brand_tree is None:
+                _official_domains = {domain for domains in BRAND_DOMAINS.values() for domain in domains}
+                _brand_tree = BKTree(brand for brand in BRAND_DOMAINS if len(brand) >= MIN_FUZZY_BRAND_LENGTH)
+    return _brand_tree, _official_domains
+
+
+def is_official_domain(domain):
+    """
+    True for a registered domain listed in BRAND_DOMAINS. Only listed
+    domains count: a brand's name on any other suffix (paypal.tk, chase.co,
+    amazon.com.ru) is exactly what impersonators register.
+    """
+    _, official_domains = _brand_index()
+    return domain in official_domains
+
+
+def _is_blocklisted(blocklist, link):
+    host = link["host"]
+    labels = host.split(".")
+    candidates = [".".join(labels[i:]) for i in range(len(labels) - 1)]
+    if link["path"]:
+        candidates.append(normalize_blocklist_entry(f"{host}/{link['path']}"))
+    return any(candidate in blocklist for candidate in candidates)
+
+
+def check_urls(text):
+    """
+    Extracts the links in text and checks each against the blocklist and
+    the brand list.
+
+    Returns:
+        list: One finding per suspicious link:
+            {"url", "host", "kind", "detail", "brand", "start", "end"}.
+            kind is "blocklisted", "lookalike" (typo of a brand name),
+            "brand_impersonation" (brand name inside another domain),
+            "shortener" or "ip_address".
+    """
+    findings = []
+    blocklist = get_blocklist()
+    brand_tree, _ = _brand_index()
+
+    for link in extract_urls(text):
+        host = link["host"]
+        domain = registered_domain(host)
+
+        def finding(kind, detail, brand=None):
+            findings.append({
+                "url": link["url"], "host": host, "kind": kind, "detail": detail, "brand": brand,
+                "start": link["start"], "end": link["end"]
+            })
+
+        if blocklist is not None and _is_blocklisted(blocklist, link):
+            finding("blocklisted", f"{host} is on the blocklist of known scam domains")
+            continue
+        if IP_RE.match(host):
+            finding("ip_address", f"{host} is a raw IP address instead of a domain name")
+            continue
+        if domain in SHORTENERS:
+            finding("shortener", f"{domain} is a link shortener that hides the real destination")
+            continue
+        if is_official_domain(domain):
+            continue
+
+        tokens = [token for token in re.split(r"[.-]", host) if token]
+        brand = next((token for token in tokens[:-1] if token in BRAND_DOMAINS), None)
+        if brand is not None:
+            finding("brand_impersonation",
+                    f"{host} uses the name '{brand}' but is not an official {brand} domain "
+                    f"({', '.join(BRAND_DOMAINS[brand][:2])})", brand)
+            continue
+
+        label = domain.split(".")[0]
+        normalized = label.translate(HOMOGLYPHS).replace("rn", "m").replace("vv", "w")
+        if len(normalized) < MIN_FUZZY_BRAND_LENGTH:
+            continue
+        max_distance = 1 if len(normalized) <= 6 else 2
+        matches = brand_tree.search(normalized, max_distance)
+        if matches:
+            brand = matches[0][1]
+            finding("lookalike", f"{domain} looks like {BRAND_DOMAINS[brand][0]} but is a different domain", brand)
+
+    return findings
+
+
+# Evidence each finding adds to the local phishing score (see utils.scoring;
+# shorteners and IP addresses are already scored there by regex)
+FINDING_EVIDENCE = {
+    "blocklisted": 3.0,
+    "lookalike": 1.2,
+    "brand_impersonation": 1.0,
+}
+
+# Lowest phishing score a Gemini answer may give a message with these findings
+PHISHING_FLOORS = {
+    "blocklisted": 95,
+    "lookalike": 80,
+    "brand_impersonation": 75,
+}
+
+
+def phishing_floor(findings):
+    return max((PHISHING_FLOORS.get(finding["kind"], 0) for finding in findings), default=0)
+
+
+def format_url_findings(findings):
+    """The findings as a prompt section, or an empty string if there are none"""
+    if not findings:
+        return ""
+    lines = [f"- {finding['url']}: {finding['detail']}" for finding in findings]
+    return (
+        "LOCAL URL CHECKS (verified automatically - treat these as facts and flag the links):\n"
+        + "\n".join(lines) + "\n\n"
+    )
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if len(argv) != 3 or argv[0] != "build-blocklist":
+        print("Usage: python -m utils.url_intel build-blocklist DOMAINS.txt OUTPUT.bloom", file=sys.stderr)
+        return 2
+    entries = list(read_blocklist_entries(argv[1]))
+    bloom = build_blocklist(entries)
+    bloom.save(argv[2])
+    print(f"Wrote {len(entries)} entries ({len(bloom.bits) / 1e6:.1f} MB, "
+          f"{bloom.hash_count} hashes) to {argv[2]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())